@@ -61,7 +61,8 @@ def do_arima_fuzzy_sensibility(args):
     # use pre-computed distance matrix
     distance_dtw = DistanceByDTW()
     distance_dtw.load_distance_matrix_2d(spt_region_metadata.distances_filename,
-                                         spt_region_metadata.region)
+                                         spt_region_metadata.region,
+                                         mmap_mode='r')
 
     # faster... (whole_brazil_1y_1ppd, k=8, seed=0)
     # initial_medoids = [5816, 1163, 4295, 4905, 3156, 2648, 172, 3764]
@@ -111,7 +111,8 @@ def do_arima_error_analysis(args, logger):
     # use pre-computed distance matrix
     distance_measure = DistanceByDTW()
     distance_measure.load_distance_matrix_2d(region_metadata.distances_filename,
-                                             region_metadata.region)
+                                             region_metadata.region,
+                                             mmap_mode='r')
 
     for clustering_metadata in clustering_suite:
         logger.info('Clustering algorithm: {}'.format(clustering_metadata))
@@ -14,6 +14,7 @@ import csv
 import numpy as np
 import os
 
+from spta.arima.model import arima_order as get_arima_order
 from spta.arima.train import TrainerAutoArima, extract_pdq
 from spta.distance.dtw import DistanceByDTW
 
@@ -226,7 +227,7 @@ def distance_vs_errors_for_cluster(cluster, solver_trainer, partition, forecast_
 
         # get ARIMA order at point of interest, need the value to get the actual ARIMA object
         fitted_arima_at_medoid = arima_model_region.value_at(cluster.centroid)
-        arima_order = fitted_arima_at_medoid.model.order
+        arima_order = get_arima_order(fitted_arima_at_medoid)
 
         # add some info about plot
         info_text = '\n'.join((
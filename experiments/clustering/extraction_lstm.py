@@ -96,7 +96,8 @@ def analyze_suite(args, logger):
     # use pre-computed distance matrix
     # TODO this code is broken if we don't use DTW
     distance_measure.load_distance_matrix_2d(region_metadata.distances_filename,
-                                             region_metadata.region)
+                                             region_metadata.region,
+                                             mmap_mode='r')
 
     choice_args = solver_metadata_from_args(args)
 
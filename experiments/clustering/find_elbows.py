@@ -39,6 +39,9 @@ Only supports kmedoids!'''
     parser.add_argument('clustering_suite', help='ID of the k-medoids clustering suite',
                         choices=kmedoids_suites().keys())
 
+    # optionally find the partitions of the suite in parallel
+    parser.add_argument('--parallel', help='number of parallel workers')
+
     # logging
     log_options = ('WARN', 'INFO', 'DEBUG')
     log_help_msg = 'log level (default: %(default)s)'
@@ -63,10 +66,16 @@ def analyze_suite(args, logger):
     # use pre-computed distance matrix
     # TODO this code is broken if we don't use DTW
     distance_measure.load_distance_matrix_2d(region_metadata.distances_filename,
-                                             region_metadata.region)
+                                             region_metadata.region,
+                                             mmap_mode='r')
+
+    # use parallelization?
+    num_proc = 1
+    if args.parallel:
+        num_proc = int(args.parallel)
 
     find_elbow = FindSuiteElbow(clustering_suite, spt_region, distance_measure)
-    elbows_by_seed = find_elbow.calculate_elbows_kmedoids(pickle_home)
+    elbows_by_seed = find_elbow.calculate_elbows_kmedoids(pickle_home, num_proc)
 
     metadata_organizer = OrganizeClusteringSuite()
     ordered_metadatas_by_seed = metadata_organizer.organize_kmedoids_suite(clustering_suite)
@@ -19,6 +19,7 @@ from experiments.metadata.clustering import get_suite, suite_options
 
 from spta.clustering.factory import ClusteringFactory
 from spta.clustering.silhouette import SilhouetteAnalysis
+from spta.clustering.suite import ClusteringSuiteExecutor
 from spta.distance.dtw import DistanceByDTW
 from spta.distance.variance import DistanceHistogramClusters
 
@@ -32,8 +33,8 @@ def processRequest():
     desc = 'Run a suite of clustering algorithms, calculate intra-cluster costs and optionally ' \
         'create variance histograms'
 
-    usage = '%(prog)s [-h] <region> [kmedoids|regular] <clustering_suite> [--silhouette] [--variance] ' \
-        '[--random] [--bins] [--log LOG]'
+    usage = '%(prog)s [-h] <region> [kmedoids|regular] <clustering_suite> [--silhouette] [--silhouette-scores] [--variance] ' \
+        '[--random] [--bins] [--parallel] [--log LOG]'
     parser = argparse.ArgumentParser(prog='cluster-partition-analysis', description=desc,
                                      usage=usage)
 
@@ -53,6 +54,8 @@ def processRequest():
     # do silhouette analysis on the suite?
     parser.add_argument('--silhouette', help='Perform silhouette analysis and save silhouette graphs',
                         action='store_true')
+    parser.add_argument('--silhouette-scores', help='Perform silhouette analysis without graphs',
+                        action='store_true')
 
     # variance analysis: --variance to create histograms, --random to add random points
     # bins to specify bins, default='auto'
@@ -63,6 +66,9 @@ def processRequest():
     help_msg = 'bins argument for plt.hist(), (default: %(default)s)'
     parser.add_argument('--bins', help=help_msg, default='auto')
 
+    # optionally find the partitions of the suite in parallel
+    parser.add_argument('--parallel', help='number of parallel workers')
+
     # logging
     log_options = ('WARN', 'INFO', 'DEBUG')
     log_help_msg = 'log level (default: %(default)s)'
@@ -91,15 +97,22 @@ def analyze_suite(args, logger):
     # use pre-computed distance matrix
     # TODO this code is broken if we don't use DTW
     distance_measure.load_distance_matrix_2d(region_metadata.distances_filename,
-                                             region_metadata.region)
+                                             region_metadata.region,
+                                             mmap_mode='r')
 
     # this factory creates the instance of each clustering algorithm
     clustering_factory = ClusteringFactory(distance_measure)
 
+    # use parallelization?
+    num_proc = 1
+    if args.parallel:
+        num_proc = int(args.parallel)
+
     # handle silhouette analysis at the suite level
-    if args.silhouette:
+    if args.silhouette or args.silhouette_scores:
         silhouette_analysis = SilhouetteAnalysis(region_metadata, distance_measure, clustering_suite)
-        silhouette_analysis.perform_analysis('outputs', 'pickle')
+        silhouette_analysis.perform_analysis('outputs', 'pickle', num_proc,
+                                             with_plots=args.silhouette)
 
     # the suite knows where to store its CSV, prepare output
     analysis_csv_filepath = \
@@ -113,16 +126,23 @@ def analyze_suite(args, logger):
         # header
         csv_writer.writerow(['clustering', 'total_cost', 'medoids'])
 
-    # iterate possible clusterings
-    for clustering_metadata in clustering_suite:
+    # find the partitions of the possible clusterings, all the processes share the distance matrix
+    # will try to leverage pickle and load previous attempts, otherwise calculate and save
+    spt_region = region_metadata.create_instance()
+    executor = ClusteringSuiteExecutor(clustering_suite, distance_measure, num_proc)
+    all_partitions = executor.imap_partitions(spt_region, with_medoids=True,
+                                              save_csv_at=output_home, pickle_home='pickle')
+
+    # iterate the clusterings as they finish
+    for (clustering_metadata, partition) in all_partitions:
         logger.info('Clustering algorithm: {}'.format(clustering_metadata))
 
         # clustering algorithm to use
         clustering_algorithm = clustering_factory.instance(clustering_metadata)
 
         # work on this clustering
-        partial_result = analyze_partition(region_metadata, clustering_algorithm, output_home,
-                                           logger, args)
+        partial_result = analyze_partition(region_metadata, clustering_algorithm, partition,
+                                           output_home, logger, args)
 
         # write partial result
         with open(analysis_csv_filepath, 'a', newline='') as csv_file:
@@ -135,18 +155,13 @@ def analyze_suite(args, logger):
                                                              analysis_csv_filepath))
 
 
-def analyze_partition(region_metadata, clustering_algorithm, output_home, logger, args):
+def analyze_partition(region_metadata, clustering_algorithm, partition, output_home, logger,
+                      args):
 
     # recover the regions
     spt_region = region_metadata.create_instance()
     _, x_len, y_len = spt_region.shape
 
-    # use the clustering algorithm to get the partition and medoids
-    # will try to leverage pickle and load previous attempts, otherwise calculate and save
-    partition = clustering_algorithm.partition(spt_region, with_medoids=True,
-                                               save_csv_at=output_home,
-                                               pickle_home='pickle')
-
     distance_measure = clustering_algorithm.distance_measure
 
     # keep track of total cost of the each cluster by adding the distances to the point
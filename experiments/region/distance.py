@@ -10,8 +10,10 @@ import matplotlib.pyplot as plt
 from experiments.metadata.region import predefined_regions
 
 from spta.region.spatial import SpatialRegion
-from spta.distance.dtw import DistanceByDTW
+from spta.distance.condensed import CondensedDistanceMatrix
+from spta.distance.dtw import DistanceByDTW, DistanceBySakoeChibaDTW, DistanceByItakuraDTW
 from spta.distance.dtw_parallel import DistanceByDTWParallel
+from spta.distance.incremental import DistanceMatrixCheckpoint, extend_distance_matrix
 
 from spta.util import log as log_util
 from spta.util import plot as plot_util
@@ -21,8 +23,9 @@ def processRequest():
 
     # parses the arguments
     desc = 'Calculate the distance matrix of a spatio-temporal region.'
-    usage = '%(prog)s [-h] <region> <distance> [--parallel=<#workers>] [--plots] \
-[--log=<log_level>]'
+    usage = '%(prog)s [-h] <region> <distance> [--radius=<radius>] [--slope=<max_slope>] \
+[--parallel=<#workers>] [--checkpoint=<rows>] [--extend=<region>] [--condensed] [--float32] \
+[--plots] [--log=<log_level>]'
     parser = argparse.ArgumentParser(prog='distances', description=desc, usage=usage)
 
     # need name of region metadata
@@ -30,9 +33,21 @@ def processRequest():
     region_options = predefined_regions().keys()
     parser.add_argument('region', help='Name of the region metadata', choices=region_options)
 
-    distance_options = ['dtw']
+    distance_options = ['dtw', 'dtw_sakoe_chiba', 'dtw_itakura']
     parser.add_argument('distance', help='Distance measure', choices=distance_options)
+    parser.add_argument('--radius', help='radius of the Sakoe-Chiba band (default 10)',
+                        type=int, default=10)
+    parser.add_argument('--slope', help='max slope of the Itakura parallelogram (default 2)',
+                        type=float, default=2.0)
     parser.add_argument('--parallel', help='number of parallel workers')
+    parser.add_argument('--checkpoint', help='save progress every <rows> rows, and resume from '
+                        'saved progress', type=int)
+    parser.add_argument('--extend', help='reuse the saved distances of a smaller region that is '
+                        'contained in this region', choices=region_options)
+    parser.add_argument('--condensed', help='save only the upper triangle of the matrix',
+                        action='store_true')
+    parser.add_argument('--float32', help='save the distances with single precision',
+                        action='store_true')
     parser.add_argument('--plots', help='plot distances at P(0, 0) and center point',
                         action='store_true')
     parser.add_argument('--log', help='log level: WARN|INFO|DEBUG')
@@ -48,34 +63,105 @@ def calculate_distances_with_args(args, logger):
     spt_region_metadata = predefined_regions()[args.region]
     spt_region = spt_region_metadata.create_instance()
 
-    # only DTW support for now
+    # DTW, optionally with a global constraint on the warping path
     if args.distance == 'dtw':
         distance_measure = DistanceByDTW()
+    elif args.distance == 'dtw_sakoe_chiba':
+        distance_measure = DistanceBySakoeChibaDTW(args.radius)
+    elif args.distance == 'dtw_itakura':
+        distance_measure = DistanceByItakuraDTW(args.slope)
 
     # use parallelization?
     parallel_workers = None
     if args.parallel:
         parallel_workers = int(args.parallel)
 
+    # the measure that computes the distances
+    computing_measure = distance_measure
     if parallel_workers:
-        # use parallelization
-        distance_measure_parallel = DistanceByDTWParallel(parallel_workers)
-        distance_matrix = distance_measure_parallel.compute_distance_matrix(spt_region)
-        logger.debug(str(distance_matrix))
+        computing_measure = DistanceByDTWParallel(parallel_workers, distance_measure)
+
+    d_filename = spt_region_metadata.distances_filename_for(distance_measure)
+    checkpoint = None
+
+    # reduce the size of the matrix?
+    dtype = None
+    if args.float32:
+        dtype = np.float32
+
+    if args.extend:
+        if args.checkpoint:
+            # the new rows depend on the smaller region, do not share the checkpoint
+            base_filename = d_filename[:-4] if d_filename.endswith('.npy') else d_filename
+            extend_filename = '{}_extend_{}'.format(base_filename, args.extend)
+            checkpoint = DistanceMatrixCheckpoint(extend_filename, args.checkpoint)
+
+        # only compute the distances of the points that are not in the smaller region
+        distance_matrix = extend_distances_of_region(args.extend, spt_region_metadata,
+                                                     spt_region, distance_measure,
+                                                     computing_measure, checkpoint, dtype)
+
+    elif args.checkpoint:
+        # save progress every few rows, resume from previous progress
+        checkpoint = DistanceMatrixCheckpoint(d_filename, args.checkpoint)
+        distance_matrix = checkpoint.compute(computing_measure, spt_region)
 
     else:
-        # compute distances in one process
-        distance_matrix = distance_measure.compute_distance_matrix(spt_region)
+        # compute distances all at once
+        distance_matrix = computing_measure.compute_distance_matrix(spt_region)
+        logger.debug(str(distance_matrix))
 
     # save to file
-    d_filename = spt_region_metadata.distances_filename
-    np.save(d_filename, distance_matrix)
-    logger.info('Saved distances to {}'.format(d_filename))
+    if args.condensed:
+        if isinstance(distance_matrix, CondensedDistanceMatrix):
+            if dtype is not None and distance_matrix.dtype != dtype:
+                distance_matrix = distance_matrix.astype(dtype)
+        else:
+            distance_matrix = CondensedDistanceMatrix.from_dense(distance_matrix, dtype)
+        distance_matrix.save(d_filename)
+    else:
+        distance_matrix = np.asarray(distance_matrix, dtype=dtype)
+        np.save(d_filename, distance_matrix)
+        logger.info('Saved distances to {}'.format(d_filename))
+
+    # the matrix is saved, the progress is no longer needed
+    if checkpoint is not None:
+        checkpoint.remove()
 
     if args.plots:
         show_distances(spt_region, distance_matrix)
 
 
+def extend_distances_of_region(smaller_region_name, spt_region_metadata, spt_region,
+                               distance_measure, computing_measure, checkpoint=None, dtype=None):
+    '''
+    Loads the saved distances of a smaller region, and computes the distance matrix of the
+    region by only adding the distances of the new points. Returns a condensed matrix with the
+    requested dtype (float64 by default), see extend_distance_matrix.
+    '''
+    smaller_metadata = predefined_regions()[smaller_region_name]
+
+    # the series of the smaller region must be the same as in the larger region
+    same_series = \
+        (smaller_metadata.year_start, smaller_metadata.year_end, smaller_metadata.spd,
+         smaller_metadata.scaled) == \
+        (spt_region_metadata.year_start, spt_region_metadata.year_end, spt_region_metadata.spd,
+         spt_region_metadata.scaled)
+    if not same_series:
+        err_msg = 'Cannot extend {} to {}: different series'
+        raise ValueError(err_msg.format(smaller_metadata, spt_region_metadata))
+
+    smaller_matrix = distance_measure.load_distance_matrix_md(smaller_metadata, mmap_mode='r')
+    if smaller_matrix is None:
+        raise ValueError('No saved distances for {}'.format(smaller_metadata))
+
+    if dtype is None:
+        dtype = np.float64
+
+    return extend_distance_matrix(computing_measure, smaller_matrix, smaller_metadata.region,
+                                  spt_region, spt_region_metadata.region, checkpoint, dtype)
+
+
 def show_distances(spt_region, distance_matrix):
     '''
     Show 2d graphs for the distances to the first and center points.
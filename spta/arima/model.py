@@ -1,11 +1,91 @@
+import numpy as np
+
 from spta.model.base import ModelRegion
 
 
+class CompactArimaResults(object):
+    '''
+    A compact representation of a fitted ARIMA model (statsmodels.tsa.arima.model.ARIMA), with
+    only what is needed to create out-of-sample forecasts. The statsmodels results keep the
+    training series, the covariance matrices and the state space machinery, so their pickles are
+    orders of magnitude larger.
+
+    The forecast uses the state space form of the model: the state predicted for the first step
+    after the training series summarizes the last d + p observations and the last q residuals.
+    The forecasts are the same as the ones of the statsmodels results.
+    '''
+
+    def __init__(self, order, params, param_names, sigma2, aic, state, transition, design,
+                 state_intercept, obs_intercept):
+        self.order = order
+        self.params = params
+        self.param_names = param_names
+        self.sigma2 = sigma2
+        self.aic = aic
+
+        # state space form, a_{t+1} = T a_t + c and y_t = Z a_t + d
+        self.state = state
+        self.transition = transition
+        self.design = design
+        self.state_intercept = state_intercept
+        self.obs_intercept = obs_intercept
+
+    @classmethod
+    def from_results(cls, fitted_model):
+        '''
+        Creates the compact representation of a fitted statsmodels ARIMA model.
+        '''
+        filter_results = fitted_model.filter_results
+        param_names = list(fitted_model.param_names)
+        params = np.array(fitted_model.params, dtype=np.float64)
+
+        # the system matrices may be time-varying (e.g. the constant), use the last ones
+        return CompactArimaResults(order=tuple(fitted_model.model.order),
+                                   params=params,
+                                   param_names=param_names,
+                                   sigma2=params[param_names.index('sigma2')],
+                                   aic=fitted_model.aic,
+                                   state=np.array(fitted_model.predicted_state[:, -1]),
+                                   transition=np.array(filter_results.transition[:, :, -1]),
+                                   design=np.array(filter_results.design[0, :, -1]),
+                                   state_intercept=np.array(filter_results.state_intercept[:, -1]),
+                                   obs_intercept=filter_results.obs_intercept[0, -1])
+
+    def forecast(self, steps=1):
+        '''
+        Out-of-sample forecast of the next steps after the training series, as a 1-d array.
+        '''
+        forecast_series = np.empty(steps)
+        state = self.state
+        for step in range(steps):
+            forecast_series[step] = np.dot(self.design, state) + self.obs_intercept
+            state = np.dot(self.transition, state) + self.state_intercept
+
+        return forecast_series
+
+    def __repr__(self):
+        return 'CompactArimaResults(order={}, aic={:.4f})'.format(self.order, self.aic)
+
+
+def arima_order(fitted_model):
+    '''
+    The (p, d, q) order of a fitted ARIMA model, either compact or a statsmodels results object.
+    '''
+    if isinstance(fitted_model, CompactArimaResults):
+        return fitted_model.order
+    else:
+        return fitted_model.model.order
+
+
 class ModelRegionArima(ModelRegion):
     '''
     A FunctionRegion that creates a forecast region using ARIMA models.
     See spta.model.base.ModelRegion for more details.
 
+    The models are instances of CompactArimaResults when created by the ARIMA trainers. When the
+    models are replicated over clusters (see SolverTrainer.replicate_representative_models), the
+    points share references to the same k models, so pickle stores each model only once.
+
     TODO: support tp/tf?
     '''
 
@@ -21,6 +101,8 @@ class ModelRegionArima(ModelRegion):
 
         When using pmdarima.arima.ARIMA:
             return model_at_point.predict(forecast_len)
+
+        CompactArimaResults has the same forecast call as statsmodels.tsa.arima.model.ARIMA.
         '''
         return model_at_point.forecast(forecast_len)
 
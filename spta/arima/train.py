@@ -12,7 +12,7 @@ from spta.region.function import FunctionRegionScalarSame, FunctionRegionSeriesS
 
 from spta.model.train import ModelTrainer
 
-from .model import ModelRegionArima
+from .model import CompactArimaResults, ModelRegionArima, arima_order
 from . import ArimaPDQ
 
 # For auto_arima, the order is extracted from the model.
@@ -47,8 +47,8 @@ class TrainerArimaPDQ(ModelTrainer):
         You should induce stationarity, choose a different model order, or you can
         pass your own start_params.
 
-        Returns a trained ARIMA model than can be used for forecasting (model fit).
-        If the evaluation fails, return None instead of the model fit.
+        Returns a trained ARIMA model than can be used for forecasting (model fit), in its compact
+        form (CompactArimaResults). If the evaluation fails, return None instead of the model fit.
         '''
 
         # sanity check: no parameters means no model, no data means no model
@@ -64,7 +64,7 @@ class TrainerArimaPDQ(ModelTrainer):
             arima_model = ARIMA(training_series,
                                 order=(p, d, q),
                                 seasonal_order=(0, 0, 0, 0))
-            fitted_model = arima_model.fit()
+            fitted_model = CompactArimaResults.from_results(arima_model.fit())
 
             # for pmdarima.arima.ARIMA
             # arima_model = ARIMA(order=(arima_params.p, arima_params.d, arima_params.q),
@@ -191,7 +191,9 @@ class TrainerAutoArima(ModelTrainer):
         For auto ARIMA, the refitter will use TrainerArimaPDQ, where the hyper-parameters are extracted
         from the model region.
         '''
-        return TrainerRefitArima(arima_model_region)
+        refitter = TrainerRefitArima(arima_model_region)
+        refitter.parallel_workers = self.parallel_workers
+        return refitter
 
 
 class TrainerRefitArima(ModelTrainer):
@@ -286,7 +288,7 @@ def extract_pdq(fitted_arima_at_point):
     if fitted_arima_at_point == 0 or fitted_arima_at_point is None:
         (p, d, q) = ORDER_WHEN_NO_MODEL
     else:
-        (p, d, q) = fitted_arima_at_point.model.order
+        (p, d, q) = arima_order(fitted_arima_at_point)
     return np.array([p, d, q])
 
 
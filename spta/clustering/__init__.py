@@ -110,8 +110,8 @@ class ClusteringAlgorithm(log_util.LoggerMixin):
         if not loaded_from_pickle:
 
             # could not find previous partition, call the logic of a subclass to find the partition
-            # but first try to load the distance matrix if it is available
-            self.distance_measure.try_load_distance_matrix(spt_region)
+            # but first try to load the distance matrix if it is available (read-only)
+            self.distance_measure.try_load_distance_matrix(spt_region, mmap_mode='r')
             the_partition = self.partition_impl(spt_region, with_medoids)
 
         if save_csv_at is not None:
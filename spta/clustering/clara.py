@@ -0,0 +1,164 @@
+'''
+Clustering algorithms based on CLARA and CLARANS, sampling-based variants of k-medoids that do
+not require the full distance matrix. See spta.kmedoids.clara.
+'''
+
+from collections import OrderedDict
+
+from spta.kmedoids.clara import run_clara, run_clarans, default_sample_size
+
+from . import ClusteringMetadata
+from .kmedoids import KmedoidsClusteringAlgorithm
+
+
+class ClaraClusteringMetadata(ClusteringMetadata):
+    '''
+    Stores metadata for the CLARA clustering algorithm.
+    '''
+
+    def __init__(self, k, random_seed=1, num_samples=5, sample_size=None, max_iter=1000,
+                 tol=0.001, verbose=True):
+        '''
+        Sets up the CLARA metadata with default values. The value of k is still required.
+        The default sample size is 40 + 2k.
+        '''
+        super(ClaraClusteringMetadata, self).__init__('clara', k=k)
+        self.random_seed = random_seed
+        self.num_samples = num_samples
+
+        if sample_size is None:
+            sample_size = default_sample_size(self.k)
+        self.sample_size = sample_size
+
+        self.max_iter = max_iter
+        self.tol = tol
+        self.verbose = verbose
+
+    def as_dict(self):
+        return OrderedDict([
+            ('type', 'clara'),
+            ('k', self.k),
+            ('seed', self.random_seed),
+            ('samples', self.num_samples),
+            ('sample_size', self.sample_size)
+        ])
+
+    def __repr__(self):
+        return '{}_k{}_seed{}_n{}_s{}'.format(self.name, self.k, self.random_seed,
+                                               self.num_samples, self.sample_size)
+
+    def __str__(self):
+        '''
+        Useful for plot titles
+        '''
+        str_msg = '{}: k={} seed={} samples={}x{}'
+        return str_msg.format(self.name.upper(), self.k, self.random_seed, self.num_samples,
+                              self.sample_size)
+
+    @classmethod
+    def from_repr(cls, repr_string):
+        '''
+        Given the representation, recover the instance.
+        '''
+        parts = repr_string.split('_')
+        assert parts[0] == 'clara'
+
+        # e.g. clara_k2_seed5_n5_s44
+        k = int(parts[1][1:])
+        random_seed = int(parts[2][4:])
+        num_samples = int(parts[3][1:])
+        sample_size = int(parts[4][1:])
+
+        return ClaraClusteringMetadata(k, random_seed=random_seed, num_samples=num_samples,
+                                       sample_size=sample_size)
+
+
+class ClaransClusteringMetadata(ClusteringMetadata):
+    '''
+    Stores metadata for the CLARANS clustering algorithm.
+    '''
+
+    def __init__(self, k, random_seed=1, num_local=2, max_neighbor=None, tol=0.001,
+                 verbose=True):
+        '''
+        Sets up the CLARANS metadata with default values. The value of k is still required.
+        If max_neighbor is None, it depends on the number of points, see run_clarans.
+        '''
+        super(ClaransClusteringMetadata, self).__init__('clarans', k=k)
+        self.random_seed = random_seed
+        self.num_local = num_local
+        self.max_neighbor = max_neighbor
+        self.tol = tol
+        self.verbose = verbose
+
+    def as_dict(self):
+        return OrderedDict([
+            ('type', 'clarans'),
+            ('k', self.k),
+            ('seed', self.random_seed),
+            ('num_local', self.num_local),
+            ('max_neighbor', self.max_neighbor)
+        ])
+
+    def __repr__(self):
+        r = '{}_k{}_seed{}_l{}'.format(self.name, self.k, self.random_seed, self.num_local)
+        if self.max_neighbor is not None:
+            r = '{}_mn{}'.format(r, self.max_neighbor)
+
+        return r
+
+    def __str__(self):
+        '''
+        Useful for plot titles
+        '''
+        return '{}: k={} seed={} local={}'.format(self.name.upper(), self.k, self.random_seed,
+                                                  self.num_local)
+
+    @classmethod
+    def from_repr(cls, repr_string):
+        '''
+        Given the representation, recover the instance.
+        '''
+        parts = repr_string.split('_')
+        assert parts[0] == 'clarans'
+
+        # e.g. clarans_k2_seed5_l2 or clarans_k2_seed5_l2_mn300
+        k = int(parts[1][1:])
+        random_seed = int(parts[2][4:])
+        num_local = int(parts[3][1:])
+
+        max_neighbor = None
+        if len(parts) > 4:
+            max_neighbor = int(parts[4][2:])
+
+        return ClaransClusteringMetadata(k, random_seed=random_seed, num_local=num_local,
+                                         max_neighbor=max_neighbor)
+
+
+class ClaraClusteringAlgorithm(KmedoidsClusteringAlgorithm):
+    '''
+    Creates a partition with medoids using CLARA.
+    '''
+
+    def run_kmedoids_impl(self, X):
+        return run_clara(X, self.k, self.distance_measure,
+                         num_samples=self.metadata.num_samples,
+                         sample_size=self.metadata.sample_size,
+                         random_seed=self.metadata.random_seed,
+                         max_iter=self.metadata.max_iter,
+                         tol=self.metadata.tol,
+                         verbose=self.metadata.verbose)
+
+
+class ClaransClusteringAlgorithm(KmedoidsClusteringAlgorithm):
+    '''
+    Creates a partition with medoids using CLARANS.
+    '''
+
+    def run_kmedoids_impl(self, X):
+        return run_clarans(X, self.k, self.distance_measure,
+                           num_local=self.metadata.num_local,
+                           max_neighbor=self.metadata.max_neighbor,
+                           random_seed=self.metadata.random_seed,
+                           tol=self.metadata.tol,
+                           verbose=self.metadata.verbose)
@@ -1,8 +1,17 @@
+'''
+Density-based clustering with DBSCAN. Instead of the dense distance matrix, DBSCAN receives the
+sparse graph of the neighbors within eps (see spta.distance.neighbors), so that it can run on
+large regions.
+
+The number of clusters is found by the algorithm. The points labeled as noise are grouped in
+the cluster with index 0, the clusters found by DBSCAN have indices 1 to k-1.
+'''
+
 import numpy as np
 from sklearn.cluster import DBSCAN
-# from sklearn import metrics
 from collections import OrderedDict
 
+from spta.distance.neighbors import radius_neighbors_graph
 from spta.region.partition import PartitionRegionCrisp
 
 from . import ClusteringMetadata, ClusteringAlgorithm
@@ -10,20 +19,55 @@ from . import ClusteringMetadata, ClusteringAlgorithm
 
 class DbscanClusteringMetadata(ClusteringMetadata):
     '''
-    Stores metadata for a clustering algorithm.
+    Stores metadata for the DBSCAN clustering algorithm.
     '''
 
-    def __init__(self, k=0):
+    def __init__(self, eps=0.7, min_samples=5, k=0, block_rows=100, random_seed=None):
+        '''
+        eps
+            the maximum distance between two neighbors.
+
+        min_samples
+            the number of neighbors of a core point, including the point itself.
+
+        block_rows
+            rows of the neighbors graph computed at a time, see radius_neighbors_graph.
+
+        random_seed
+            ignored, DBSCAN is deterministic. Accepted because ClusteringSuite always passes it.
+        '''
         # Dbscan does not store a k value by default: it requires no value for k when running,
         # but it can return a value for k after its execution.
         super(DbscanClusteringMetadata, self).__init__('dbscan', k)
 
+        if eps <= 0:
+            raise ValueError('eps must be positive: {}'.format(eps))
+
+        if min_samples < 1:
+            raise ValueError('min_samples must be at least 1: {}'.format(min_samples))
+
+        self.eps = eps
+        self.min_samples = int(min_samples)
+        self.block_rows = block_rows
+
     def as_dict(self):
         return OrderedDict([
             ('type', 'dbscan'),
             ('k', self.k),
+            ('eps', self.eps),
+            ('min_samples', self.min_samples)
         ])
 
+    def __repr__(self):
+        # k is not part of the representation, it is found by the algorithm
+        return '{}_eps{:g}_min{}'.format(self.name, self.eps, self.min_samples)
+
+    def __str__(self):
+        '''
+        Useful for plot titles
+        '''
+        return 'DBSCAN: eps={:g} min_samples={}'.format(self.eps, self.min_samples)
+
     @classmethod
     def from_repr(cls, repr_string):
         '''
@@ -32,23 +76,25 @@ class DbscanClusteringMetadata(ClusteringMetadata):
         parts = repr_string.split('_')
         assert(parts[0] == 'dbscan')
 
-        # only k, e.g. k2
-        k_string = parts[1]
-        k = int(k_string[1:])
+        # e.g. dbscan_eps0.7_min5
+        eps = float(parts[1][3:])
+        min_samples = int(parts[2][3:])
 
-        return DbscanClusteringMetadata(k)
+        return DbscanClusteringMetadata(eps=eps, min_samples=min_samples)
 
 
-def dbscan_metadata_generator(k_values):
+def dbscan_metadata_generator(eps_values, min_samples_values=5, block_rows=100):
     '''
-    Generate metadata given a list of k_values
+    Generate DBSCAN metadata given a list of eps values and min_samples values. Performs a
+    cartesian product of both, k is not iterated because it is found by the algorithm.
     '''
     # FIXME no identifier here yet, so the caller MUST set it manually afterwards.
     # TODO refactor this method so that the identifier is passed.
     # Right now we don't want to change experiments.metadata...
     # NOTE: importing here to break import cycle (factory -> kmedoids -> suite -> factory)
     from . import suite
-    return suite.ClusteringSuite('change_me', 'dbscan', k=k_values)
+    return suite.ClusteringSuite('change_me', 'dbscan', k=(0,), eps=eps_values,
+                                 min_samples=min_samples_values, block_rows=block_rows)
 
 
 class DbscanClusteringAlgorithm(ClusteringAlgorithm):
@@ -60,46 +106,39 @@ class DbscanClusteringAlgorithm(ClusteringAlgorithm):
         # The partition method also works for spatial regions, notice how the shape is extracted.
         return self.partition(spatial_region, with_medoids=False)
 
-    def partition_impl(self, spt_region, with_medoids=True, save_csv_at=None):
+    def partition_impl(self, spt_region, with_medoids=True):
         '''
         Create a dbscan partition on a spatio-temporal region. A partition can be used to create
-        spatio-temporal clusters.
+        spatio-temporal clusters. The noise points are in the cluster with index 0.
 
-        with_medoids
-            Optionally return the medoids of the clusters
+        DBSCAN does not find medoids, see find_medoids_for_partition.
         '''
         self.logger.info('Clustering algorithm {}'.format(self.metadata))
 
-        db = DBSCAN(eps=0.7, min_samples=5, metric='precomputed',
-                    algorithm='auto', leaf_size=30, p=None, n_jobs=None).fit(distance_dtw.distance_matrix)
+        # uses the distance matrix if available, otherwise only computes the distances needed
+        graph = radius_neighbors_graph(spt_region.as_2d, self.metadata.eps,
+                                       self.distance_measure, self.metadata.block_rows)
 
-        core_samples_mask = np.zeros_like(db.labels_, dtype=bool)
-        core_samples_mask[db.core_sample_indices_] = True
+        db = DBSCAN(eps=self.metadata.eps, min_samples=self.metadata.min_samples,
+                    metric='precomputed').fit(graph)
         labels = db.labels_
 
-        # Number of clusters in labels, ignoring noise if present.
-        # n_clusters_ = len(set(labels)) - (1 if -1 in labels else 0)
-        n_clusters_ = len(set(labels))
-        n_noise_ = list(labels).count(-1)
+        n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
+        n_noise = np.count_nonzero(labels == -1)
+        log_msg = 'DBSCAN found {} clusters and {} noise points'
+        self.logger.info(log_msg.format(n_clusters, n_noise))
 
         # consider the noise points as a separate group with cluster_index 0
         labels_with_noise = labels + 1
-        print(labels_with_noise)
-
-        print('Estimated number of clusters: %d' % n_clusters_)
-        print('Estimated number of noise points: %d' % n_noise_)
-        # print("Homogeneity: %0.3f" % metrics.homogeneity_score(labels_true, labels))
-        # print("Completeness: %0.3f" % metrics.completeness_score(labels_true, labels))
-        # print("V-measure: %0.3f" % metrics.v_measure_score(labels_true, labels))
-        # print("Adjusted Rand Index: %0.3f"
-        #       % metrics.adjusted_rand_score(labels_true, labels))
-        # print("Adjusted Mutual Information: %0.3f"
-        #       % metrics.adjusted_mutual_info_score(labels_true, labels))
-        # print("Silhouette Coefficient: %0.3f" % metrics.silhouette_score(spt_region.as_2d, labels))
 
         _, x_len, y_len = spt_region.shape
         partition = PartitionRegionCrisp.from_membership_array(labels_with_noise,
                                                                x_len, y_len)
+
+        # the number of clusters is now known
+        self.k = partition.k
+        self.metadata.k = partition.k
+
         return partition
 
 
@@ -120,13 +159,11 @@ if __name__ == '__main__':
                                                    2015, 2015, 1, scaled=True)
     spt_region = region_metadata.create_instance()
 
-    # load pre-computed distances
+    # pre-computed distances are loaded if available
     distance_dtw = DistanceByDTW()
     # distance_dtw = DistanceBySpatialDTW(0.2)
-    distance_dtw.load_distance_matrix_2d(region_metadata.distances_filename,
-                                         region_metadata.region)
 
-    dbscan_metadata = DbscanClusteringMetadata()
+    dbscan_metadata = DbscanClusteringMetadata(eps=0.7, min_samples=5)
     dbscan_algorithm = DbscanClusteringAlgorithm(dbscan_metadata, distance_dtw)
     partition = dbscan_algorithm.partition(spt_region)
 
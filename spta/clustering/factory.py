@@ -1,5 +1,9 @@
 from .regular import RegularClusteringMetadata, RegularClusteringAlgorithm
 from .kmedoids import KmedoidsClusteringMetadata, KmedoidsClusteringAlgorithm
+from .clara import ClaraClusteringMetadata, ClaraClusteringAlgorithm
+from .clara import ClaransClusteringMetadata, ClaransClusteringAlgorithm
+from .kmedoids_fuzzy import KmedoidsFuzzyClusteringMetadata, KmedoidsFuzzyClusteringAlgorithm
+from .dbscan import DbscanClusteringMetadata, DbscanClusteringAlgorithm
 
 
 class ClusteringMetadataFactory:
@@ -20,6 +24,22 @@ class ClusteringMetadataFactory:
             random_seed = params.pop('random_seed')
             return KmedoidsClusteringMetadata(k=k, random_seed=random_seed, **params)
 
+        if name == 'clara':
+            # sampling-based k-medoids, with number and size of the samples
+            return ClaraClusteringMetadata(k=k, **params)
+
+        if name == 'clarans':
+            # randomized search of k-medoids, with number of local minima and neighbors
+            return ClaransClusteringMetadata(k=k, **params)
+
+        if name == 'kfuzzy':
+            # fuzzy k-medoids, with fuzzifier and membership threshold
+            return KmedoidsFuzzyClusteringMetadata(k=k, **params)
+
+        if name == 'dbscan':
+            # density-based, with eps and min_samples, k is found by the algorithm
+            return DbscanClusteringMetadata(k=k, **params)
+
         raise ValueError('Invalid name of clustering metadata: {}'.format(name))
 
     def from_repr(self, repr_string):
@@ -35,6 +55,18 @@ class ClusteringMetadataFactory:
         if parts[0] == 'kmedoids':
             return KmedoidsClusteringMetadata.from_repr(repr_string)
 
+        if parts[0] == 'clara':
+            return ClaraClusteringMetadata.from_repr(repr_string)
+
+        if parts[0] == 'clarans':
+            return ClaransClusteringMetadata.from_repr(repr_string)
+
+        if parts[0] == 'kfuzzy':
+            return KmedoidsFuzzyClusteringMetadata.from_repr(repr_string)
+
+        if parts[0] == 'dbscan':
+            return DbscanClusteringMetadata.from_repr(repr_string)
+
         raise ValueError('Invalid representation of clustering metadata: {}'.format(repr_string))
 
 class ClusteringFactory:
@@ -49,4 +81,16 @@ class ClusteringFactory:
         if metadata.name == 'kmedoids':
             return KmedoidsClusteringAlgorithm(metadata, self.distance_measure)
 
+        if metadata.name == 'clara':
+            return ClaraClusteringAlgorithm(metadata, self.distance_measure)
+
+        if metadata.name == 'clarans':
+            return ClaransClusteringAlgorithm(metadata, self.distance_measure)
+
+        if metadata.name == 'kfuzzy':
+            return KmedoidsFuzzyClusteringAlgorithm(metadata, self.distance_measure)
+
+        if metadata.name == 'dbscan':
+            return DbscanClusteringAlgorithm(metadata, self.distance_measure)
+
         raise ValueError('clustering metadata not recognized: {}'.format(metadata))
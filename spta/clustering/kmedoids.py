@@ -1,8 +1,11 @@
+import hashlib
+import numpy as np
+import weakref
 from collections import OrderedDict
 
 from spta.region import Point
 from spta.region.partition import PartitionRegionCrisp
-from spta.kmedoids.kmedoids import run_kmedoids
+from spta.kmedoids.kmedoids import run_kmedoids, add_medoid_greedy
 
 from . import ClusteringMetadata, ClusteringAlgorithm
 
@@ -13,9 +16,13 @@ class KmedoidsClusteringMetadata(ClusteringMetadata):
     '''
 
     def __init__(self, k, random_seed=1, mode='lite', initial_medoids=None, max_iter=1000,
-                 tol=0.001, verbose=True):
+                 tol=0.001, verbose=True, warm_start=False):
         '''
         Sets up the k-medoids metadata with default values. The value of k is still required.
+
+        warm_start
+            if True, the initial medoids are the medoids found for k-1 (with the same seed),
+            plus a medoid added greedily. See KmedoidsClusteringAlgorithm.
         '''
         super(KmedoidsClusteringMetadata, self).__init__('kmedoids', k=k)
         self.random_seed = random_seed
@@ -24,6 +31,7 @@ class KmedoidsClusteringMetadata(ClusteringMetadata):
         self.max_iter = max_iter
         self.tol = tol
         self.verbose = verbose
+        self.warm_start = warm_start
 
     def as_dict(self):
         return OrderedDict([
@@ -35,6 +43,9 @@ class KmedoidsClusteringMetadata(ClusteringMetadata):
 
     def __repr__(self):
         r = '{}_k{}_seed{}_{}'.format(self.name, self.k, self.random_seed, self.mode)
+        if self.warm_start:
+            r = '{}_ws'.format(r)
+
         if self.initial_medoids is not None:
             indices_str = [
                 str(index)
@@ -72,7 +83,11 @@ class KmedoidsClusteringMetadata(ClusteringMetadata):
 
         # 3. mode
         mode = parts[3]   # e.g. lite
-        return KmedoidsClusteringMetadata(k, random_seed=random_seed, mode=mode)
+
+        # 4. optional warm start
+        warm_start = 'ws' in parts[4:]
+        return KmedoidsClusteringMetadata(k, random_seed=random_seed, mode=mode,
+                                          warm_start=warm_start)
 
     @classmethod
     def from_classifier_label(cls, classifier_label, mode='lite'):
@@ -89,7 +104,7 @@ class KmedoidsClusteringMetadata(ClusteringMetadata):
 
 
 def kmedoids_metadata_generator(k_values, seed_values, mode='lite', initial_medoids=None,
-                                max_iter=1000, tol=0.001, verbose=True):
+                                max_iter=1000, tol=0.001, verbose=True, warm_start=False):
     '''
     Generate k-medoids metadata given a list of k_values and seeds, also default values for
     the other parameters. Performs a cartesian product of k_values and seeds.
@@ -101,10 +116,54 @@ def kmedoids_metadata_generator(k_values, seed_values, mode='lite', initial_medo
     from . import suite
     return suite.ClusteringSuite('change_me', 'kmedoids', k=k_values, random_seed=seed_values,
                                  mode=mode, initial_medoids=initial_medoids, max_iter=max_iter,
-                                 tol=tol, verbose=verbose)
+                                 tol=tol, verbose=verbose, warm_start=warm_start)
+
+
+# medoids found with warm start, by data and parameters, then by k
+# only the most recent entries are kept, see KmedoidsClusteringAlgorithm.warm_start_medoids
+warm_start_cache = OrderedDict()
+WARM_START_CACHE_SIZE = 4
+
+# sha1 of the series of each region, kept while the region exists, see data_hash_for
+data_hash_cache = weakref.WeakKeyDictionary()
+
+
+def data_hash_for(spt_region, X):
+    '''
+    The sha1 of the series X of a spatio-temporal region, which identifies the data in
+    warm_start_cache. Computed once per region instance, e.g. once for all the members of a
+    suite that share the region.
+    '''
+    if spt_region not in data_hash_cache:
+        data_hash_cache[spt_region] = hashlib.sha1(np.ascontiguousarray(X)).hexdigest()
+    return data_hash_cache[spt_region]
+
+
+def distance_measure_key(distance_measure):
+    '''
+    Identifies a distance measure with its parameters in warm_start_cache. The representation
+    alone is not enough, e.g. DistanceBySpatialDTW is 'dtw' for any weight.
+    '''
+    return (distance_measure.__class__.__name__, repr(distance_measure),
+            distance_measure.distances_file_suffix, getattr(distance_measure, 'weight', None))
 
 
 class KmedoidsClusteringAlgorithm(ClusteringAlgorithm):
+    '''
+    Creates a partition with medoids using k-medoids.
+
+    With warm start, k-medoids for k starts from the medoids found for k-1 with the same seed,
+    plus one medoid added greedily (see add_medoid_greedy). The chain starts at k=2 with random
+    medoids, so the result for k does not depend on the other members of a suite. The medoids
+    found for each k are kept in memory, so a suite that sweeps k in increasing order runs
+    k-medoids once per k, and each run starts close to a local minimum.
+    '''
+
+    def __init__(self, metadata, distance_measure):
+        super(KmedoidsClusteringAlgorithm, self).__init__(metadata, distance_measure)
+
+        # identifies the data in warm_start_cache, see warm_start_entry
+        self.data_hash = None
 
     def partition_impl(self, spt_region, with_medoids=True):
         '''
@@ -120,14 +179,12 @@ class KmedoidsClusteringAlgorithm(ClusteringAlgorithm):
         X = spt_region.as_2d
         _, x_len, y_len = spt_region.shape
 
+        # CLARA and CLARANS metadata have no warm start
+        if getattr(self.metadata, 'warm_start', False):
+            self.data_hash = data_hash_for(spt_region, X)
+
         # run k-medoids algorithm
-        kmedoids_result = run_kmedoids(X, self.k, self.distance_measure,
-                                       initial_medoids=self.metadata.initial_medoids,
-                                       random_seed=self.metadata.random_seed,
-                                       mode=self.metadata.mode,
-                                       max_iter=self.metadata.max_iter,
-                                       tol=self.metadata.tol,
-                                       verbose=self.metadata.verbose)
+        kmedoids_result = self.run_kmedoids_impl(X)
 
         # build result
         partition = PartitionRegionCrisp.from_membership_array(kmedoids_result.labels,
@@ -146,3 +203,65 @@ class KmedoidsClusteringAlgorithm(ClusteringAlgorithm):
             partition.medoids = medoids
 
         return partition
+
+    def run_kmedoids_impl(self, X):
+        '''
+        Runs the k-medoids algorithm on an array of series, returns a KmedoidsResult.
+        Subclasses may run a variant of k-medoids here.
+        '''
+        if not self.metadata.warm_start or self.metadata.initial_medoids is not None:
+            return self.run_kmedoids_for_k(X, self.k, self.metadata.initial_medoids)
+
+        # keep the medoids for k+1
+        kmedoids_result = self.run_kmedoids_for_k(X, self.k, self.warm_start_medoids(X, self.k))
+        self.warm_start_entry(X)[self.k] = list(kmedoids_result.medoids)
+        return kmedoids_result
+
+    def run_kmedoids_for_k(self, X, k, initial_medoids):
+        return run_kmedoids(X, k, self.distance_measure,
+                            initial_medoids=initial_medoids,
+                            random_seed=self.metadata.random_seed,
+                            mode=self.metadata.mode,
+                            max_iter=self.metadata.max_iter,
+                            tol=self.metadata.tol,
+                            verbose=self.metadata.verbose)
+
+    def warm_start_medoids(self, X, k):
+        '''
+        The initial medoids for k with warm start: the medoids found for k-1, computed (and
+        kept) if necessary, plus one medoid added greedily. None for k=2 (random medoids).
+        '''
+        if k <= 2:
+            return None
+
+        medoids_by_k = self.warm_start_entry(X)
+        if k - 1 not in medoids_by_k:
+            # warm start all the way from k=2
+            previous_initial_medoids = self.warm_start_medoids(X, k - 1)
+            previous_result = self.run_kmedoids_for_k(X, k - 1, previous_initial_medoids)
+            medoids_by_k[k - 1] = list(previous_result.medoids)
+
+        initial_medoids = add_medoid_greedy(X, medoids_by_k[k - 1], self.distance_measure,
+                                            random_seed=self.metadata.random_seed)
+        self.logger.debug('Warm start for k={}: {}'.format(k, initial_medoids))
+        return initial_medoids
+
+    def warm_start_entry(self, X):
+        '''
+        The medoids found with warm start for the same data and parameters, by k.
+        '''
+        if self.data_hash is None:
+            # not called from partition_impl
+            self.data_hash = hashlib.sha1(np.ascontiguousarray(X)).hexdigest()
+
+        key = (self.data_hash, distance_measure_key(self.distance_measure),
+               self.metadata.random_seed, self.metadata.mode, self.metadata.max_iter,
+               self.metadata.tol)
+
+        if key not in warm_start_cache:
+            warm_start_cache[key] = {}
+            while len(warm_start_cache) > WARM_START_CACHE_SIZE:
+                warm_start_cache.popitem(last=False)
+
+        warm_start_cache.move_to_end(key)
+        return warm_start_cache[key]
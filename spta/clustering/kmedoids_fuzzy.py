@@ -0,0 +1,140 @@
+'''
+Clustering algorithm based on fuzzy k-medoids, the partition is a PartitionRegionFuzzy.
+See spta.kmedoids.kmedoids_fuzzy.
+'''
+
+from collections import OrderedDict
+
+from spta.region import Point
+from spta.region.partition import PartitionRegionFuzzy
+from spta.kmedoids.kmedoids_fuzzy import run_kmedoids_fuzzy
+
+from . import ClusteringMetadata, ClusteringAlgorithm
+
+
+class KmedoidsFuzzyClusteringMetadata(ClusteringMetadata):
+    '''
+    Stores metadata for the fuzzy k-medoids clustering algorithm.
+    '''
+
+    def __init__(self, k, m=2, random_seed=1, threshold=0, num_candidates=None, max_iter=1000,
+                 tol=0.001, verbose=True):
+        '''
+        Sets up the fuzzy k-medoids metadata with default values. The value of k is still
+        required.
+
+        m
+            the fuzzifier, m > 1.
+
+        threshold
+            determines the members of each cluster in the partition, see PartitionRegionFuzzy.
+        '''
+        super(KmedoidsFuzzyClusteringMetadata, self).__init__('kfuzzy', k=k)
+
+        if m <= 1:
+            raise ValueError('The fuzzifier must be larger than 1: {}'.format(m))
+
+        self.m = m
+        self.random_seed = random_seed
+        self.threshold = threshold
+        self.num_candidates = num_candidates
+        self.max_iter = max_iter
+        self.tol = tol
+        self.verbose = verbose
+
+    def as_dict(self):
+        return OrderedDict([
+            ('type', 'kfuzzy'),
+            ('k', self.k),
+            ('m', self.m),
+            ('seed', self.random_seed),
+            ('threshold', self.threshold)
+        ])
+
+    def __repr__(self):
+        r = '{}_k{}_m{:g}_seed{}'.format(self.name, self.k, self.m, self.random_seed)
+        if self.threshold > 0:
+            r = '{}_th{:g}'.format(r, self.threshold)
+
+        if self.num_candidates is not None:
+            r = '{}_c{}'.format(r, self.num_candidates)
+
+        return r
+
+    def __str__(self):
+        '''
+        Useful for plot titles
+        '''
+        return 'K-medoids fuzzy: k={} m={:g} seed={} threshold={:g}'.format(self.k, self.m,
+                                                                           self.random_seed,
+                                                                           self.threshold)
+
+    @classmethod
+    def from_repr(cls, repr_string):
+        '''
+        Given the representation, recover the instance.
+        '''
+        parts = repr_string.split('_')
+        assert parts[0] == 'kfuzzy'
+
+        # e.g. kfuzzy_k2_m2_seed5, kfuzzy_k2_m1.5_seed5_th0.1_c20
+        k = int(parts[1][1:])
+        m = float(parts[2][1:])
+        random_seed = int(parts[3][4:])
+
+        threshold = 0
+        num_candidates = None
+        for part in parts[4:]:
+            if part.startswith('th'):
+                threshold = float(part[2:])
+            elif part.startswith('c'):
+                num_candidates = int(part[1:])
+
+        return KmedoidsFuzzyClusteringMetadata(k, m=m, random_seed=random_seed,
+                                               threshold=threshold,
+                                               num_candidates=num_candidates)
+
+
+class KmedoidsFuzzyClusteringAlgorithm(ClusteringAlgorithm):
+    '''
+    Creates a fuzzy partition with medoids using fuzzy k-medoids.
+    '''
+
+    def partition_impl(self, spt_region, with_medoids=True):
+        '''
+        Create a fuzzy k-medoids partition on a spatio-temporal region.
+        A partition can be used to create spatio-temporal clusters.
+
+        with_medoids
+            Optionally return the medoids of the clusters
+        '''
+        self.logger.info('Clustering algorithm {}'.format(self.metadata))
+
+        # the k-medoids algorithm works on list of series, not on spatio-temporal regions
+        X = spt_region.as_2d
+        _, x_len, y_len = spt_region.shape
+
+        kfuzzy_result = run_kmedoids_fuzzy(X, self.k, self.metadata.m, self.distance_measure,
+                                           random_seed=self.metadata.random_seed,
+                                           max_iter=self.metadata.max_iter,
+                                           tol=self.metadata.tol,
+                                           verbose=self.metadata.verbose,
+                                           num_candidates=self.metadata.num_candidates)
+
+        # build result
+        partition = PartitionRegionFuzzy.from_uij_and_region(kfuzzy_result.uij, x_len, y_len,
+                                                             self.metadata.threshold)
+
+        if with_medoids:
+
+            # run_kmedoids_fuzzy returns indices, not Point instances
+            medoids = [
+                Point(int(medoid_index / y_len), medoid_index % y_len)
+                for medoid_index
+                in kfuzzy_result.medoids
+            ]
+
+            # save medoids as member of the partition!
+            partition.medoids = medoids
+
+        return partition
@@ -1,10 +1,11 @@
-import matplotlib.pyplot as plt
+import numpy as np
 import os
 
 from .factory import ClusteringFactory
+from .suite import ClusteringSuiteExecutor
 
 from spta.util import log as log_util
-from spta.util import plot as plot_util
+from spta.util import silhouette as silhouette_util
 
 
 class SilhouetteAnalysis(log_util.LoggerMixin):
@@ -17,35 +18,47 @@ class SilhouetteAnalysis(log_util.LoggerMixin):
         self.spt_region = region_metadata.create_instance()
         self.clustering_factory = ClusteringFactory(distance_measure)
 
-    def perform_analysis(self, output_home, pickle_home):
+    def perform_analysis(self, output_home, pickle_home, num_proc=1, with_plots=True,
+                         sample_size=None):
         '''
         Here the silhouette analysis is performed: for every clustering algorithm (k/seed combination),
         the labels are used to calculate a silhouette score. The best (highest) score is saved and the
         corresponding clustering algorithm is returned.
+
+        With num_proc > 1, the partitions are found in parallel, see ClusteringSuiteExecutor.
+
+        With with_plots=False, only the scores are calculated (no matplotlib), optionally with a
+        random sample of sample_size points, see spta.util.silhouette.
         '''
 
         # load pre-computed distances
         if self.distance_measure.distance_matrix is None:
             self.distance_measure.load_distance_matrix_2d(self.region_metadata.distances_filename,
-                                                          self.region_metadata.region)
+                                                          self.region_metadata.region,
+                                                          mmap_mode='r')
 
         # updated at every iteration
         best_silhouette_avg = -1
         best_clustering_algorithm = None
 
-        for clustering_metadata in self.clustering_suite:
+        # use the clustering algorithms to get the partitions and medoids
+        # will try to leverage pickle and load previous attempts, otherwise calculate and save
+        executor = ClusteringSuiteExecutor(self.clustering_suite, self.distance_measure, num_proc)
+        all_partitions = executor.all_partitions(self.spt_region, with_medoids=True,
+                                                 save_csv_at=output_home,
+                                                 pickle_home=pickle_home)
+
+        for (clustering_metadata, partition) in all_partitions:
 
             clustering_algorithm = self.clustering_factory.instance(clustering_metadata)
             self.logger.debug('Analyzing silhouette for {}'.format(clustering_metadata))
 
-            # use the clustering algorithm to get the partition and medoids
-            # will try to leverage pickle and load previous attempts, otherwise calculate and save
-            partition = clustering_algorithm.partition(self.spt_region, with_medoids=True,
-                                                       save_csv_at=output_home,
-                                                       pickle_home=pickle_home)
-
             # the silhouette for the current clustering algorithm
-            silhouette_avg = self.single_silhouette(partition, clustering_algorithm, output_home)
+            if with_plots:
+                silhouette_avg = self.single_silhouette(partition, clustering_algorithm,
+                                                        output_home)
+            else:
+                silhouette_avg = self.silhouette_score(partition, sample_size)
             self.logger.debug('silhouette_avg -> {}'.format(silhouette_avg))
 
             # save best results
@@ -56,6 +69,23 @@ class SilhouetteAnalysis(log_util.LoggerMixin):
         self.logger.info('best_silhouette_avg {} -> {}'.format(best_silhouette_avg, best_clustering_algorithm))
         return (best_silhouette_avg, best_clustering_algorithm)
 
+    def silhouette_score(self, partition, sample_size=None):
+        '''
+        Calculates the silhouette average of a partition, without graphs.
+        '''
+        distance_matrix = self.distance_measure.distance_matrix
+        assert distance_matrix is not None
+
+        return silhouette_util.silhouette_score(distance_matrix, self.labels_of(partition),
+                                                sample_size=sample_size, random_seed=0)
+
+    def labels_of(self, partition):
+        '''
+        The 1-D labels of the points in the partition, the best cluster of each point.
+        '''
+        _, x_len, y_len = self.spt_region.shape
+        return np.array(partition.membership_of_point_indices(np.arange(x_len * y_len)))
+
     def single_silhouette(self, partition, clustering_algorithm, output_home):
         '''
         Here the silhouette is calculated using a helper function at plot_util. The parameters are adapted
@@ -63,6 +93,10 @@ class SilhouetteAnalysis(log_util.LoggerMixin):
 
         This function will always save and show all the graphs.
         '''
+        # NOTE: importing here, so that the scores can be calculated without matplotlib
+        import matplotlib.pyplot as plt
+        from spta.util import plot as plot_util
+
         # Create a subplot with 1 row and 2 columns
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 7))
         title = 'Silhouette analysis for {}'.format(clustering_algorithm)
@@ -75,7 +109,7 @@ class SilhouetteAnalysis(log_util.LoggerMixin):
 
         # the low-level function requires 1-D labels, we can extract them from the partition
         _, x_len, y_len = self.spt_region.shape
-        labels = partition.numpy_dataset.reshape(x_len * y_len)
+        labels = self.labels_of(partition)
         shape_2d = (x_len, y_len)
 
         # plot the clustering in 2d
@@ -1,4 +1,6 @@
 import csv
+import itertools
+import multiprocessing as mp
 import numpy as np
 from operator import attrgetter
 import os
@@ -35,7 +37,8 @@ class ClusteringSuite(log_util.LoggerMixin):
             then  this indicates that mulitple metadata instances are desired. The parameters
             are combined using cartesian product of their values.
             Note: cannot support initial_medoids argument of k-medoids, since it is a list.
-            Note: for now, only k and random_seed can be iterated, this simplifies code.
+            Note: for now, only k, random_seed and the eps/min_samples of DBSCAN can be iterated,
+            this simplifies code.
 
         Example of k-medoids suite:
 
@@ -83,19 +86,35 @@ class ClusteringSuite(log_util.LoggerMixin):
                 # single value, convert to list
                 random_seeds = (random_seeds,)
 
+        # DBSCAN does not iterate k, but its eps and min_samples
+        iterated_names = [
+            name
+            for name in ('eps', 'min_samples')
+            if name in parameter_combinations
+        ]
+        iterated_values = []
+        for name in iterated_names:
+            values = parameter_combinations.pop(name)
+            if isinstance(values, (int, float)):
+                # single value, convert to list
+                values = (values,)
+            iterated_values.append(values)
+
         # assume the remaining paratemeters are not to be iterated in the suite
         single_value_parameters = dict(parameter_combinations)
 
         instances = []
         for k in ks:
             for random_seed in random_seeds:
+                for values in itertools.product(*iterated_values):
 
-                # put each seed here
-                single_value_parameters['random_seed'] = random_seed
+                    # put each seed and combination of the iterated parameters here
+                    single_value_parameters['random_seed'] = random_seed
+                    single_value_parameters.update(zip(iterated_names, values))
 
-                # create each instance
-                instances.append(self.factory.instance(self.metadata_name, k,
-                                                       **single_value_parameters))
+                    # create each instance
+                    instances.append(self.factory.instance(self.metadata_name, k,
+                                                           **single_value_parameters))
 
         return instances
 
@@ -225,6 +244,93 @@ class ClusteringSuite(log_util.LoggerMixin):
         return '{}-{}'.format(self.metadata_name, self.identifier)
 
 
+# shared with the processes of ClusteringSuiteExecutor
+executor_var_dict = {}
+
+
+def init_executor_process(spt_region, distance_measure, partition_kwargs):
+    '''
+    Initializes each process of ClusteringSuiteExecutor. With fork, the region and the distance
+    matrix are inherited, not copied: a memory-mapped matrix is shared through the page cache,
+    and an in-memory matrix is shared as long as it is only read.
+    '''
+    executor_var_dict['spt_region'] = spt_region
+    executor_var_dict['clustering_factory'] = ClusteringFactory(distance_measure)
+    executor_var_dict['partition_kwargs'] = partition_kwargs
+
+
+def partition_for_suite_member(clustering_metadata):
+    '''
+    Finds the partition of a single member of the suite, in a process of ClusteringSuiteExecutor.
+    '''
+    clustering_factory = executor_var_dict['clustering_factory']
+    clustering_algorithm = clustering_factory.instance(clustering_metadata)
+    partition = clustering_algorithm.partition(executor_var_dict['spt_region'],
+                                               **executor_var_dict['partition_kwargs'])
+    return (clustering_metadata, partition)
+
+
+class ClusteringSuiteExecutor(log_util.LoggerMixin):
+    '''
+    Finds the partitions of the members of a clustering suite using a pool of processes. All the
+    processes share the spatio-temporal region and the distance matrix of the distance measure,
+    which should be loaded read-only before (mmap_mode='r').
+
+    Each member is handled by ClusteringAlgorithm.partition, so partitions are saved to (or
+    loaded from) the usual pickle files. With num_proc=1, the members are processed sequentially
+    in the current process.
+    '''
+
+    def __init__(self, clustering_suite, distance_measure, num_proc=1):
+        self.clustering_suite = clustering_suite
+        self.distance_measure = distance_measure
+        self.num_proc = num_proc
+
+    def imap_partitions(self, spt_region, with_medoids=True, save_csv_at=None,
+                        pickle_home=None):
+        '''
+        Generator of (clustering_metadata, partition) tuples, in the order in which the members
+        finish. See ClusteringAlgorithm.partition for the arguments.
+        '''
+        partition_kwargs = {
+            'with_medoids': with_medoids,
+            'save_csv_at': save_csv_at,
+            'pickle_home': pickle_home
+        }
+
+        if self.num_proc == 1:
+            init_executor_process(spt_region, self.distance_measure, partition_kwargs)
+            for clustering_metadata in self.clustering_suite:
+                yield partition_for_suite_member(clustering_metadata)
+            return
+
+        with mp.Pool(processes=self.num_proc, initializer=init_executor_process,
+                     initargs=(spt_region, self.distance_measure, partition_kwargs)) as pool:
+
+            # one member per task, members can take very different times
+            for result in pool.imap_unordered(partition_for_suite_member, self.clustering_suite,
+                                              chunksize=1):
+                self.logger.debug('Suite member finished: {}'.format(result[0]))
+                yield result
+
+    def all_partitions(self, spt_region, with_medoids=True, save_csv_at=None, pickle_home=None):
+        '''
+        Returns a list of (clustering_metadata, partition) tuples, in the order of the suite.
+        '''
+        # the metadata returned by the processes are copies, identify them by representation
+        partitions_by_repr = {
+            repr(clustering_metadata): partition
+            for (clustering_metadata, partition)
+            in self.imap_partitions(spt_region, with_medoids, save_csv_at, pickle_home)
+        }
+
+        return [
+            (clustering_metadata, partitions_by_repr[repr(clustering_metadata)])
+            for clustering_metadata
+            in self.clustering_suite
+        ]
+
+
 class OrganizeClusteringSuite(log_util.LoggerMixin):
     '''
     Given a clustering suite, organizes it in some meaningful way.
@@ -270,7 +376,7 @@ class FindSuiteElbow(log_util.LoggerMixin):
         self.distance_measure = distance_measure
         self.clustering_factory = ClusteringFactory(distance_measure)
 
-    def calculate_elbows_kmedoids(self, pickle_home):
+    def calculate_elbows_kmedoids(self, pickle_home, num_proc=1):
         '''
         Use the methods below to find the elbows for the current suite.
         There will be as many elbows as there are seeds in the suite: to find the elbow,
@@ -283,51 +389,33 @@ class FindSuiteElbow(log_util.LoggerMixin):
         Returns a dictionary (seed, elbow_metadata) is a kmedoids clustering metadata where the elbow happens
         for that seed.
         '''
-        partitions_by_metadata = self.get_all_partitions(pickle_home)
-        self.logger.debug('Metadatas in suite: {}'.format(partitions_by_metadata.keys()))
+        # the partitions in suite order, a dictionary would merge the seeds of the same k
+        executor = ClusteringSuiteExecutor(self.clustering_suite, self.distance_measure, num_proc)
+        all_partitions = executor.all_partitions(spt_region=self.spt_region, with_medoids=True,
+                                                 pickle_home=pickle_home)
 
-        costs_by_metadata = self.get_all_intra_cluster_costs(partitions_by_metadata)
-        elbows_by_seed = self.find_cost_elbow_for_each_kmedoids_seed(costs_by_metadata)
+        costs_by_repr = self.get_all_intra_cluster_costs(all_partitions)
+        elbows_by_seed = self.find_cost_elbow_for_each_kmedoids_seed(costs_by_repr)
         return elbows_by_seed
 
-    def get_all_partitions(self, pickle_home):
-        '''
-        For each clustering algorithm in the suite, find its corresponding partition.
-        If the partition was saved, this should recover the partition to avoid recomputing the clustering.
-        Returns a dictionary where the keys are clustering_metadata instances and the values are the
-        corresponding partitions.
-        '''
-
-        partitions_by_metadata = {}
-
-        for clustering_metadata in self.clustering_suite:
-
-            # ask the clustering algorithm for its partition,
-            # will either calculate it or retrieved a saved one
-            clustering_algorithm = self.clustering_factory.instance(clustering_metadata)
-            partition = clustering_algorithm.partition(spt_region=self.spt_region,
-                                                       with_medoids=True,
-                                                       pickle_home=pickle_home)
-            partitions_by_metadata[clustering_metadata] = partition
-
-        return partitions_by_metadata
-
-    def get_all_intra_cluster_costs(self, partitions_by_metadata):
+    def get_all_intra_cluster_costs(self, all_partitions):
         '''
-        Ask each partition to calculate its total intra cluster cost.
+        Calculate the total intra cluster cost of each partition, given (metadata, partition)
+        pairs. Returns a dictionary where the keys are the representations of the metadata.
         '''
-        costs_by_metadata = {}
+        costs_by_repr = {}
 
-        for (clustering_metadata, partition) in partitions_by_metadata.items():
+        for (clustering_metadata, partition) in all_partitions:
             this_intra_cluster_cost = intra_cluster_cost(partition, self.spt_region, self.distance_measure)
-            costs_by_metadata[clustering_metadata] = this_intra_cluster_cost
+            costs_by_repr[repr(clustering_metadata)] = this_intra_cluster_cost
             self.logger.debug('Cost: {} -> {:.2f}'.format(clustering_metadata, this_intra_cluster_cost))
 
-        return costs_by_metadata
+        return costs_by_repr
 
-    def find_cost_elbow_given_order(self, costs_by_metadata, ordered_metadata_instances):
+    def find_cost_elbow_given_order(self, costs_by_repr, ordered_metadata_instances):
         '''
-        Given a particular order of metadata instances and the intra cluster cost of each metadata,
+        Given a particular order of metadata instances and the intra cluster cost of each metadata
+        (by the representation of the metadata, see get_all_intra_cluster_costs),
         calculate the 'elbow' metadata, identified by the maximum value of an approximate second derivative
         of the intra cluster cost, when ordered by order given by ordered_metadata_instances.
 
@@ -340,45 +428,20 @@ class FindSuiteElbow(log_util.LoggerMixin):
         NOTE: if the value of k is repeated once, then the equation breaks!
         '''
         # sanity checks: same length, at least three points
-        assert len(costs_by_metadata.keys()) == len(ordered_metadata_instances)
-        assert len(costs_by_metadata.keys()) >= 3
+        assert len(costs_by_repr.keys()) == len(ordered_metadata_instances)
+        assert len(costs_by_repr.keys()) >= 3
 
-        # x in the formula
         ordered_k = [metadata.k for metadata in ordered_metadata_instances]
-
-        # y in the formula
-        ordered_costs = [costs_by_metadata[metadata] for metadata in ordered_metadata_instances]
-
-        highest_second_derivative = -np.Inf
-        index_with_highest_second_derivative = -1
-
-        # iterate so that we have one value before and one value after
-        for i in range(1, len(ordered_k) - 1):
-            (x1, x2, x3) = ordered_k[i - 1:i + 2]
-            (y1, y2, y3) = ordered_costs[i - 1:i + 2]
-
-            # apply the second derivative
-            coef_y1 = 2.0 / ((x2 - x1) * (x3 - x1))
-            coef_y2 = -2.0 / ((x3 - x2) * (x2 - x1))
-            coef_y3 = 2.0 / ((x3 - x2) * (x3 - x1))
-
-            second_derivative = coef_y1 * y1 + coef_y2 * y2 + coef_y3 * y3
-
-            msg = 'd^2/dk^2 (k={}) -> {}'.format(x2, second_derivative)
-            print(msg)
-            self.logger.debug(msg)
-
-            if second_derivative > highest_second_derivative:
-                highest_second_derivative = second_derivative
-                index_with_highest_second_derivative = i
+        ordered_costs = [costs_by_repr[repr(metadata)] for metadata in ordered_metadata_instances]
 
         # return metadata with highest second derivative
-        return ordered_metadata_instances[index_with_highest_second_derivative]
+        elbow_index = find_elbow_index(ordered_k, ordered_costs)
+        return ordered_metadata_instances[elbow_index]
 
-    def find_cost_elbow_for_each_kmedoids_seed(self, costs_by_metadata):
+    def find_cost_elbow_for_each_kmedoids_seed(self, costs_by_repr):
         '''
         Uses OrganizeClusteringSuite to organize the metadata instances in the clustering suite.
-        Uses find_cost_elbow_given_order method
+        The costs are given by the representation of each metadata, see find_elbow_index.
         Assumes k-medoids!
         '''
         organizer = OrganizeClusteringSuite()
@@ -390,11 +453,50 @@ class FindSuiteElbow(log_util.LoggerMixin):
         for (seed, ordered_metadata_instances) in ordered_metadatas_by_seed.items():
 
             # need the corresponding costs for the current metadatas
-            costs_by_metadata_for_this_seed = {}
-            for metadata in ordered_metadata_instances:
-                costs_by_metadata_for_this_seed[metadata] = costs_by_metadata[metadata]
+            ordered_k = [metadata.k for metadata in ordered_metadata_instances]
+            ordered_costs = [
+                costs_by_repr[repr(metadata)]
+                for metadata
+                in ordered_metadata_instances
+            ]
 
-            elbow_for_this_seed = self.find_cost_elbow_given_order(costs_by_metadata, ordered_metadata_instances)
-            elbows_by_seed[seed] = elbow_for_this_seed
+            elbow_index = find_elbow_index(ordered_k, ordered_costs)
+            elbows_by_seed[seed] = ordered_metadata_instances[elbow_index]
 
         return elbows_by_seed
+
+
+def find_elbow_index(ordered_k, ordered_costs):
+    '''
+    Given increasing values of k and the intra cluster cost for each k, find the index of the
+    'elbow', identified by the maximum value of an approximate second derivative of the cost.
+
+    This implementation takes into account the possibility of uneven spacing of the values of k
+    Using this implementation of a discrete second derivative:
+    https://mathformeremortals.wordpress.com/2013/01/12/a-numerical-second-derivative-from-three-points
+
+    NOTE: if the value of k is repeated once, then the equation breaks!
+    '''
+    logger = log_util.logger_for_me(find_elbow_index)
+
+    # x and y in the formula, at least three points
+    x = np.asarray(ordered_k, dtype=np.float64)
+    y = np.asarray(ordered_costs, dtype=np.float64)
+    assert len(x) == len(y)
+    assert len(x) >= 3
+
+    # one value before and one value after each point
+    (x1, x2, x3) = (x[:-2], x[1:-1], x[2:])
+    (y1, y2, y3) = (y[:-2], y[1:-1], y[2:])
+
+    # apply the second derivative
+    coef_y1 = 2.0 / ((x2 - x1) * (x3 - x1))
+    coef_y2 = -2.0 / ((x3 - x2) * (x2 - x1))
+    coef_y3 = 2.0 / ((x3 - x2) * (x3 - x1))
+    second_derivatives = coef_y1 * y1 + coef_y2 * y2 + coef_y3 * y3
+
+    for (k, second_derivative) in zip(ordered_k[1:-1], second_derivatives):
+        logger.debug('d^2/dk^2 (k={}) -> {}'.format(k, second_derivative))
+
+    # the first point has no second derivative
+    return int(np.argmax(second_derivatives)) + 1
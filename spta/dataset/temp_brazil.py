@@ -19,13 +19,21 @@ DATASET_SAMPLES_PER_DAY = 4
 FORMAT_BY_YEAR = 'raw/{}_{}_{}_{}spd.npy'
 
 
-def read_hdf5_dataset(series_start, series_end, dataset_source):
+def read_hdf5_dataset(series_start, series_end, dataset_source, region=None):
     '''
-    Reads from hdf5 file, entire coordinates, using the sample interval series_start:series_end.
+    Reads from hdf5 file using the sample interval series_start:series_end.
+    If a region is provided, only the coordinates of the region are read, otherwise the entire
+    coordinates are read.
+
+    The interval and the region are passed to HDF5 as a hyperslab selection, so only the
+    requested data is read from the file.
     '''
     logger = log_util.logger_for_me(read_hdf5_dataset)
 
     dataset_str = '{}[{}:{}]'.format(dataset_source, series_start, series_end)
+    if region is not None:
+        dataset_str = '{}[{}:{}, {}:{}, {}:{}]'.format(dataset_source, series_start, series_end,
+                                                       region.x1, region.x2, region.y1, region.y2)
     logger.debug('Reading dataset: {}'.format(dataset_str))
 
     if not os.path.exists(dataset_source):
@@ -33,18 +41,24 @@ def read_hdf5_dataset(series_start, series_end, dataset_source):
         raise ValueError(msg)
 
     with h5py.File(dataset_source, 'r') as f:
-        real = f['real'][...]
-        logger.info('field "real" of dataset has shape: {}'.format(real.shape))
-        real = real[series_start:series_end, :, :]
+        real_dataset = f['real']
+        logger.info('field "real" of dataset has shape: {}'.format(real_dataset.shape))
+
+        if region is None:
+            real = real_dataset[series_start:series_end, :, :]
+        else:
+            real = real_dataset[series_start:series_end, region.x1:region.x2, region.y1:region.y2]
 
     series_len = series_end - series_start
     logger.info('Read dataset {} with {} samples: {}'.format(dataset_str, series_len, real.shape))
     return real
 
 
-def read_hdf5_dataset_by_year(year_start, year_end, dataset_source=RAW_DATASET):
+def read_hdf5_dataset_by_year(year_start, year_end, dataset_source=RAW_DATASET, region=None):
     '''
-    Reads from hdf5 file, entire coordinates, using the start and end year.
+    Reads from hdf5 file using the start and end year.
+    If a region is provided, only the coordinates of the region are read, otherwise the entire
+    coordinates are read.
     '''
     # check boundaries and sanity
     if year_start > year_end or year_start < DATASET_YEAR_START or year_end > DATASET_YEAR_END:
@@ -57,7 +71,7 @@ def read_hdf5_dataset_by_year(year_start, year_end, dataset_source=RAW_DATASET):
                                             first_year_in_sample=DATASET_YEAR_START,
                                             samples_per_day=DATASET_SAMPLES_PER_DAY)
 
-    return read_hdf5_dataset(series_start, series_end, dataset_source)
+    return read_hdf5_dataset(series_start, series_end, dataset_source, region)
 
 
 def save_dataset_interval(dataset_interval, name, year_start, year_end, spd):
@@ -85,10 +99,12 @@ def save_dataset_interval(dataset_interval, name, year_start, year_end, spd):
     return dataset_filename
 
 
-def try_load_dataset_interval(name, year_start, year_end, spd):
+def try_load_dataset_interval(name, year_start, year_end, spd, region=None):
     '''
     Tries to loads a previously saved dataset interval from its numpy file.
     If the data was not saved before, returns None without error.
+
+    If a region is provided, the file is memory-mapped and only the region is read.
     '''
     logger = log_util.logger_for_me(try_load_dataset_interval)
     dataset_filename = FORMAT_BY_YEAR.format(name, year_start, year_end, spd)
@@ -97,9 +113,14 @@ def try_load_dataset_interval(name, year_start, year_end, spd):
 
     try:
         if os.path.exists(dataset_filename):
-            dataset_interval = np.load(dataset_filename)
+            if region is None:
+                dataset_interval = np.load(dataset_filename)
+            else:
+                dataset_interval = np.load(dataset_filename, mmap_mode='r')
+                dataset_interval = \
+                    np.array(dataset_interval[:, region.x1:region.x2, region.y1:region.y2])
         else:
-            logger.debug('Saved dataset not found: {}'.dataset_filename)
+            logger.debug('Saved dataset not found: {}'.format(dataset_filename))
 
     except Exception:
         logger.warn('Error loading dataset: {}'.format(dataset_filename))
@@ -107,12 +128,16 @@ def try_load_dataset_interval(name, year_start, year_end, spd):
     return dataset_interval, dataset_filename
 
 
-def retrieve_dataset_interval(year_start, year_end, spd, name=DATASET_NAME):
+def retrieve_dataset_interval(year_start, year_end, spd, name=DATASET_NAME, region=None,
+                              dataset_source=RAW_DATASET):
     '''
     Retrieves a subset of the dataset, given the year interval. Tries to load from a previously
     saved file, if this fails then the data is first extracted from the entire dataset and saved
     for future use.
 
+    If a region is provided, only the coordinates of the region are returned. When the interval
+    was not saved before, only the region is read from the dataset (and it is not saved).
+
     Assumes spd = 1 or spd = 4!
     '''
     logger = log_util.logger_for_me(retrieve_dataset_interval)
@@ -120,13 +145,15 @@ def retrieve_dataset_interval(year_start, year_end, spd, name=DATASET_NAME):
     # big assumption
     assert spd == 1 or spd == 4
 
-    dataset_interval, dataset_filename = try_load_dataset_interval(name, year_start, year_end, spd)
+    dataset_interval, dataset_filename = try_load_dataset_interval(name, year_start, year_end, spd,
+                                                                   region)
     if dataset_interval is None:
 
         # the attempt to load a previously saved dataset failed, extract data from whole dataset
         dataset_interval_4spd = read_hdf5_dataset_by_year(year_start=year_start,
                                                           year_end=year_end,
-                                                          dataset_source=RAW_DATASET)
+                                                          dataset_source=dataset_source,
+                                                          region=region)
 
         # convert to 1spd?
         if spd == 1:
@@ -134,8 +161,12 @@ def retrieve_dataset_interval(year_start, year_end, spd, name=DATASET_NAME):
         else:
             dataset_interval = dataset_interval_4spd
 
-        # save this dataset interval to avoid reading the whole dataset again
-        dataset_filename = save_dataset_interval(dataset_interval, name, year_start, year_end, spd)
+        if region is None:
+            # save this dataset interval to avoid reading the whole dataset again
+            dataset_filename = save_dataset_interval(dataset_interval, name, year_start,
+                                                     year_end, spd)
+        else:
+            dataset_filename = dataset_source
 
     logger.info('Loaded dataset: {} -> {}'.format(dataset_filename, dataset_interval.shape))
     return dataset_interval
@@ -7,12 +7,29 @@ import numpy as np
 
 from spta.util import log as log_util
 
+from .condensed import CondensedDistanceMatrix
+
 
 class DistanceBetweenSeries(log_util.LoggerMixin):
 
     def __init__(self):
         self.distance_matrix = None
 
+    @property
+    def distances_file_suffix(self):
+        '''
+        Identifies the stored distance matrix of this distance measure, see
+        SpatioTemporalRegionMetadata.distances_filename_for. By default there is no suffix.
+        '''
+        return None
+
+    def lower_bound_radius(self, series_len):
+        '''
+        Warping radius for the lower bounds of this distance measure, see
+        spta.distance.nearest. None means that the measure does not support lower bounds.
+        '''
+        return None
+
     def measure(self, first_series, second_series):
         '''
         Distance between two series. Can be used to evaluate the error between forecast and test.
@@ -26,6 +43,18 @@ class DistanceBetweenSeries(log_util.LoggerMixin):
         '''
         raise NotImplementedError
 
+    def compute_distances_to_a_series(self, a_series, iterable_of_other_series):
+        '''
+        Given a single series and some iterable collection of other series, (e.g a list),
+        compute the distance between the first series and all the other series.
+        The output is an array of distances.
+        '''
+        return np.array([
+            self.measure(a_series, other_series)
+            for other_series
+            in iterable_of_other_series
+        ])
+
     def compute_distance_matrix(self, temporal_data):
         '''
         Given a spatio-temporal region, calculates and stores the distance matrix, i.e. the
@@ -38,19 +67,47 @@ class DistanceBetweenSeries(log_util.LoggerMixin):
         '''
         raise NotImplementedError
 
-    def load_distance_matrix_2d(self, filename, expected_region):
+    def compute_condensed_rows(self, series_2d, row_start, row_end):
+        '''
+        Computes the distances (i, j) for each row i in [row_start, row_end) and j > i, given
+        an array of series (series_n, series_len). The output is the corresponding slice of the
+        condensed distance matrix, see CondensedDistanceMatrix.
+        '''
+        rows = [
+            self.compute_distances_to_a_series(series_2d[i], series_2d[(i + 1):])
+            for i
+            in range(row_start, row_end)
+        ]
+        if not rows:
+            return np.empty(0)
+
+        return np.concatenate(rows)
+
+    def load_distance_matrix_2d(self, filename, expected_region, mmap_mode=None):
         '''
         Loads a pre-computed distance matrix from a file for a 2d region.
         The distance matrix is expected to be a 2d matrix [x_len * y_len, x_len * y_len].
+
+        If the file contains a 1-d array, it is assumed to be a condensed distance matrix
+        (see CondensedDistanceMatrix), which is used directly without expanding it.
+
+        mmap_mode
+            If provided (e.g. 'r'), the file is memory-mapped instead of read into memory, see
+            numpy.load. With 'r', processes that load the same matrix share the page cache, and
+            only the rows that are accessed are read from disk.
         '''
 
         # read from file
         try:
-            distance_matrix = np.load(filename)
+            distance_matrix = np.load(filename, mmap_mode=mmap_mode)
         except IOError:
             self.logger.warn('Could not load file {}'.format(filename))
             return None
 
+        if distance_matrix.ndim == 1:
+            # saved in condensed form, this also validates the length
+            distance_matrix = CondensedDistanceMatrix(distance_matrix)
+
         # check dimensions
         i_len, j_len = distance_matrix.shape
 
@@ -66,26 +123,45 @@ class DistanceBetweenSeries(log_util.LoggerMixin):
         # all good
         self.distance_matrix = distance_matrix
 
-        log_msg = 'Loaded distance matrix for region {} using: {}'
-        self.logger.info(log_msg.format(str(expected_region), filename))
+        log_msg = 'Loaded distance matrix for region {} using: {} (mmap_mode={})'
+        self.logger.info(log_msg.format(str(expected_region), filename, mmap_mode))
+        return self.distance_matrix
+
+    def condense_distance_matrix(self, dtype=None):
+        '''
+        Replaces the stored distance matrix with its condensed representation, which only keeps
+        the upper triangle. Use dtype=np.float32 to further reduce memory.
+        Returns the condensed matrix.
+        '''
+        if self.distance_matrix is None:
+            raise ValueError('No distance matrix to condense!')
+
+        if isinstance(self.distance_matrix, CondensedDistanceMatrix):
+            if dtype is not None:
+                self.distance_matrix = self.distance_matrix.astype(dtype)
+        else:
+            self.distance_matrix = CondensedDistanceMatrix.from_dense(self.distance_matrix, dtype)
+
         return self.distance_matrix
 
-    def load_distance_matrix_md(self, sptr_metadata):
+    def load_distance_matrix_md(self, sptr_metadata, mmap_mode=None):
         '''
         Given metadata for a spatio-temporal region, loads its DTW pre-computed distance matrix.
+        See load_distance_matrix_2d for mmap_mode.
 
         TODO: the sptr_metadata.distances_filename should indicate that it was computed with DTW!
         '''
-        return self.load_distance_matrix_2d(sptr_metadata.distances_filename,
-                                            sptr_metadata.region)
+        return self.load_distance_matrix_2d(sptr_metadata.distances_filename_for(self),
+                                            sptr_metadata.region, mmap_mode)
 
-    def try_load_distance_matrix(self, spt_region):
+    def try_load_distance_matrix(self, spt_region, mmap_mode=None):
         '''
         Given a spatio-temporal region, try to load its DTW pre-computed distance matrix.
         Returns either the matrix or None if the matrix could not be loaded.
+        See load_distance_matrix_2d for mmap_mode.
         '''
         if spt_region.region_metadata is not None:
-            return self.load_distance_matrix_md(spt_region.region_metadata)
+            return self.load_distance_matrix_md(spt_region.region_metadata, mmap_mode)
         else:
             return None
 
@@ -121,8 +197,8 @@ class DistanceBetweenSeries(log_util.LoggerMixin):
 
             try:
                 # can we load a saved distance matrix?
-                # this requires the metadata of the region
-                self.load_distance_matrix_md(spt_region.region_metadata)
+                # this requires the metadata of the region, the matrix is only read
+                self.load_distance_matrix_md(spt_region.region_metadata, mmap_mode='r')
 
             except Exception as err:
 
@@ -0,0 +1,232 @@
+'''
+Condensed storage for distance matrices.
+
+A distance matrix computed with DTW is symmetric and has zeros in its diagonal, so only the
+strict upper triangle needs to be stored. For N points this requires N * (N - 1) / 2 values
+instead of N^2, and the values can optionally be stored as float32 to halve the size again.
+
+The condensed layout is the same as the one used by scipy.spatial.distance.squareform: the
+distances (0, 1), (0, 2), ... (0, N-1), (1, 2), ... (N-2, N-1) are stored in a 1-d array.
+'''
+
+import numpy as np
+
+from spta.util import log as log_util
+
+
+def condensed_len(n):
+    '''
+    Length of the condensed representation of a (n, n) distance matrix.
+    '''
+    return n * (n - 1) // 2
+
+
+def n_from_condensed_len(length):
+    '''
+    Recover the number of points N given the length of a condensed distance matrix.
+    Raises ValueError if the length does not correspond to any N.
+    '''
+    # solve n^2 - n - 2 * length = 0
+    n = int(np.round((1 + np.sqrt(1 + 8 * length)) / 2))
+    if condensed_len(n) != length:
+        raise ValueError('Not a condensed distance matrix: length {}'.format(length))
+    return n
+
+
+class CondensedDistanceMatrix(log_util.LoggerMixin):
+    '''
+    A symmetric distance matrix with zero diagonal, backed by a 1-d array that only contains
+    the strict upper triangle.
+
+    Supports the indexing patterns used by consumers of a dense distance matrix, so that it can
+    be used in place of a dense (N, N) numpy array without expanding it:
+
+        matrix[i]                       row i, 1-d array of length N
+        matrix[i, indices]              distances between i and the indices, 1-d array
+        matrix[indices, :]              rows at the indices, 2-d array (len(indices), N)
+        matrix[indices_a, indices_b]    element-wise (fancy) indexing, same as numpy
+
+    Only reading is supported. Use to_dense() to get a full copy of the matrix.
+    '''
+
+    def __init__(self, condensed, n=None):
+        '''
+        condensed
+            1-d array with the strict upper triangle of the matrix.
+
+        n
+            number of points (rows) of the matrix, recovered from the length if not provided.
+        '''
+        super(CondensedDistanceMatrix, self).__init__()
+
+        if condensed.ndim != 1:
+            raise ValueError('Expected a 1-d condensed array, got {}'.format(condensed.shape))
+
+        if n is None:
+            n = n_from_condensed_len(len(condensed))
+
+        elif condensed_len(n) != len(condensed):
+            err_msg = 'Condensed array of length {} does not match n={}'
+            raise ValueError(err_msg.format(len(condensed), n))
+
+        self.condensed = condensed
+        self.n = n
+
+    @property
+    def shape(self):
+        return (self.n, self.n)
+
+    @property
+    def ndim(self):
+        return 2
+
+    @property
+    def dtype(self):
+        return self.condensed.dtype
+
+    @property
+    def nbytes(self):
+        return self.condensed.nbytes
+
+    def __len__(self):
+        return self.n
+
+    def condensed_index(self, i, j):
+        '''
+        Position in the condensed array of the distance (i, j), requires i < j.
+        Works with scalars and numpy arrays.
+        '''
+        return self.n * i - (i * (i + 1)) // 2 + (j - i - 1)
+
+    def upper_row_slice(self, i):
+        '''
+        The distances (i, i+1), (i, i+2), ... (i, N-1) are contiguous in the condensed array,
+        return the slice that contains them.
+        '''
+        start = self.condensed_index(i, i + 1)
+        return slice(start, start + self.n - i - 1)
+
+    def take(self, i, j):
+        '''
+        Element-wise distances between the indices i and j, which are broadcast together as
+        in numpy fancy indexing. Returns a scalar if both indices are scalars.
+        '''
+        i = self._as_index_array(i)
+        j = self._as_index_array(j)
+
+        low = np.minimum(i, j)
+        high = np.maximum(i, j)
+        diagonal = low == high
+
+        # any valid position works for the diagonal, the value is overwritten with zero
+        positions = np.where(diagonal, 0, self.condensed_index(low, high))
+        distances = self.condensed[positions]
+
+        if np.ndim(distances) == 0:
+            return distances.dtype.type(0) if diagonal else distances
+
+        distances[diagonal] = 0
+        return distances
+
+    def row(self, i):
+        '''
+        All the distances to the point with index i, as a 1-d array of length N.
+        '''
+        return self.take(i, np.arange(self.n))
+
+    def __getitem__(self, key):
+        '''
+        Mimics numpy indexing for a 2-d matrix, see class documentation.
+        '''
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+
+        if len(key) != 2:
+            raise IndexError('Too many indices for distance matrix: {}'.format(key))
+
+        (rows, cols) = key
+
+        rows_is_slice = isinstance(rows, slice)
+        cols_is_slice = isinstance(cols, slice)
+
+        if rows_is_slice:
+            rows = np.arange(self.n)[rows]
+        if cols_is_slice:
+            cols = np.arange(self.n)[cols]
+
+        rows = self._as_index_array(rows)
+        cols = self._as_index_array(cols)
+
+        if rows_is_slice and (cols_is_slice or cols.ndim > 0):
+            # slice combined with array or slice: outer indexing, rows first
+            return self.take(rows[:, np.newaxis], cols[np.newaxis, :])
+
+        if cols_is_slice and rows.ndim > 0:
+            # array of rows combined with a slice of columns, e.g. matrix[medoid_indices, :]
+            return self.take(rows[:, np.newaxis], cols[np.newaxis, :])
+
+        # both are scalars or arrays (fancy indexing), or a scalar with a slice
+        return self.take(rows, cols)
+
+    def to_dense(self, dtype=None):
+        '''
+        Expand into a full (N, N) numpy array.
+        '''
+        if dtype is None:
+            dtype = self.dtype
+
+        dense = np.zeros((self.n, self.n), dtype=dtype)
+
+        # copy row by row, avoids creating (N^2 / 2) temporary indices
+        for i in range(0, self.n - 1):
+            upper_row = self.condensed[self.upper_row_slice(i)]
+            dense[i, (i + 1):] = upper_row
+            dense[(i + 1):, i] = upper_row
+
+        return dense
+
+    def __array__(self, dtype=None, copy=None):
+        '''
+        Allows np.asarray(matrix), e.g. for libraries that require a dense precomputed matrix.
+        '''
+        return self.to_dense(dtype)
+
+    def astype(self, dtype):
+        return CondensedDistanceMatrix(self.condensed.astype(dtype), self.n)
+
+    def save(self, filename):
+        '''
+        Saves the condensed array as a numpy file. Loading the file with np.load will return
+        a 1-d array, see DistanceBetweenSeries.load_distance_matrix_2d.
+        '''
+        np.save(filename, self.condensed)
+        self.logger.info('Saved condensed distances to {}: {}'.format(filename, self.shape))
+
+    def _as_index_array(self, index):
+        '''
+        Converts an index (scalar or list) to a numpy integer array, handling negative values.
+        '''
+        index = np.asarray(index, dtype=np.int64)
+        return np.where(index < 0, index + self.n, index)
+
+    @classmethod
+    def from_dense(cls, distance_matrix, dtype=None):
+        '''
+        Create a condensed matrix from a dense (N, N) distance matrix, assumed to be symmetric
+        with zero diagonal. The upper triangle is kept.
+        '''
+        (n, n_other) = distance_matrix.shape
+        if n != n_other:
+            raise ValueError('Expected a square matrix, got {}'.format(distance_matrix.shape))
+
+        if dtype is None:
+            dtype = distance_matrix.dtype
+
+        condensed_matrix = CondensedDistanceMatrix(np.empty(condensed_len(n), dtype=dtype), n)
+
+        # copy the upper triangle row by row
+        for i in range(0, n - 1):
+            condensed_slice = condensed_matrix.upper_row_slice(i)
+            condensed_matrix.condensed[condensed_slice] = distance_matrix[i, (i + 1):]
+
+        return condensed_matrix
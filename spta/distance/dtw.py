@@ -1,10 +1,10 @@
 import numpy as np
-from tslearn.metrics import dtw
+from tslearn.metrics import cdist_dtw, dtw
 
-from spta.region import Point
 from spta.util import arrays as arrays_util
 
 from . import DistanceBetweenSeries
+from .condensed import CondensedDistanceMatrix
 
 
 class DistanceByDTW(DistanceBetweenSeries):
@@ -16,11 +16,25 @@ class DistanceByDTW(DistanceBetweenSeries):
         super(DistanceByDTW, self).__init__()
         self.name = 'dtw'
 
+        # no global constraint on the warping path, see subclasses for constrained DTW
+        self.constraint_params = {}
+
     def measure(self, first_series, second_series):
         if np.isnan(first_series).any() or np.isnan(second_series).any():
             return np.nan
         else:
-            return dtw(first_series, second_series)
+            return dtw(first_series, second_series, **self.constraint_params)
+
+    def lower_bound_radius(self, series_len):
+        '''
+        The warping path can match samples at most this far apart, used by LB_Keogh.
+        Only the Sakoe-Chiba band gives a narrower radius, the Itakura parallelogram may
+        span the whole series near the middle.
+        '''
+        if 'sakoe_chiba_radius' in self.constraint_params:
+            return min(self.constraint_params['sakoe_chiba_radius'], series_len - 1)
+
+        return series_len - 1
 
     def combine(self, distances_for_point):
         '''
@@ -59,51 +73,29 @@ class DistanceByDTW(DistanceBetweenSeries):
         return distance_matrix
 
     def compute_distance_matrix_series_array(self, X):
+        '''
+        Distance matrix between each two series of the array (series_n, series_len), computed
+        with a single call to the compiled DTW implementation. Only the upper triangle is
+        computed, the matrix is symmetric.
+        '''
         series_n, _ = X.shape
-        distance_matrix = np.empty((series_n, series_n))
+        self.logger.debug('Calculating all distances for {} series...'.format(series_n))
 
-        # iterate the series
-        for i in range(0, series_n):
+        valid = self.valid_series_mask(X)
+        valid_X = X[valid]
 
-            series_i = X[i, :]
-
-            # calculate the distances to all other series
-            self.logger.debug('Calculating all distances at: {}...'.format(i))
-            # distances_for_i = [
-            #     self.measure(series_i, other_series)
-            #     for other_series
-            #     in X
-            # ]
-            # self.logger.debug('Got: {}'.format(str(distances_for_i)))
-            # distance_matrix[i, :] = distances_for_i
-            distance_matrix[i, :] = self.compute_distances_to_a_series(series_i, X)
+        # the distance to a series with NaN is NaN
+        distance_matrix = np.full((series_n, series_n), np.nan)
+        if len(valid_X) > 0:
+            distance_matrix[np.ix_(valid, valid)] = cdist_dtw(valid_X, **self.constraint_params)
 
         return distance_matrix
 
     def compute_distance_matrix_sptr(self, spatio_temporal_region):
 
-        _, x_len, y_len = spatio_temporal_region.shape
-        sptr_2d = spatio_temporal_region.as_2d
-        distance_matrix = np.empty((x_len * y_len, x_len * y_len))
-
-        # iterate each point in the region
-        for i in range(0, x_len):
-            for j in range(0, y_len):
-
-                # for point (i, j), calculate the distances to all other points
-                point = Point(i, j)
-                self.logger.debug('DTW of all points against: {}...'.format(str(point)))
-                point_series = spatio_temporal_region.series_at(point)
-
-                # distances_at_point = [
-                #     self.measure(point_series, other_series)
-                #     for other_series
-                #     in sptr_2d
-                # ]
-                # self.logger.debug('Got: {}'.format(str(distances_at_point)))
-                # distance_matrix[i * y_len + j, :] = distances_at_point
-                distance_matrix[i * y_len + j, :] = \
-                    self.compute_distances_to_a_series(point_series, sptr_2d)
+        # the series of point (i, j) is at index i * y_len + j
+        distance_matrix = \
+            self.compute_distance_matrix_series_array(spatio_temporal_region.as_2d)
 
         # self.logger.debug('Distance matrix:')
         self.logger.debug(str(distance_matrix))
@@ -116,11 +108,38 @@ class DistanceByDTW(DistanceBetweenSeries):
         compute the distance between the first series and all the other series.
         The output is an array of distances.
         '''
-        return [
-            self.measure(a_series, other_series)
-            for other_series
-            in iterable_of_other_series
-        ]
+        first_block = np.asarray(a_series)[np.newaxis, :]
+        return self.compute_distances_between_blocks(first_block, iterable_of_other_series)[0]
+
+    def compute_distances_between_blocks(self, first_block, second_block):
+        '''
+        Given two collections of series with shapes (n1, series_len) and (n2, series_len),
+        compute the distances between each series of the first and each series of the second.
+        The output is an array (n1, n2), computed with a single call to the compiled DTW
+        implementation. Series that contain NaN are excluded up front, their distances are NaN.
+        '''
+        first_block = np.asarray(first_block, dtype=np.float64)
+        second_block = np.asarray(second_block, dtype=np.float64)
+
+        first_valid = self.valid_series_mask(first_block)
+        second_valid = self.valid_series_mask(second_block)
+
+        distances = np.full((len(first_block), len(second_block)), np.nan)
+        if first_valid.any() and second_valid.any():
+            distances[np.ix_(first_valid, second_valid)] = \
+                cdist_dtw(first_block[first_valid], second_block[second_valid],
+                          **self.constraint_params)
+
+        return distances
+
+    def valid_series_mask(self, series_block):
+        '''
+        Boolean mask of the series in a block (n, series_len) that do not have NaN values.
+        '''
+        if len(series_block) == 0:
+            return np.zeros(0, dtype=bool)
+
+        return ~np.isnan(series_block).any(axis=1)
 
     def __repr__(self):
         '''
@@ -132,6 +151,58 @@ class DistanceByDTW(DistanceBetweenSeries):
         return repr(self)
 
 
+class DistanceBySakoeChibaDTW(DistanceByDTW):
+    '''
+    DTW with a Sakoe-Chiba band: the warping path cannot deviate more than 'radius' samples
+    from the diagonal. Reduces the cost of each distance from O(T^2) to O(T * radius).
+
+    The radius is part of the representation, so the distance matrix is stored in its own file.
+    '''
+
+    def __init__(self, radius):
+        super(DistanceBySakoeChibaDTW, self).__init__()
+        self.radius = radius
+        self.name = 'dtw_sakoe_chiba_r{}'.format(radius)
+
+        self.constraint_params = {
+            'global_constraint': 'sakoe_chiba',
+            'sakoe_chiba_radius': radius
+        }
+
+    @property
+    def distances_file_suffix(self):
+        return repr(self)
+
+    def __repr__(self):
+        return self.name
+
+
+class DistanceByItakuraDTW(DistanceByDTW):
+    '''
+    DTW with an Itakura parallelogram: the slope of the warping path is bounded by 'max_slope',
+    which restricts the path to a parallelogram around the diagonal.
+
+    The slope is part of the representation, so the distance matrix is stored in its own file.
+    '''
+
+    def __init__(self, max_slope):
+        super(DistanceByItakuraDTW, self).__init__()
+        self.max_slope = max_slope
+        self.name = 'dtw_itakura_s{:g}'.format(max_slope)
+
+        self.constraint_params = {
+            'global_constraint': 'itakura',
+            'itakura_max_slope': max_slope
+        }
+
+    @property
+    def distances_file_suffix(self):
+        return repr(self)
+
+    def __repr__(self):
+        return self.name
+
+
 class DistanceBySpatialDTW(DistanceByDTW):
     '''
     A DTW implementation that adds the euclidian distance between points as a weight to the
@@ -167,6 +238,16 @@ class DistanceBySpatialDTW(DistanceByDTW):
         # coordinates of the spatial reigon
         points_of_2d_region = arrays_util.list_of_2d_points(x_len, y_len)
 
+        if isinstance(self.distance_matrix, CondensedDistanceMatrix):
+            # only the upper triangle is stored, the euclidian distances are also symmetric
+            self.weight_condensed_distance_matrix(points_of_2d_region)
+            self.weighted = True
+            return self.distance_matrix
+
+        if not self.distance_matrix.flags.writeable:
+            # loaded as read-only (e.g. memory-mapped), the weighted matrix needs its own copy
+            self.distance_matrix = np.array(self.distance_matrix)
+
         # iterate points
         for index in range(0, x_len * y_len):
 
@@ -186,15 +267,40 @@ class DistanceBySpatialDTW(DistanceByDTW):
 
         return self.distance_matrix
 
-    def load_distance_matrix_2d(self, filename, expected_region):
+    def weight_condensed_distance_matrix(self, points_of_2d_region):
+        '''
+        Adds the weights to a condensed distance matrix, one row of the upper triangle at a time.
+        '''
+        condensed_matrix = self.distance_matrix
+
+        # the loaded array may be read-only, work on a copy
+        condensed = np.array(condensed_matrix.condensed)
+
+        for index in range(0, condensed_matrix.n - 1):
+
+            # euclidian distances to the points after this one
+            point_at_index = points_of_2d_region[index].astype(np.float64)
+            euclidians_to_point = np.linalg.norm(points_of_2d_region[(index + 1):] - point_at_index,
+                                                 axis=1)
+
+            upper_row_slice = condensed_matrix.upper_row_slice(index)
+            condensed[upper_row_slice] = condensed[upper_row_slice] + \
+                euclidians_to_point * self.weight
+
+        self.distance_matrix = CondensedDistanceMatrix(condensed, condensed_matrix.n)
+
+    def load_distance_matrix_2d(self, filename, expected_region, mmap_mode=None):
         '''
         Loads a pre-computed DTW distance matrix from a file for a 2d region.
         THEN adds the weight of the euclidian distances to it.
         The distance matrix is expected to be a 2d matrix [x_len * y_len, x_len * y_len].
+
+        The weighted matrix is always kept in memory, a memory-mapped matrix is copied.
         '''
 
         # read normally
-        super(DistanceBySpatialDTW, self).load_distance_matrix_2d(filename, expected_region)
+        super(DistanceBySpatialDTW, self).load_distance_matrix_2d(filename, expected_region,
+                                                                  mmap_mode)
 
         # add the weight
         return self.weight_distance_matrix(expected_region)
@@ -1,20 +1,37 @@
+import functools
 import numpy as np
 
 from spta.util import parallel as parallel_util
 from spta.util import log as log_util
 
+from .condensed import CondensedDistanceMatrix
 from .dtw import DistanceByDTW
 
 
-# MAYBE improve performance by assigning rows to processes, instead of single points?
-
 class DistanceByDTWParallel(DistanceByDTW):
 
-    def __init__(self, num_proc):
+    def __init__(self, num_proc, distance_measure=None):
+        '''
+        distance_measure
+            the DTW variant computed by the workers, e.g. DistanceBySakoeChibaDTW.
+            Uses DistanceByDTW if not provided.
+        '''
         super(DistanceByDTWParallel, self).__init__()
         self.num_proc = num_proc
         self.name = 'dtw_p{}'.format(num_proc)
 
+        if distance_measure is None:
+            distance_measure = DistanceByDTW()
+        self.distance_measure = distance_measure
+        self.constraint_params = distance_measure.constraint_params
+
+    @property
+    def distances_file_suffix(self):
+        return self.distance_measure.distances_file_suffix
+
+    def __repr__(self):
+        return repr(self.distance_measure)
+
     def compute_distance_matrix_sptr_old(self, spatio_temporal_region):
 
         _, x_len, y_len = spatio_temporal_region.shape
@@ -37,37 +54,47 @@ class DistanceByDTWParallel(DistanceByDTW):
         distance_matrix = distance_matrix + np.transpose(distance_matrix)
         return distance_matrix
 
+    def compute_distance_matrix_series_array(self, X):
+        '''
+        Parallel computation of the distance matrix with DTW, for an array of series.
+        '''
+        return self.compute_distance_matrix_parallel(X)
+
     def compute_distance_matrix_sptr(self, spatio_temporal_region):
         '''
         Parallel computation of the distance matrix with DTW
         '''
+        return self.compute_distance_matrix_parallel(spatio_temporal_region)
 
-        # _, x_len, y_len = spatio_temporal_region.shape
-        # sptr_2d = spatio_temporal_region.as_2d
-        # shape_2d = (x_len * y_len, x_len * y_len)
-        inter_points_op = parallel_util.InterPointsOperation(self.num_proc, spatio_temporal_region)
-        distance_matrix = inter_points_op.operate(dtw_i_j)
-
-        # complete matrix to reflect both sides
-        distance_matrix = distance_matrix + np.transpose(distance_matrix)
-        return distance_matrix
+    def compute_condensed_rows(self, series_2d, row_start=0, row_end=None):
+        '''
+        Computes the condensed distances of the rows in [row_start, row_end), by default all
+        the rows, in blocks of rows, one block per worker task.
+        '''
+        # tslearn compiles DTW the first time it is called, do it here once so that the forked
+        # workers inherit the compiled function instead of compiling it in each process
+        self.distance_measure.measure(np.zeros(2), np.zeros(2))
 
+        inter_points_op = parallel_util.InterPointsOperation(self.num_proc, series_2d)
+        block_task = functools.partial(dtw_row_block, self.distance_measure)
+        return inter_points_op.operate(block_task, row_start, row_end)
 
-def dtw_i_j(spt_region, k1, k2):
+    def compute_distance_matrix_parallel(self, temporal_data):
+        '''
+        Computes the upper triangle of the distance matrix in parallel, then expands it into
+        the full matrix.
+        '''
+        condensed = self.compute_condensed_rows(temporal_data)
 
-    if k1 <= k2:
-        # since distance_matrix is triangular and the diag is zero,
-        # we don't need all values, store 0
-        return 0
-    else:
+        # complete matrix to reflect both sides
+        return CondensedDistanceMatrix(condensed).to_dense()
 
-        # print for first time i gets to do work
-        if k1 == k2 + 1:
-            print('k1={}'.format(k1), flush=True)
 
-        # here we calculate DTW
-        sptr_2d = spt_region.as_2d
-        return DistanceByDTW().measure(sptr_2d[k1], sptr_2d[k2])
+def dtw_row_block(distance_dtw, series_2d, row_start, row_end):
+    '''
+    DTW distances (i, j) for each row i in [row_start, row_end) and j > i, in condensed order.
+    '''
+    return distance_dtw.compute_condensed_rows(series_2d, row_start, row_end)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,242 @@
+'''
+Incremental computation of distance matrices.
+
+Computing the DTW distance matrix of a large region may take many hours. DistanceMatrixCheckpoint
+computes the upper triangle in blocks of rows and persists each completed block, so that the
+computation can resume from the last completed block after a crash.
+
+When a region grows, extend_distance_matrix reuses the distances between the points of the
+smaller region, and only computes the distances that involve the new points.
+'''
+
+import numpy as np
+import os
+
+from spta.util import log as log_util
+
+from .condensed import CondensedDistanceMatrix, condensed_len
+
+
+class DistanceMatrixCheckpoint(log_util.LoggerMixin):
+    '''
+    Computes the condensed distance matrix in blocks of rows, saving the progress to two files:
+
+        <filename>.checkpoint.npy
+            the condensed distances, memory-mapped, filled up to the completed rows.
+
+        <filename>.progress.npy
+            the number of completed rows, the number of series and the length of the series.
+
+    where filename is the expected output of the distance matrix. The progress is only written
+    after the distances of a block have been flushed to disk, so a block is either complete or
+    computed again.
+    '''
+
+    def __init__(self, filename, block_rows=100):
+        super(DistanceMatrixCheckpoint, self).__init__()
+
+        # remove .npy extension, if any
+        base_filename = filename[:-4] if filename.endswith('.npy') else filename
+        self.checkpoint_filename = '{}.checkpoint.npy'.format(base_filename)
+        self.progress_filename = '{}.progress.npy'.format(base_filename)
+
+        self.block_rows = block_rows
+
+    def compute(self, distance_measure, temporal_data):
+        '''
+        Computes the distance matrix for temporal data (an array of series or a spatio-temporal
+        region), resuming from the checkpoint if available. The distance measure computes each
+        block with compute_condensed_rows.
+
+        Returns the complete matrix as a CondensedDistanceMatrix.
+        '''
+        if temporal_data.ndim == 3:
+            # spatio-temporal region, the points are the series
+            series_2d = temporal_data.as_2d
+        else:
+            series_2d = np.asarray(temporal_data)
+
+        # the last row has no distances
+        series_n = len(series_2d)
+        condensed = self.compute_rows(distance_measure, series_2d, series_n - 1)
+
+        # read the distances in memory, the checkpoint can be removed afterwards
+        return CondensedDistanceMatrix(np.array(condensed), series_n)
+
+    def compute_rows(self, distance_measure, series_2d, rows):
+        '''
+        Computes the first rows of the condensed distance matrix of an array of series
+        (series_n, series_len), resuming from the checkpoint if available.
+
+        Returns the memory-mapped checkpoint array, with the distances (i, j) for each i < rows
+        and j > i.
+        '''
+        (series_n, series_len) = series_2d.shape
+        (condensed, rows_done) = self.open(series_n, series_len, rows)
+
+        for row_start in range(rows_done, rows, self.block_rows):
+            row_end = min(row_start + self.block_rows, rows)
+
+            # the rows of a block are contiguous in the condensed matrix
+            block_start = condensed_len(series_n) - condensed_len(series_n - row_start)
+            block_end = condensed_len(series_n) - condensed_len(series_n - row_end)
+            condensed[block_start:block_end] = \
+                distance_measure.compute_condensed_rows(series_2d, row_start, row_end)
+
+            # distances first, then the progress
+            condensed.flush()
+            self.save_progress(row_end, series_n, series_len, rows)
+
+            log_msg = 'Checkpoint: {}/{} rows in {}'
+            self.logger.info(log_msg.format(row_end, rows, self.checkpoint_filename))
+
+        return condensed
+
+    def open(self, series_n, series_len, rows=None):
+        '''
+        Opens the checkpoint file, creating it if it does not exist or if it belongs to data with
+        a different shape. Returns the memory-mapped condensed array and the completed rows.
+
+        By default, all the rows of the condensed matrix are stored.
+        '''
+        if rows is None:
+            rows = series_n - 1
+
+        if os.path.isfile(self.checkpoint_filename) and os.path.isfile(self.progress_filename):
+            progress = np.load(self.progress_filename)
+            (rows_done, saved_n, saved_len) = progress[:3]
+
+            # older checkpoints always have all the rows
+            saved_rows = progress[3] if len(progress) > 3 else saved_n - 1
+
+            if (saved_n, saved_len, saved_rows) == (series_n, series_len, rows):
+                log_msg = 'Resuming from checkpoint {} at row {}'
+                self.logger.info(log_msg.format(self.checkpoint_filename, rows_done))
+                condensed = np.load(self.checkpoint_filename, mmap_mode='r+')
+                return (condensed, int(rows_done))
+
+            log_msg = 'Ignoring checkpoint {}: expected {} rows of {} series of length {}, ' \
+                'got {} rows of {} of {}'
+            self.logger.warning(log_msg.format(self.checkpoint_filename, rows, series_n,
+                                               series_len, saved_rows, saved_n, saved_len))
+
+        condensed_size = condensed_len(series_n) - condensed_len(series_n - rows)
+        condensed = np.lib.format.open_memmap(self.checkpoint_filename, mode='w+',
+                                              dtype=np.float64, shape=(condensed_size,))
+        self.save_progress(0, series_n, series_len, rows)
+        return (condensed, 0)
+
+    def save_progress(self, rows_done, series_n, series_len, rows):
+        '''
+        Replaces the progress file, a partially written file is never read.
+        '''
+        temp_filename = '{}.tmp.npy'.format(self.progress_filename[:-4])
+        np.save(temp_filename, np.array([rows_done, series_n, series_len, rows]))
+        os.replace(temp_filename, self.progress_filename)
+
+    def remove(self):
+        '''
+        Removes the checkpoint files, e.g. after the complete matrix has been saved.
+        '''
+        for filename in (self.checkpoint_filename, self.progress_filename):
+            if os.path.isfile(filename):
+                os.remove(filename)
+
+
+def extend_distance_matrix(distance_measure, distance_matrix, region, spt_region, new_region,
+                           checkpoint=None, dtype=np.float64):
+    '''
+    Given the distance matrix of a region, computes the distance matrix of a larger region that
+    contains it. Only the distances that involve the new points are computed.
+
+    The new points are placed first, so that the distances that involve them are the first
+    rows of the condensed matrix. These rows are computed in blocks with compute_condensed_rows
+    (e.g. in parallel), and saved to the checkpoint if given.
+
+    distance_measure
+        used to compute the new distances with compute_condensed_rows.
+
+    distance_matrix
+        dense or condensed distance matrix of the smaller region.
+
+    region
+        the smaller Region, in absolute coordinates.
+
+    spt_region
+        the spatio-temporal region of the larger region.
+
+    new_region
+        the larger Region, in absolute coordinates.
+
+    checkpoint
+        a DistanceMatrixCheckpoint for the new rows, the extension can be resumed.
+
+    dtype
+        the type of the distances in the output.
+
+    Returns the condensed distance matrix of the larger region.
+    '''
+    logger = log_util.logger_for_me(extend_distance_matrix)
+
+    contained = new_region.x1 <= region.x1 and region.x2 <= new_region.x2 and \
+        new_region.y1 <= region.y1 and region.y2 <= new_region.y2
+    if not contained:
+        raise ValueError('Region {} is not contained in {}'.format(region, new_region))
+
+    (_, x_len, y_len) = spt_region.shape
+    if (x_len, y_len) != (new_region.x2 - new_region.x1, new_region.y2 - new_region.y1):
+        raise ValueError('Spatio-temporal region does not match {}'.format(new_region))
+
+    # indices of the points of the smaller region, in the larger region
+    old_indices = np.array([
+        (x - new_region.x1) * y_len + (y - new_region.y1)
+        for x in range(region.x1, region.x2)
+        for y in range(region.y1, region.y2)
+    ], dtype=np.int64)
+
+    series_n = x_len * y_len
+    is_new = np.ones(series_n, dtype=bool)
+    is_new[old_indices] = False
+    new_indices = np.flatnonzero(is_new)
+    new_n = len(new_indices)
+
+    log_msg = 'Extending distance matrix from {} to {}: {} new points'
+    logger.info(log_msg.format(region, new_region, new_n))
+
+    # the new points first, then the old points
+    order = np.concatenate((new_indices, old_indices))
+    series_2d = spt_region.as_2d[order]
+
+    if checkpoint is not None:
+        new_rows = checkpoint.compute_rows(distance_measure, series_2d, new_n)
+    else:
+        new_rows = distance_measure.compute_condensed_rows(series_2d, 0, new_n)
+
+    # position of each point in the new order, and in the smaller region
+    positions = np.empty(series_n, dtype=np.int64)
+    positions[order] = np.arange(series_n)
+    old_positions = np.full(series_n, -1, dtype=np.int64)
+    old_positions[old_indices] = np.arange(len(old_indices))
+
+    extended_matrix = CondensedDistanceMatrix(np.empty(condensed_len(series_n), dtype=dtype),
+                                              series_n)
+
+    # fill the extended matrix row by row
+    for i in range(0, series_n - 1):
+        j = np.arange(i + 1, series_n)
+        low = np.minimum(positions[i], positions[j])
+        high = np.maximum(positions[i], positions[j])
+
+        # same layout as the condensed matrix, the new rows are its first rows
+        involves_new = low < new_n
+        new_pairs = series_n * low - (low * (low + 1)) // 2 + (high - low - 1)
+
+        distances = np.empty(len(j))
+        distances[involves_new] = new_rows[new_pairs[involves_new]]
+        if not is_new[i]:
+            old_j = old_positions[j[~involves_new]]
+            distances[~involves_new] = distance_matrix[old_positions[i], old_j]
+
+        extended_matrix.condensed[extended_matrix.upper_row_slice(i)] = distances
+
+    return extended_matrix
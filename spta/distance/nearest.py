@@ -0,0 +1,171 @@
+'''
+Nearest neighbor search under DTW, pruned with lower bounds.
+
+Many queries only need the nearest (or k nearest) series, not every distance. Two cheap lower
+bounds of DTW are computed for all candidates at once:
+
+    LB_Kim      the warping path always matches the first and the last samples.
+    LB_Keogh    each sample of the query is matched to a sample of the candidate within the
+                warping radius, so it is at least as far as the envelope of the candidate.
+
+Candidates are visited in increasing order of their lower bound, and the full DTW is only
+computed while the lower bound is smaller than the k-th best distance found so far.
+
+Both bounds are valid for the DTW implemented in tslearn (square root of the sum of squared
+differences along the path).
+'''
+
+import heapq
+import numpy as np
+
+from spta.util import log as log_util
+
+
+def envelope(series_block, radius):
+    '''
+    Lower and upper envelopes of each series in a block (n, series_len), i.e. the minimum and
+    maximum values within [i - radius, i + radius] at each position i.
+    '''
+    series_block = np.asarray(series_block, dtype=np.float64)
+    (_, series_len) = series_block.shape
+
+    if radius >= series_len - 1:
+        # the window is the whole series
+        lower = np.repeat(np.min(series_block, axis=1, keepdims=True), series_len, axis=1)
+        upper = np.repeat(np.max(series_block, axis=1, keepdims=True), series_len, axis=1)
+        return (lower, upper)
+
+    # repeating the first and last values does not change the min/max of the windows
+    padded = np.pad(series_block, ((0, 0), (radius, radius)), mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1, axis=1)
+    return (np.min(windows, axis=2), np.max(windows, axis=2))
+
+
+def lb_kim(query, series_block):
+    '''
+    LB_Kim lower bound (first and last samples) between a query and each series in a block.
+    '''
+    first = np.square(query[0] - series_block[:, 0])
+    if len(query) == 1:
+        return np.sqrt(first)
+
+    last = np.square(query[-1] - series_block[:, -1])
+    return np.sqrt(first + last)
+
+
+def lb_keogh(query, lower, upper):
+    '''
+    LB_Keogh lower bound between a query and each series, given the envelopes of the series
+    (see envelope function).
+    '''
+    above = np.where(query > upper, query - upper, 0)
+    below = np.where(query < lower, lower - query, 0)
+    return np.sqrt(np.sum(np.square(above) + np.square(below), axis=1))
+
+
+class PrunedNearestNeighbors(log_util.LoggerMixin):
+    '''
+    Finds the nearest candidates of query series, skipping the full distance computation of
+    the candidates whose lower bound is already larger than the best distances found.
+
+    The distance measure provides the warping radius with lower_bound_radius(series_len). If
+    it returns None, the measure has no lower bounds and all the distances are computed.
+
+    Counts the number of computed and pruned distances over all the queries.
+    '''
+
+    def __init__(self, distance_measure, candidates):
+        '''
+        candidates
+            array (n, series_len) with the candidate series. Candidates with NaN are never
+            returned as nearest, unless there are not enough valid candidates.
+        '''
+        super(PrunedNearestNeighbors, self).__init__()
+        self.distance_measure = distance_measure
+        self.candidates = np.asarray(candidates, dtype=np.float64)
+
+        (candidate_n, series_len) = self.candidates.shape
+        self.valid = ~np.isnan(self.candidates).any(axis=1)
+
+        # the envelopes only depend on the candidates, compute them once
+        self.radius = None
+        if hasattr(distance_measure, 'lower_bound_radius'):
+            self.radius = distance_measure.lower_bound_radius(series_len)
+
+        if self.radius is not None:
+            (self.lower, self.upper) = envelope(self.candidates, self.radius)
+
+        self.computed = 0
+        self.pruned = 0
+
+    @property
+    def prune_rate(self):
+        '''
+        Fraction of the distances that were not computed, over all the queries so far.
+        '''
+        total = self.computed + self.pruned
+        if total == 0:
+            return 0.0
+        return self.pruned / total
+
+    def lower_bounds(self, query):
+        '''
+        The best available lower bound between the query and each candidate.
+        '''
+        if self.radius is None:
+            return np.zeros(len(self.candidates))
+
+        return np.maximum(lb_kim(query, self.candidates),
+                          lb_keogh(query, self.lower, self.upper))
+
+    def find_nearest(self, query, k=1):
+        '''
+        Finds the k nearest candidates of the query.
+        Returns a tuple (indices, distances), sorted by increasing distance.
+        '''
+        query = np.asarray(query, dtype=np.float64)
+        candidate_n = len(self.candidates)
+
+        if k > candidate_n:
+            raise ValueError('Not enough candidates! k={}, candidates={}'.format(k, candidate_n))
+
+        distances = np.full(candidate_n, np.inf)
+
+        if np.isnan(query).any():
+            # the distance to a series with NaN is NaN, nothing to find
+            self.pruned += candidate_n
+            return (np.arange(k), np.full(k, np.nan))
+
+        # visit the candidates with lowest bounds first, invalid candidates last
+        bounds = self.lower_bounds(query)
+        bounds[~self.valid] = np.inf
+        order = np.argsort(bounds, kind='stable')
+
+        # the k best distances so far, as a max-heap (negative distances)
+        best_heap = []
+        best_k = np.inf
+        for (visited, index) in enumerate(order):
+
+            if bounds[index] > best_k or not self.valid[index]:
+                # sorted by bounds: all remaining candidates can be skipped
+                # (ties are computed, so that the lowest index wins as in np.argmin)
+                self.pruned += candidate_n - visited
+                break
+
+            distances[index] = self.distance_measure.measure(query, self.candidates[index])
+            self.computed += 1
+
+            if len(best_heap) < k:
+                heapq.heappush(best_heap, -distances[index])
+            else:
+                heapq.heappushpop(best_heap, -distances[index])
+
+            if len(best_heap) == k:
+                best_k = -best_heap[0]
+
+        # less than k valid candidates, the rest is NaN
+        nearest = np.argsort(distances, kind='stable')[:k]
+        nearest_distances = distances[nearest]
+        nearest_distances[np.isinf(nearest_distances)] = np.nan
+
+        return (nearest, nearest_distances)
@@ -0,0 +1,150 @@
+'''
+Sparse graph of the neighbors within a radius, for density-based clustering.
+
+Density-based algorithms such as DBSCAN only need the pairs of series that are closer than a
+radius eps, which are usually a small fraction of all the pairs. radius_neighbors_graph stores
+these pairs in a sparse matrix, so that the dense N x N distance matrix is not required.
+
+If the distance matrix is available (possibly memory-mapped or condensed), its rows are read in
+blocks. Otherwise, the distances of the upper triangle are computed for a block of rows at a
+time, and a distance is only computed when its lower bound (see spta.distance.nearest) is not
+larger than eps.
+'''
+
+import numpy as np
+from scipy import sparse
+
+from spta.util import log as log_util
+
+from .nearest import envelope, lb_keogh, lb_kim
+
+
+def radius_neighbors_graph(series_2d, eps, distance_measure, block_rows=100):
+    '''
+    Sparse symmetric matrix (N, N) in CSR format with the distances between each pair of series
+    that are at most eps apart. The diagonal is not stored. Series with NaN have no neighbors.
+
+    series_2d
+        array (N, series_len) with the series, used when the distance matrix is not available.
+
+    distance_measure
+        if its distance_matrix is available, the distances are read from the matrix.
+    '''
+    logger = log_util.logger_for_me(radius_neighbors_graph)
+
+    series_2d = np.asarray(series_2d, dtype=np.float64)
+    series_n = len(series_2d)
+
+    if distance_measure.distance_matrix is not None:
+        (rows, cols, distances) = neighbors_from_matrix(distance_measure.distance_matrix,
+                                                        series_n, eps, block_rows)
+    else:
+        (rows, cols, distances, pruned) = neighbors_from_series(series_2d, eps,
+                                                                distance_measure, block_rows)
+        log_msg = 'Radius neighbors: {} of {} distances pruned by lower bounds'
+        logger.debug(log_msg.format(pruned, series_n * (series_n - 1) // 2))
+
+    # explicit zeros are kept, two identical series are still neighbors
+    graph = sparse.csr_matrix((distances, (rows, cols)), shape=(series_n, series_n))
+
+    log_msg = 'Radius neighbors graph with eps={:g}: {} pairs for {} series'
+    logger.info(log_msg.format(eps, len(distances) // 2, series_n))
+
+    return graph
+
+
+def neighbors_from_matrix(distance_matrix, series_n, eps, block_rows=100):
+    '''
+    The pairs (rows, cols, distances) of the neighbors within eps, read from the distance
+    matrix in blocks of rows. Both (i, j) and (j, i) are included.
+    '''
+    all_indices = np.arange(series_n)
+    (rows, cols, distances) = ([], [], [])
+
+    for row_start in range(0, series_n, block_rows):
+        row_end = min(row_start + block_rows, series_n)
+        block_indices = all_indices[row_start:row_end]
+
+        # works with dense, memory-mapped and condensed matrices
+        block = np.asarray(distance_matrix[block_indices[:, np.newaxis],
+                                           all_indices[np.newaxis, :]])
+
+        # NaN is never within eps
+        with np.errstate(invalid='ignore'):
+            within = block <= eps
+        within[np.arange(len(block_indices)), block_indices] = False
+
+        (block_rows_found, cols_found) = np.nonzero(within)
+        rows.append(block_indices[block_rows_found])
+        cols.append(cols_found)
+        distances.append(block[block_rows_found, cols_found])
+
+    return (np.concatenate(rows), np.concatenate(cols), np.concatenate(distances))
+
+
+def neighbors_from_series(series_2d, eps, distance_measure, block_rows=100):
+    '''
+    The pairs (rows, cols, distances) of the neighbors within eps, computed from the series.
+    Only the upper triangle is computed, then mirrored. Also returns the number of pruned
+    distances.
+
+    The distance measure provides the warping radius with lower_bound_radius(series_len), if it
+    returns None then all the distances of the upper triangle are computed.
+    '''
+    logger = log_util.logger_for_me(neighbors_from_series)
+
+    (series_n, series_len) = series_2d.shape
+    valid = ~np.isnan(series_2d).any(axis=1)
+
+    radius = None
+    if hasattr(distance_measure, 'lower_bound_radius'):
+        radius = distance_measure.lower_bound_radius(series_len)
+
+    if radius is not None:
+        (lower, upper) = envelope(series_2d, radius)
+
+    (rows, cols, distances) = ([], [], [])
+    pruned = 0
+
+    for row_start in range(0, series_n - 1, block_rows):
+        row_end = min(row_start + block_rows, series_n - 1)
+
+        for i in range(row_start, row_end):
+            if not valid[i]:
+                continue
+
+            # candidates of the upper triangle, without NaN
+            candidates = np.arange(i + 1, series_n)
+            candidates = candidates[valid[candidates]]
+
+            if radius is not None:
+                query = series_2d[i]
+                bounds = np.maximum(lb_kim(query, series_2d[candidates]),
+                                    lb_keogh(query, lower[candidates], upper[candidates]))
+                pruned += np.count_nonzero(bounds > eps)
+                candidates = candidates[bounds <= eps]
+
+            if len(candidates) == 0:
+                continue
+
+            candidate_distances = \
+                distance_measure.compute_distances_to_a_series(series_2d[i],
+                                                               series_2d[candidates])
+            within = candidate_distances <= eps
+
+            rows.append(np.full(np.count_nonzero(within), i))
+            cols.append(candidates[within])
+            distances.append(candidate_distances[within])
+
+        logger.debug('Radius neighbors: {}/{} rows'.format(row_end, series_n - 1))
+
+    if len(rows) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return (empty, empty, np.zeros(0), pruned)
+
+    (rows, cols, distances) = (np.concatenate(rows), np.concatenate(cols),
+                               np.concatenate(distances))
+
+    # the graph is symmetric
+    return (np.concatenate((rows, cols)), np.concatenate((cols, rows)),
+            np.concatenate((distances, distances)), pruned)
@@ -0,0 +1,266 @@
+'''
+Sampling-based variants of k-medoids, for regions where the full distance matrix is too large.
+
+CLARA (Kaufman and Rousseeuw, 1990)
+    runs k-medoids on several random samples of the points, the medoids of each sample are
+    evaluated against all the points and the best medoids are kept.
+
+CLARANS (Ng and Han, 2002)
+    a randomized search over the medoids: a random swap of a medoid with a non-medoid is
+    accepted if it reduces the total cost, the search stops at a local minimum after a number of
+    consecutive swaps without improvement.
+
+Both only require the distances between all the points and some points (the medoids and the
+candidates), which are computed on demand if the distance matrix is not available. The results
+are instances of KmedoidsResult, where mode is 'clara' or 'clarans'.
+
+Series with NaN are never chosen as medoids and are not counted in the costs, they are still
+labeled with the nearest medoid (the first one if all the distances are NaN).
+'''
+
+import copy
+import numpy as np
+import time
+
+from spta.distance.condensed import CondensedDistanceMatrix
+from spta.util import log as log_util
+
+from .kmedoids import KmedoidsResult, NearestMedoids, run_kmedoids, show_report
+from .kmedoids import _get_candidate_distances
+
+
+def default_sample_size(k):
+    '''
+    The sample size suggested by Kaufman and Rousseeuw.
+    '''
+    return 40 + 2 * k
+
+
+def default_max_neighbor(k, n_samples):
+    '''
+    The number of consecutive neighbors examined by CLARANS, suggested by Ng and Han.
+    '''
+    return max(250, int(0.0125 * k * (n_samples - k)))
+
+
+class MedoidDistances(object):
+    '''
+    Distances between all the points and some points of interest (e.g. medoids), computed on
+    demand and kept for reuse. Uses the distance matrix, if available.
+    '''
+
+    def __init__(self, X, distance_measure):
+        self.X = X
+        self.distance_measure = distance_measure
+        self.rows = {}
+
+    def row(self, index):
+        if index not in self.rows:
+            self.rows[index] = _get_candidate_distances(self.X, index, self.distance_measure)
+        return self.rows[index]
+
+    def columns(self, medoid_indices):
+        '''
+        The distances between each point and each medoid (N, k).
+        '''
+        return np.array([self.row(index) for index in medoid_indices]).transpose()
+
+
+def valid_points(X):
+    '''
+    Boolean mask of the series without NaN, which can be medoids and are counted in the costs.
+    '''
+    return ~np.isnan(X).any(axis=1)
+
+
+def _get_cost_of_valid_points(dist_mat, valid):
+    '''
+    Same as _get_cost_from_distances, but NaN distances are considered infinite and the points
+    that are not valid are not counted in the costs.
+    '''
+    (n_samples, k) = dist_mat.shape
+    dist_mat = np.where(np.isnan(dist_mat), np.inf, dist_mat)
+    labels = np.argmin(dist_mat, axis=1)
+
+    nearest_distances = dist_mat[np.arange(n_samples), labels]
+    costs = np.bincount(labels[valid], weights=nearest_distances[valid], minlength=k)
+
+    return labels, costs, np.sum(costs)
+
+
+def sample_distance_matrix(X, sample_indices, distance_measure):
+    '''
+    The distance matrix between the points of a sample, taken from the distance matrix if it has
+    been precomputed.
+    '''
+    if hasattr(distance_measure, 'distance_matrix') \
+            and distance_measure.distance_matrix is not None:
+        distance_matrix = distance_measure.distance_matrix
+        return np.array(distance_matrix[sample_indices[:, np.newaxis],
+                                        sample_indices[np.newaxis, :]])
+
+    sample_n = len(sample_indices)
+    condensed = distance_measure.compute_condensed_rows(X[sample_indices], 0, sample_n)
+    return CondensedDistanceMatrix(condensed, sample_n).to_dense()
+
+
+def run_clara(X, k, distance_measure, num_samples=5, sample_size=None, random_seed=1,
+              max_iter=1000, tol=0.001, verbose=True):
+    '''
+    Runs CLARA on an array of series (N, series_len), see module documentation.
+
+    num_samples
+        the number of random samples, each sample includes the best medoids so far.
+
+    sample_size
+        the number of points in each sample, by default 40 + 2k.
+    '''
+    logger = log_util.logger_for_me(run_clara)
+    start_time = time.time()
+
+    valid = valid_points(X)
+    valid_indices = np.flatnonzero(valid)
+
+    # the samples only include points without NaN
+    if sample_size is None:
+        sample_size = default_sample_size(k)
+    sample_size = min(sample_size, len(valid_indices))
+
+    if sample_size < k:
+        raise ValueError('Not enough points for k={}: {}'.format(k, sample_size))
+
+    random_state = np.random.RandomState(random_seed)
+    medoid_distances = MedoidDistances(X, distance_measure)
+
+    best_medoid_indices = None
+    best_cost = np.inf
+
+    for sample_index in range(0, num_samples):
+
+        # the sample includes the best medoids so far, which are the initial medoids
+        if best_medoid_indices is None:
+            sample_indices = random_state.choice(valid_indices, size=sample_size, replace=False)
+            initial_medoids = None
+        else:
+            others = np.setdiff1d(valid_indices, best_medoid_indices)
+            others = random_state.choice(others, size=sample_size - k, replace=False)
+            sample_indices = np.concatenate((best_medoid_indices, others))
+            initial_medoids = list(range(0, k))
+
+        sample_indices = np.array(sample_indices, dtype=np.int64)
+
+        # k-medoids on the sample, with the distance matrix of the sample
+        sample_measure = copy.copy(distance_measure)
+        sample_measure.distance_matrix = sample_distance_matrix(X, sample_indices,
+                                                                distance_measure)
+        sample_result = run_kmedoids(X[sample_indices], k, sample_measure,
+                                     initial_medoids=initial_medoids, random_seed=random_seed,
+                                     mode='lite', max_iter=max_iter, tol=tol, verbose=False)
+
+        # evaluate the medoids of the sample with all the points
+        medoid_indices = sample_indices[sample_result.medoids]
+        (_, _, total_cost) = \
+            _get_cost_of_valid_points(medoid_distances.columns(medoid_indices), valid)
+
+        log_msg = 'CLARA sample {}: medoids {}, cost {:.3f}'
+        logger.debug(log_msg.format(sample_index, medoid_indices, total_cost))
+
+        # the first sample is always kept, in case the cost is not finite
+        if best_medoid_indices is None or total_cost < best_cost:
+            best_medoid_indices = medoid_indices
+            best_cost = total_cost
+
+    dist_mat = medoid_distances.columns(best_medoid_indices)
+    (labels, costs, total_cost) = _get_cost_of_valid_points(dist_mat, valid)
+
+    result = KmedoidsResult(k, random_seed, 'clara', list(best_medoid_indices), labels, costs,
+                            total_cost, dist_mat)
+
+    if verbose:
+        show_report(result, time.time() - start_time)
+
+    return result
+
+
+def run_clarans(X, k, distance_measure, num_local=2, max_neighbor=None, random_seed=1,
+                tol=0.001, verbose=True):
+    '''
+    Runs CLARANS on an array of series (N, series_len), see module documentation.
+
+    num_local
+        the number of local minima to find, each one starts from random medoids.
+
+    max_neighbor
+        the number of consecutive random swaps without improvement that indicates a local
+        minimum, by default max(250, 1.25% of k(N - k)).
+    '''
+    logger = log_util.logger_for_me(run_clarans)
+    start_time = time.time()
+
+    n_samples = len(X)
+    valid = valid_points(X)
+    valid_indices = np.flatnonzero(valid)
+
+    if len(valid_indices) <= k:
+        raise ValueError('Not enough points for k={}: {}'.format(k, len(valid_indices)))
+
+    if max_neighbor is None:
+        max_neighbor = default_max_neighbor(k, n_samples)
+
+    random_state = np.random.RandomState(random_seed)
+    medoid_distances = MedoidDistances(X, distance_measure)
+
+    best_medoid_indices = None
+    best_dist_mat = None
+    best_cost = np.inf
+
+    for local_index in range(0, num_local):
+
+        medoid_indices = random_state.choice(valid_indices, size=k, replace=False)
+        dist_mat = medoid_distances.columns(medoid_indices)
+        (_, _, current_cost) = _get_cost_of_valid_points(dist_mat, valid)
+
+        # the cost of a swap only considers the valid points
+        nearest_medoids = NearestMedoids(dist_mat[valid])
+
+        neighbor_count = 0
+        while neighbor_count < max_neighbor:
+
+            # a random neighbor: replace a random medoid with a random non-medoid
+            j = random_state.randint(k)
+            candidate = random_state.randint(n_samples)
+            if candidate in medoid_indices or not valid[candidate]:
+                continue
+
+            # the candidate distances are not kept, most candidates are rejected
+            candidate_distances = _get_candidate_distances(X, candidate, distance_measure)
+            delta_cost = nearest_medoids.swap_delta(j, candidate_distances[valid])
+
+            if -delta_cost > tol:
+                # move to the neighbor
+                medoid_indices[j] = candidate
+                dist_mat[:, j] = candidate_distances
+                nearest_medoids.update(dist_mat[valid])
+                current_cost += delta_cost
+                neighbor_count = 0
+            else:
+                neighbor_count += 1
+
+        log_msg = 'CLARANS local minimum {}: medoids {}, cost {:.3f}'
+        logger.debug(log_msg.format(local_index, medoid_indices, current_cost))
+
+        # the first local minimum is always kept, in case the cost is not finite
+        if best_medoid_indices is None or current_cost < best_cost:
+            best_medoid_indices = list(medoid_indices)
+            best_dist_mat = dist_mat
+            best_cost = current_cost
+
+    (labels, costs, total_cost) = _get_cost_of_valid_points(best_dist_mat, valid)
+
+    result = KmedoidsResult(k, random_seed, 'clarans', best_medoid_indices, labels, costs,
+                            total_cost, best_dist_mat)
+
+    if verbose:
+        show_report(result, time.time() - start_time)
+
+    return result
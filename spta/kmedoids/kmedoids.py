@@ -6,12 +6,12 @@ and https://towardsdatascience.com/k-medoids-clustering-on-iris-data-set-1931bf7
 
 import logging
 import numpy as np
-from copy import deepcopy
 from collections import namedtuple
 from numpy.random import choice, seed
 import time
 
 from spta.distance.dtw import DistanceByDTW
+from spta.distance.nearest import PrunedNearestNeighbors
 
 from . import Medoid, get_medoid_indices
 
@@ -45,58 +45,188 @@ def choose_initial_medoids(X, k, random_seed, initial_indices=None):
     return medoids
 
 
-def _get_cost(X, medoids, distance_measure):
-    '''return total cost and cost of each cluster'''
+def _get_medoid_distances(X, medoids, distance_measure):
+    '''
+    Computes all the distances between each point and each medoid.
+    '''
+    dist_mat = np.zeros((len(X), len(medoids)))
+
+    for j in range(0, len(medoids)):
+        dist_mat[:, j] = distance_measure.compute_distances_to_a_series(medoids[j].series, X)
+
+        # a medoid is at zero distance of itself
+        dist_mat[medoids[j].index, j] = 0.
+
+    return dist_mat
+
+
+def _get_nearest_medoid_distances(X, medoids, distance_measure, dist_mat=None,
+                                  point_indices=None):
+    '''
+    Computes the distances between each point and its nearest and second nearest medoids, which
+    is enough for NearestMedoids. Other distances that were pruned by the lower bounds are inf,
+    see PrunedNearestNeighbors.
 
+    If dist_mat is given, only the rows of point_indices are completed, known distances are kept.
+    '''
     k = len(medoids)
-    dist_mat = np.zeros((len(X), k))
+    if dist_mat is None:
+        dist_mat = np.full((len(X), k), np.inf)
+        point_indices = range(len(X))
+
+    medoid_series = np.array([medoid.series for medoid in medoids])
+    nearest_neighbors = PrunedNearestNeighbors(distance_measure, medoid_series)
+
+    for i in point_indices:
+        (nearest_indices, nearest_distances) = nearest_neighbors.find_nearest(X[i, :],
+                                                                             k=min(k, 2))
+        dist_mat[i, nearest_indices] = nearest_distances
+
+    # a medoid is at zero distance of itself
+    for j in range(0, k):
+        dist_mat[medoids[j].index, j] = 0.
+
+    logger.debug('Nearest medoid prune rate: {:.2f}'.format(nearest_neighbors.prune_rate))
+    return dist_mat
+
 
-    # check if the distance matrix has been precomputed
+def _complete_medoid_distances(X, medoids, distance_measure, dist_mat):
+    '''
+    Computes the distances that were pruned (inf) in the distances between each point and each
+    medoid, in place.
+    '''
+    for j in range(0, len(medoids)):
+        pruned = np.flatnonzero(np.isinf(dist_mat[:, j]))
+        if len(pruned) > 0:
+            dist_mat[pruned, j] = \
+                distance_measure.compute_distances_to_a_series(medoids[j].series, X[pruned])
+
+    return dist_mat
+
+
+def _get_all_medoid_distances(X, medoids, distance_measure):
+    '''
+    The distances between each point and each medoid (N, k), taken from the distance matrix if
+    it has been precomputed.
+    '''
     if hasattr(distance_measure, 'distance_matrix') \
             and distance_measure.distance_matrix is not None:
-
-        # reuse data from the complete distance matrix
-        # we need the distances between each point in the region and each medoid
-        # easiest way to get this is to get the distances at the medoids and transpose it
         medoid_indices = get_medoid_indices(medoids)
-        dist_mat_tr = distance_measure.distance_matrix[medoid_indices, :]
-        dist_mat = dist_mat_tr.transpose()
+        return np.array(distance_measure.distance_matrix[medoid_indices, :]).transpose()
+
+    return _get_medoid_distances(X, medoids, distance_measure)
+
 
+def _get_candidate_distances(X, index, distance_measure):
+    '''
+    The distances between each point and the candidate medoid at the index.
+    '''
+    if hasattr(distance_measure, 'distance_matrix') \
+            and distance_measure.distance_matrix is not None:
+        candidate_distances = np.array(distance_measure.distance_matrix[index], dtype=np.float64)
     else:
-        # compute distance (sub)matrix for the medoids
-        dist_mat = np.zeros((len(X), k))
+        candidate_distances = distance_measure.compute_distances_to_a_series(X[index], X)
 
-        # iterate clusters
-        for j in range(0, k):
-            medoid_j = medoids[j]
-
-            # iterate all points, and calculate the distance between each point and the medoid
-            # of the current cluster
-            for i in range(len(X)):
-                if i == medoid_j.index:
-                    dist_mat[i, j] = 0.
-                else:
-                    dist_mat[i, j] = distance_measure.measure(X[i, :], medoid_j.series)
-
-    # this will find, for each point, the index that minimizes the distance of that point
-    # to a medoid (1-d array, length same as X)
-    # this effectively represents the membership of each point to a cluster
+    # a medoid is at zero distance of itself
+    candidate_distances[index] = 0.
+    return candidate_distances
+
+
+def _get_cost_from_distances(dist_mat):
+    '''
+    Given all the distances between each point and each medoid, assigns each point to its
+    nearest medoid. Returns the labels, the cost of each cluster and the total cost.
+    '''
+    (n_samples, k) = dist_mat.shape
     labels = np.argmin(dist_mat, axis=1)
 
-    # calculate intra-cluster cost for each cluster
-    costs = np.zeros(k)
-    for i in range(0, k):
-        # the cost is the distance from each point to its cluster, use the label to find the
-        # points in a cluster
-        members_in_cluster_i = np.where(labels == i)
-        costs[i] = np.sum(dist_mat[members_in_cluster_i, i])
+    # the cost of each cluster is the sum of the distances of its members to the medoid
+    nearest_distances = dist_mat[np.arange(n_samples), labels]
+    costs = np.bincount(labels, weights=nearest_distances, minlength=k)
+
+    return labels, costs, np.sum(costs)
+
+
+class NearestMedoids(object):
+    '''
+    Keeps, for each point, the distance to its nearest medoid and to its second nearest medoid.
+    With these distances, the change in the total cost of replacing a medoid with a candidate
+    is computed in O(N), without assigning the points again (see FastPAM1 in Schubert and
+    Rousseeuw, "Faster k-Medoids Clustering", 2019).
+    '''
+
+    def __init__(self, dist_mat):
+        self.update(dist_mat)
+
+    def update(self, dist_mat):
+        '''
+        Recompute the nearest medoids given all the distances (N, k), e.g. after a swap.
+        '''
+        (n_samples, k) = dist_mat.shape
+        self.labels = np.argmin(dist_mat, axis=1)
+        self.nearest = dist_mat[np.arange(n_samples), self.labels]
+
+        if k == 1:
+            # removing the only medoid leaves the candidate as the only medoid
+            self.second_nearest = np.full(n_samples, np.inf)
+        else:
+            self.second_nearest = np.partition(dist_mat, 1, axis=1)[:, 1]
+
+    def swap_delta(self, j, candidate_distances):
+        '''
+        The change in the total cost if the medoid of cluster j is replaced by a candidate,
+        given the distances between each point and the candidate. Negative is better.
+        '''
+        # the members of cluster j move to the candidate or to their second nearest medoid,
+        # other points move to the candidate only if it is nearer than their medoid
+        without_medoid_j = np.where(self.labels == j, self.second_nearest, self.nearest)
+        new_nearest = np.minimum(without_medoid_j, candidate_distances)
+        return np.sum(new_nearest - self.nearest)
+
+
+def add_medoid_greedy(X, medoid_indices, distance_measure, random_seed=1, block_rows=500):
+    '''
+    Chooses an additional medoid given the current medoids, e.g. to warm-start k-medoids for k+1
+    with the medoids found for k. Returns the list of medoid indices with the new medoid last.
+
+    With a distance matrix, the new medoid is the point that reduces the total cost the most
+    (BUILD step of PAM), evaluated in blocks of block_rows candidates. Otherwise, the new medoid
+    is sampled with probability proportional to the squared distance to the nearest medoid
+    (k-means++ seeding), which only requires the distances to the current medoids.
+    '''
+    medoid_indices = list(medoid_indices)
+    medoids = [Medoid(index, X[index]) for index in medoid_indices]
+    nearest = np.min(_get_all_medoid_distances(X, medoids, distance_measure), axis=1)
 
-    # total_cost = distance_measure.combine(costs)
+    if hasattr(distance_measure, 'distance_matrix') \
+            and distance_measure.distance_matrix is not None:
 
-    # compute the total cost, sum of each intra-cluster cost
-    total_cost = np.sum(costs)
+        n_samples = len(X)
+        total_costs = np.empty(n_samples)
+        for block_start in range(0, n_samples, block_rows):
+            block_end = min(block_start + block_rows, n_samples)
+            block_indices = np.arange(block_start, block_end)
+            block_distances = np.array(distance_measure.distance_matrix[block_indices, :])
 
-    return labels, costs, total_cost, dist_mat
+            # total cost if each candidate of the block is added (NaN distances are ignored)
+            total_costs[block_start:block_end] = \
+                np.nansum(np.fmin(block_distances, nearest), axis=1)
+
+        total_costs[medoid_indices] = np.inf
+        new_medoid = int(np.argmin(total_costs))
+
+    else:
+        weights = np.nan_to_num(np.square(nearest))
+        weights[medoid_indices] = 0
+        if np.sum(weights) == 0:
+            # all the points are at zero distance of the medoids
+            weights = np.ones(len(X))
+            weights[medoid_indices] = 0
+        random_state = np.random.RandomState(random_seed)
+        new_medoid = int(random_state.choice(len(X), p=weights / np.sum(weights)))
+
+    logger.debug('Adding medoid {} to {}'.format(new_medoid, medoid_indices))
+    return medoid_indices + [new_medoid]
 
 
 def candidate_generator_for_lite_kmedoids(n_samples, labels, cluster_label):
@@ -129,7 +259,17 @@ def run_kmedoids(X, k, distance_measure, initial_medoids=None, random_seed=1, mo
     medoids = choose_initial_medoids(X, k, random_seed, initial_medoids)
 
     # assign initial members
-    labels, costs, tot_cost, dist_mat = _get_cost(X, medoids, distance_measure)
+    # the distances to the nearest and second nearest medoids are kept, so that the cost of a
+    # swap can be computed incrementally, see NearestMedoids
+    has_distance_matrix = hasattr(distance_measure, 'distance_matrix') \
+        and distance_measure.distance_matrix is not None
+    if has_distance_matrix:
+        dist_mat = _get_all_medoid_distances(X, medoids, distance_measure)
+    else:
+        # the other distances are pruned, see _get_nearest_medoid_distances
+        dist_mat = _get_nearest_medoid_distances(X, medoids, distance_measure)
+    labels, costs, tot_cost = _get_cost_from_distances(dist_mat)
+    nearest_medoids = NearestMedoids(dist_mat)
     cc, SWAPPED = 0, True
 
     # robust or lite?
@@ -164,19 +304,25 @@ def run_kmedoids(X, k, distance_measure, initial_medoids=None, random_seed=1, mo
                     continue
 
                 # consider a new medoid for cluster j
-                medoids_ = deepcopy(medoids)
-                medoids_[j] = Medoid(i, X[i])
-
-                # assign members again, considering the new medoid
-                # this gives a new total cost of the cluster
-                labels_, costs_, tot_cost_, dist_mat_ = _get_cost(X, medoids_,
-                                                                  distance_measure)
+                # the change in the total cost only requires the distances to the candidate
+                candidate_distances = _get_candidate_distances(X, i, distance_measure)
+                delta_cost = nearest_medoids.swap_delta(j, candidate_distances)
 
                 # if the total cost has been reduced, then the list of medoids is 'better'
-                # use these new medoids, save new costs
-                if tot_cost - tot_cost_ > tol:
-                    labels, costs, tot_cost, dist_mat = labels_, costs_, tot_cost_, dist_mat_
-                    medoids = medoids_
+                # use these new medoids, assign members again and save new costs
+                if -delta_cost > tol:
+                    # points that had the old medoid as nearest or second nearest may now have
+                    # a pruned distance as second nearest
+                    affected = np.flatnonzero(dist_mat[:, j] <= nearest_medoids.second_nearest)
+
+                    medoids[j] = Medoid(i, X[i])
+                    dist_mat[:, j] = candidate_distances
+                    if not has_distance_matrix and k > 2:
+                        _get_nearest_medoid_distances(X, medoids, distance_measure, dist_mat,
+                                                      affected)
+
+                    labels, costs, tot_cost = _get_cost_from_distances(dist_mat)
+                    nearest_medoids.update(dist_mat)
 
                     # flag that indicates that the algorithm has found new medoids
                     # this means that the algorithm will continue to run
@@ -202,6 +348,10 @@ def run_kmedoids(X, k, distance_measure, initial_medoids=None, random_seed=1, mo
     np.set_printoptions(precision=3)
     logger.debug('Intra-cluster costs: {}'.format(costs))
 
+    if np.isinf(dist_mat).any():
+        # some distances were pruned, but the result includes all the distances to the medoids
+        dist_mat = _complete_medoid_distances(X, medoids, distance_measure, dist_mat)
+
     result = KmedoidsResult(k, random_seed, mode, get_medoid_indices(medoids), labels, costs,
                             tot_cost, dist_mat)
 
@@ -3,19 +3,24 @@ K-Medoids Fuzzy implementation
 Based on http://citeseerx.ist.psu.edu/viewdoc/download?doi=10.1.1.41.2622&rep=rep1&type=pdf
 and https://github.com/shenxudeu/K_Medoids/blob/master/k_medoids.py
 
+Series with NaN are never medoids and do not contribute to the memberships or the costs while
+the medoids are searched. At the end, each one gets full membership to its nearest medoid (the
+first cluster if all its distances are NaN).
+
 See also https://www.sciencedirect.com/science/article/pii/S1877050915000940 for silhouette
 '''
 
 import logging
 import numpy as np
-from copy import deepcopy
 from collections import namedtuple
 from numpy.random import choice, seed
+import time
 
-from spta.region.mask import MaskRegionFuzzy
 from spta.distance.dtw import DistanceByDTW
 
 from . import Medoid, get_medoid_indices
+from .kmedoids import _get_all_medoid_distances, _get_candidate_distances
+from .clara import valid_points
 
 logger = logging.getLogger()
 
@@ -35,18 +40,25 @@ class KmedoidsFuzzy(object):
 ''' The parameters for a K-medoids run '''
 KmedoidsFuzzyParams = namedtuple('KmedoidsFuzzyParams', ('k', 'm', 'distance_measure',
                                                          'initial_medoids', 'random_seed',
-                                                         'max_iter', 'tol', 'verbose'))
+                                                         'max_iter', 'tol', 'verbose',
+                                                         'num_candidates'))
 
 ''' A K-mediods fuzzy result '''
 KmedoidsFuzzyResult = namedtuple('KmedoidsFuzzyResult', ('k', 'm', 'random_seed', 'medoids', 'uij',
                                                          'costs', 'total_cost'))
 
+# candidates for the medoid of each cluster when the distance matrix is not available
+DEFAULT_NUM_CANDIDATES = 20
+
 
-def choose_initial_medoids(X, k, random_seed, initial_indices=None):
+def choose_initial_medoids(X, k, random_seed, initial_indices=None, valid_indices=None):
     seed(random_seed)
 
     if not initial_indices:
-        initial_indices = choice(len(X), size=k, replace=False)
+        # only series without NaN, if given
+        if valid_indices is None:
+            valid_indices = len(X)
+        initial_indices = choice(valid_indices, size=k, replace=False)
 
     logger.info('Initial medoids indices: {}'.format(str(initial_indices)))
 
@@ -60,11 +72,11 @@ def choose_initial_medoids(X, k, random_seed, initial_indices=None):
     return medoids
 
 
-def compute_membership_fcm(X, m, medoids, distance_measure, tol):
+def fcm_membership(dist_mat, m):
     '''
-    Given a distance measure and a list of medoids, find the membership of each point.
-    The membership for each point i is a vector u such that uij is the degree of membership of
-    point i to cluster j.
+    Given the distances between each point and each medoid (N, k), find the membership of each
+    point. The membership for each point i is a vector u such that uij is the degree of
+    membership of point i to cluster j.
 
     Using FCM:
 
@@ -73,205 +85,262 @@ def compute_membership_fcm(X, m, medoids, distance_measure, tol):
     This is a probabilistic approach:
 
         uij in [0, 1]
-        0 < sum(uij, j=0, j=k-1) < N for all i
-        sum(uij, i=0, i=n) = 1 for all j
+        sum(uij, j=0, j=k-1) = 1 for all i
+
+    A point at zero distance of a medoid (e.g. the medoid itself) has full membership to that
+    cluster, the membership is shared if the point is at zero distance of many medoids.
+    '''
+    with np.errstate(divide='ignore'):
+        uij = np.power(dist_mat, -1.0 / (m - 1))
+
+    # (1 / 0) is inf, use the zero distances instead
+    at_medoid = dist_mat == 0
+    at_medoid_rows = np.any(at_medoid, axis=1)
+    uij[at_medoid_rows] = at_medoid[at_medoid_rows]
+
+    return uij / np.sum(uij, axis=1, keepdims=True)
+
+
+def fuzzy_costs(uij, m, dist_mat):
+    '''
+    The cost of each cluster: the sum of the distances of the points to the medoid, weighted by
+    the memberships to the power of m. The total cost is the objective of fuzzy k-medoids.
+    '''
+    costs = np.sum(np.power(uij, m) * dist_mat, axis=0)
+    return costs, np.sum(costs)
+
+
+def compute_membership_fcm(X, m, medoids, distance_measure, valid=None):
+    '''
+    Given a distance measure and a list of medoids, find the membership of each point (see
+    fcm_membership) and the cost of each cluster (see fuzzy_costs).
+    Returns the memberships, the costs, the total cost and the distances to the medoids.
+
+    If the mask of valid points is given, see membership_of_valid_points.
+    '''
+    dist_mat = _get_all_medoid_distances(X, medoids, distance_measure)
+    if valid is None:
+        uij = fcm_membership(dist_mat, m)
+        costs, total_cost = fuzzy_costs(uij, m, dist_mat)
+    else:
+        uij, costs, total_cost = membership_of_valid_points(dist_mat, m, valid)
+    return uij, costs, total_cost, dist_mat
+
+
+def membership_of_valid_points(dist_mat, m, valid):
+    '''
+    Same as fcm_membership and fuzzy_costs, but only for the valid points (series without NaN).
+    The other points have zero membership to all the clusters and are not counted in the costs.
+    '''
+    uij = np.zeros(dist_mat.shape)
+    uij[valid] = fcm_membership(dist_mat[valid], m)
+    costs, total_cost = fuzzy_costs(uij[valid], m, dist_mat[valid])
+    return uij, costs, total_cost
 
 
+def assign_invalid_points(uij, dist_mat, valid):
+    '''
+    Gives each point that is not valid full membership to its nearest medoid, NaN distances are
+    considered infinite. Returns a new array of memberships.
     '''
+    invalid_indices = np.flatnonzero(~valid)
+    invalid_distances = dist_mat[invalid_indices]
+    nearest = np.argmin(np.where(np.isnan(invalid_distances), np.inf, invalid_distances), axis=1)
 
-    k = len(medoids)
-    dist_mat = np.zeros((len(X), k))
+    uij = np.array(uij)
+    uij[invalid_indices] = 0
+    uij[invalid_indices, nearest] = 1
+    return uij
 
-    # check if the distance matrix has been precomputed
+
+def _get_candidate_indices(uij, num_candidates):
+    '''
+    The candidates for the medoids: the points with the highest membership to each cluster.
+    '''
+    (n_samples, k) = uij.shape
+    if num_candidates >= n_samples:
+        return np.arange(n_samples)
+
+    top_members = np.argpartition(-uij, num_candidates - 1, axis=0)[:num_candidates]
+    return np.unique(top_members)
+
+
+def _get_candidate_rows(X, candidate_indices, distance_measure):
+    '''
+    The distances between each candidate and each point (n_candidates, N). If the distance
+    matrix is available, its rows are not copied when all the points are candidates.
+    '''
     if hasattr(distance_measure, 'distance_matrix') \
             and distance_measure.distance_matrix is not None:
+        distance_matrix = distance_measure.distance_matrix
+        if len(candidate_indices) == len(X):
+            return distance_matrix
+        return np.array(distance_matrix[candidate_indices])
 
-        # reuse data from the complete distance matrix
-        # we need the distances between each point in the region and each medoid
-        # easiest way to get this is to get the distances at the medoids and transpose it
-        medoid_indices = get_medoid_indices(medoids)
-        dist_mat_tr = distance_measure.distance_matrix[medoid_indices, :]
-        dist_mat = dist_mat_tr.transpose()
+    return np.array([
+        _get_candidate_distances(X, index, distance_measure)
+        for index
+        in candidate_indices
+    ])
 
-    else:
-        # compute distance (sub)matrix for the medoids
-        dist_mat = np.zeros((len(X), k))
-
-        # iterate clusters
-        for i in range(0, k):
-            medoid_i = medoids[i]
-
-            # iterate all points, and calculate the distance between each point and the medoid
-            # of the current cluster
-            for j in range(len(X)):
-                if j == medoid_i.index:
-                    dist_mat[j, i] = 0.
-                else:
-                    dist_mat[j, i] = distance_measure.measure(X[j, :], medoid_i.series)
-
-    uij = np.zeros((len(X), k))
-
-    # the denominator of uij, the end value is the same for all clusters,
-    # so there are len(X) values
-    uij_den = np.zeros((len(X),))
-
-    for i in range(0, k):
-        r_xj_vi = dist_mat[:, i]
-        # print('medoid: {}'.format(medoids[i].index))
-        # print('r_xj_vi for i={}: {}'.format(i, r_xj_vi))
-
-        # (1/r(xj, vi))^(1/m-1)
-        #
-        # use np.power(x1, x2)
-        # x2 are the exponents. If x1.shape != x2.shape, they must be broadcastable to a
-        # common shape (which becomes the shape of the output).
-        uij[:, i] = np.power(1 / r_xj_vi, (1 / (m - 1)))
-        # print('r_xj_vi_pwr', uij[:, i])
-
-        # accumulate the sum in the denominator
-        uij_den += uij[:, i]
-        # print('uij_den', uij_den)
-
-    for i in range(0, k):
-        # divide by the denominator
-        uij[:, i] = uij[:, i] / uij_den
-
-        # special case for medoids (i = medoid index):
-        # uij is (inf / inf) when j is the medoid's cluster, 0 for other clusters
-        # 0 is calculated correctly, but (inf / inf) returns nan.
-        # Here we set that value to 1 to indicate that the medoid has full membership
-        # to its cluster
-        uij[medoids[i].index, i] = 1
-
-    # sanity check: adding all the membership values of a point should return 1 or very close to it
-    np.testing.assert_allclose(np.sum(uij, axis=1), np.ones(len(X)), rtol=tol)
-
-    # compute the cost of each cluster. This is the sum of the weighted distances of each sample
-    # to its corresponding medoid, where the weights are uij
-    fuzzy_costs = np.zeros(k)
-    for i in range(0, k):
-        fuzzy_costs[i] = np.sum(uij[:, i] * dist_mat[:, i])
-    # print('fuzzy costs', fuzzy_costs)
-
-    # compute the total cost, sum of each intra-cluster cost
-    total_cost = np.sum(fuzzy_costs)
-    return uij, fuzzy_costs, total_cost, dist_mat
+
+def _update_medoids(uij, m, candidate_rows):
+    '''
+    Finds the new medoid of each cluster: the candidate that minimizes the sum of its distances
+    to all the points, weighted by the memberships^m. The costs of all the candidates for all
+    the clusters are a single matrix product (k, N) x (N, n_candidates).
+
+    A candidate is the medoid of at most one cluster. Returns the positions of the medoids in
+    the candidates.
+    '''
+    weights = np.power(uij, m)
+    candidate_costs = np.dot(weights.transpose(), np.transpose(candidate_rows))
+
+    # a NaN distance should never make a medoid
+    candidate_costs[np.isnan(candidate_costs)] = np.inf
+
+    k = uij.shape[1]
+    medoid_positions = []
+    for j in range(0, k):
+        candidate_costs[j, medoid_positions] = np.inf
+        medoid_positions.append(int(np.argmin(candidate_costs[j])))
+
+    return medoid_positions
 
 
 def run_kmedoids_fuzzy(X, k, m, distance_measure, initial_medoids=None, random_seed=1,
-                       max_iter=1000, tol=0.001, verbose=True):
-    '''run algorithm return centers, labels, and etc.'''
+                       max_iter=1000, tol=0.001, verbose=True, num_candidates=None):
+    '''
+    Runs fuzzy k-medoids (FCMdd) on an array of series (N, series_len). Each iteration
+    computes the memberships given the medoids, then the medoids that minimize the weighted
+    distances given the memberships. Stops when the medoids do not change or the total cost
+    does not improve more than tol.
+
+    num_candidates
+        the number of points with the highest membership to each cluster that are considered
+        as its next medoid. By default, all the points are candidates if the distance matrix is
+        available, otherwise DEFAULT_NUM_CANDIDATES (linearized FCMdd).
+    '''
+    start_time = time.time()
 
     # initial medoids
     n_samples, n_features = X.shape
-    medoids = choose_initial_medoids(X, k, random_seed, initial_medoids)
+
+    # series with NaN are left out until the end
+    valid = valid_points(X)
+    valid_indices = np.flatnonzero(valid)
+    all_valid = len(valid_indices) == n_samples
+    if len(valid_indices) < k:
+        raise ValueError('Not enough points for k={}: {}'.format(k, len(valid_indices)))
+
+    medoids = choose_initial_medoids(X, k, random_seed, initial_medoids, valid_indices)
+    medoid_indices = get_medoid_indices(medoids)
+
+    if num_candidates is None:
+        num_candidates = DEFAULT_NUM_CANDIDATES
+        if hasattr(distance_measure, 'distance_matrix') \
+                and distance_measure.distance_matrix is not None:
+            num_candidates = n_samples
 
     # assign initial members
-    labels, costs, tot_cost, dist_mat = compute_membership_fcm(X, m, medoids, distance_measure,
-                                                               tol)
-    cc, SWAPPED = 0, True
-
-    while True:
-
-        # at the beginning of this loop, set SWAPPED flag to false
-        # if the flag remains false after iterating all points and clusters,
-        # then medoids provide a local minimum cost, and the algorithm can exit
-        SWAPPED = False
-        medoid_indices = get_medoid_indices(medoids)
-        logger.debug('medoid indices {}'.format(medoid_indices))
-
-        # look for better medoids that reduce the total cost (sum of distances) of the clusters
-        # this implementation looks for a better medoid in all samples, even in other clusters
-        for i in range(0, n_samples):
-
-            # iterate clusters: j from 0 to k
-            for j in range(0, k):
-
-                if i in medoid_indices:
-                    # this sample is already a medoid of a cluster, don't consider it
-                    continue
-
-                # consider a new medoid for cluster j
-                medoids_ = deepcopy(medoids)
-                medoids_[j] = Medoid(i, X[i])
-
-                # assign members again, considering the new medoid
-                # this gives a new total cost of the cluster
-                uij_, costs_, tot_cost_, _ = compute_membership_fcm(X, m, medoids_,
-                                                                    distance_measure, tol)
-
-                # if the total cost has been reduced, then the list of medoids is 'better'
-                # use these new medoids, save new costs
-                if tot_cost - tot_cost_ > tol:
-                    uij, costs, tot_cost, _ = uij_, costs_, tot_cost_, _
-                    medoids = medoids_
-
-                    # flag that indicates that the algorithm has found new medoids
-                    # this means that the algorithm will continue to run
-                    SWAPPED = True
-                    medoid_indices = get_medoid_indices(medoids)
-                    if verbose:
-                        logger.debug('Change medoids to {}'.format(str(medoid_indices)))
-
-        if cc > max_iter:
+    uij, costs, tot_cost, dist_mat = compute_membership_fcm(X, m, medoids, distance_measure,
+                                                            valid)
+
+    for cc in range(0, max_iter):
+
+        # the candidate rows include the distances to the new medoids
+        candidate_indices = _get_candidate_indices(uij, num_candidates)
+        candidate_indices = candidate_indices[valid[candidate_indices]]
+        candidate_rows = _get_candidate_rows(X, candidate_indices, distance_measure)
+
+        if all_valid:
+            medoid_positions = _update_medoids(uij, m, candidate_rows)
+        else:
+            # the invalid points have no weight, but their NaN distances would spread
+            medoid_positions = _update_medoids(uij[valid], m, candidate_rows[:, valid])
+
+        new_medoid_indices = [int(candidate_indices[position]) for position in medoid_positions]
+        if new_medoid_indices == medoid_indices:
             if verbose:
-                logger.info('End Searching by reaching maximum iteration: {}'.format(max_iter))
-                logger.info('Final medoid indices: {}'.format(get_medoid_indices(medoids)))
+                logger.info('End Searching by no swaps')
             break
-        if not SWAPPED:
+
+        new_dist_mat = np.array(candidate_rows[medoid_positions], dtype=np.float64).transpose()
+        (new_uij, new_costs, new_tot_cost) = membership_of_valid_points(new_dist_mat, m, valid)
+
+        if tot_cost - new_tot_cost <= tol:
+            # the new medoids may be worse, if the candidates are restricted
             if verbose:
-                logger.info('End Searching by no swaps')
-                logger.info('Final medoid indices: {}'.format(get_medoid_indices(medoids)))
+                logger.info('End Searching by no improvement')
             break
-        cc += 1
 
-    result = KmedoidsFuzzyResult(k, m, random_seed, get_medoid_indices(medoids), uij, costs,
-                                 tot_cost)
-    show_report(result)
+        medoid_indices = new_medoid_indices
+        uij, costs, tot_cost, dist_mat = new_uij, new_costs, new_tot_cost, new_dist_mat
+        if verbose:
+            logger.debug('Change medoids to {}'.format(str(medoid_indices)))
+
+    else:
+        if verbose:
+            logger.info('End Searching by reaching maximum iteration: {}'.format(max_iter))
+
+    if verbose:
+        logger.info('Final medoid indices: {}'.format(medoid_indices))
+
+    if not all_valid:
+        uij = assign_invalid_points(uij, dist_mat, valid)
+
+    result = KmedoidsFuzzyResult(k, m, random_seed, medoid_indices, uij, costs, tot_cost)
+
+    if verbose:
+        show_report(result, time.time() - start_time)
 
     return result
 
 
-def show_report(result):
+def show_report(result, elapsed_time):
 
     medoids = result.medoids
 
     logger.info('----------------------------')
-    logger.info('K-medoids for k={}, seed={}'.format(result.k, result.random_seed))
+    logger.info('K-medoids fuzzy for k={}, m={}, seed={}'.format(result.k, result.m,
+                                                                 result.random_seed))
     logger.info('----------------------------')
     logger.info('Medoids={}'.format(medoids))
+    logger.info('Sum of intra-cluster costs: {}'.format(result.total_cost))
+    logger.info('Elapsed time: {:.2f}s'.format(elapsed_time))
 
     # total samples
     total_points = result.uij.shape[0]
-    # print(result.uij)
+
+    # with threshold=0, a point belongs to the cluster(s) with the highest membership
+    best_uij = np.max(result.uij, axis=1, keepdims=True)
+    points_per_cluster = np.count_nonzero(result.uij >= best_uij, axis=0)
 
     for i in range(0, result.k):
         # show info per cluster
-
-        # To get number of points of each cluster, create fake fuzzy mask regions (1 x tot_points)
-        mask_region_i = MaskRegionFuzzy.from_uij_and_region(result.uij, 1, total_points,
-                                                            cluster_index=i, threshold=0)
-
-        points_i = mask_region_i.cluster_len
+        points_i = points_per_cluster[i]
         coverage_i = points_i * 100.0 / total_points
         cluster_msg = 'Cluster {}: medoid={}, with threshold=0 -> {} points ({:.1f}%)'
         logger.info(cluster_msg.format(i, medoids[i], points_i, coverage_i))
 
 
 def kmedoids_fuzzy_default_params(k, m=2, distance_measure=DistanceByDTW(), initial_medoids=None,
-                                  random_seed=1, max_iter=1000, tol=0.001, verbose=True):
+                                  random_seed=1, max_iter=1000, tol=0.001, verbose=True,
+                                  num_candidates=None):
     '''
     Default parameters for K-medoids fuzzy. Still needs a value for k.
     '''
     return KmedoidsFuzzyParams(k=k, m=m, distance_measure=distance_measure,
                                initial_medoids=initial_medoids, random_seed=random_seed,
-                               max_iter=max_iter, tol=tol, verbose=verbose)
+                               max_iter=max_iter, tol=tol, verbose=verbose,
+                               num_candidates=num_candidates)
 
 
 def run_kmedoids_fuzzy_from_params(X, kfuzzy_params):
     return run_kmedoids_fuzzy(X, kfuzzy_params.k, kfuzzy_params.m, kfuzzy_params.distance_measure,
                               kfuzzy_params.initial_medoids, kfuzzy_params.random_seed,
-                              kfuzzy_params.max_iter, kfuzzy_params.tol, kfuzzy_params.verbose)
+                              kfuzzy_params.max_iter, kfuzzy_params.tol, kfuzzy_params.verbose,
+                              kfuzzy_params.num_candidates)
 
 
 if __name__ == '__main__':
@@ -82,7 +82,8 @@ class KmedoidsWithSilhouette(object):
         # use pre-computed distance matrix
         distance_measure = self.silhouette_metadata.distance_measure
         distance_measure.load_distance_matrix_2d(self.sptr_metadata.distances_filename,
-                                                 self.sptr_metadata.region)
+                                                 self.sptr_metadata.region,
+                                                 mmap_mode='r')
 
         # perform the analysis
         # this will iterate over given seeds and k values.
@@ -127,7 +128,8 @@ class KmedoidsWithSilhouette(object):
         # use pre-computed distance matrix
         distance_measure = self.silhouette_metadata.distance_measure
         distance_matrix = distance_measure.load_distance_matrix_2d(
-            self.sptr_metadata.distances_filename, self.sptr_metadata.region)
+            self.sptr_metadata.distances_filename, self.sptr_metadata.region,
+            mmap_mode='r')
 
         # work on Point at (0, 0)
         distances_0_0_as_region = SpatialRegion(distance_matrix[0].reshape((x_len, y_len)))
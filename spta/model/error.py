@@ -1,7 +1,9 @@
 '''
 Module to calculate forecasting errors over spatio-temporal regions.
 '''
+import functools
 import numpy as np
+import warnings
 
 from spta.region.spatial import SpatialDecorator
 from spta.region.function import FunctionRegionScalar
@@ -24,6 +26,18 @@ def error_functions():
     }
 
 
+def error_functions_by_point():
+    '''
+    Error functions that compute the errors of all the points at once, given the error function
+    of a single point. An error function without an entry here is evaluated at each point.
+    '''
+    return {
+        error_util.mase: error_util.mase_by_point,
+        error_util.smape: error_util.smape_by_point,
+        error_util.mse: error_util.mse_by_point
+    }
+
+
 def get_error_func(error_type):
     '''
     Choose an error function.
@@ -35,6 +49,14 @@ def get_error_func(error_type):
     return error_functions()[error_type]
 
 
+def get_error_by_point_func(error_type):
+    '''
+    Choose an error function that computes the errors of all the points at once, or None if the
+    error function is only available for a single point.
+    '''
+    return error_functions_by_point().get(get_error_func(error_type), None)
+
+
 class ErrorRegion(SpatialDecorator):
     '''
     A spatial region where each value represents the forecast error of a model.
@@ -99,6 +121,9 @@ class MeasureForecastingError(FunctionRegionScalar):
         super(MeasureForecastingError, self).__init__(observation_region.as_numpy)
         self.error_func = error_func
 
+        # if available, the errors of all the points are computed at once
+        self.error_by_point_func = error_functions_by_point().get(error_func, None)
+
         # save the observation and training regions which are necessary to calculate errors
         # handle descaling here (early) so we don't have to handle at each point
         if observation_region.has_scaling():
@@ -151,9 +176,42 @@ class MeasureForecastingError(FunctionRegionScalar):
             self.logger.debug('About to descale forecast region')
             forecast_region_ok = forecast_region.descale()
 
-        spatial_region = super(MeasureForecastingError, self).apply_to(forecast_region_ok)
+        if self.error_by_point_func is not None:
+            spatial_region = self.apply_by_point(forecast_region_ok)
+        else:
+            spatial_region = super(MeasureForecastingError, self).apply_to(forecast_region_ok)
+
         return ErrorRegion(spatial_region)
 
+    def apply_by_point(self, forecast_region):
+        '''
+        Computes the errors of all the points of the forecast region at once, instead of calling
+        the error function at each point. Only the points of the forecast region are evaluated,
+        e.g. the members of a cluster, the other points have zero error as in apply_to.
+        '''
+        # condition check: the 2D regions should have the same shape
+        assert forecast_region.x_len == self.x_len
+        assert forecast_region.y_len == self.y_len
+
+        # the series of each point as columns (series_len, x_len * y_len)
+        points_n = self.x_len * self.y_len
+        point_indices = forecast_region.all_point_indices
+
+        forecast_np = forecast_region.as_numpy.reshape((-1, points_n))[:, point_indices]
+        observation_np = \
+            self.observation_region.as_numpy.reshape((-1, points_n))[:, point_indices]
+
+        training_np = None
+        if self.training_region is not None:
+            training_np = self.training_region.as_numpy.reshape((-1, points_n))[:, point_indices]
+
+        result_np = np.zeros(points_n, dtype=self.dtype)
+        result_np[point_indices] = self.error_by_point_func(forecast_np, observation_np,
+                                                            training_np)
+
+        # may be polymorphic, e.g. a spatial cluster
+        return forecast_region.new_spatial_region(result_np.reshape((self.x_len, self.y_len)))
+
 
 class OverallErrorForEachForecast(FunctionRegionScalar):
     '''
@@ -181,6 +239,7 @@ class OverallErrorForEachForecast(FunctionRegionScalar):
         super(OverallErrorForEachForecast, self).__init__(observation_region.as_numpy)
 
         # get a function that will calculate the overall error for a given forecast region
+        self.error_type = error_type
         self.overall_error_func = get_overall_error_func(error_type)
 
         # save the observation and training regions which are necessary to calculate errors
@@ -223,16 +282,13 @@ class OverallErrorForEachForecast(FunctionRegionScalar):
 
     def apply_to(self, forecast_region):
         '''
-        Override the default application of this function region, so that it can support
-        parallelism. When using parallelism, function_at will NOT be called!
+        Override the default application of this function region, so that the overall errors of
+        all the forecasts are computed at once, in parallel if parallel_workers is set.
+        function_at is only called for error types without a batched implementation.
         '''
-        if self.parallel_workers:
-            # Parallel implementation: use ParallelForecastError to parallelize the calculation
-            # of ErrorRegions at each point.
-            # notice that we will use one of the top-level functions defined below
-            parallel_error = ParallelForecastError(self.parallel_workers, forecast_region,
-                                                   self.observation_region, self.training_region)
-            spatial_region = parallel_error.operate(self.overall_error_func)
+        if get_error_by_point_func(self.error_type) is not None:
+            # compute the errors of all the forecasts against all the observations at once
+            spatial_region = self.apply_batched(forecast_region)
 
         else:
             # use default serial behavior, which will call function_at(point)
@@ -241,6 +297,133 @@ class OverallErrorForEachForecast(FunctionRegionScalar):
         # this could be an Error Region but no need to get overall_error of overall_errors...
         return spatial_region
 
+    def apply_batched(self, forecast_region):
+        '''
+        Computes the overall error of each forecast with overall_errors_for_each_forecast,
+        instead of creating an ErrorRegion for each point. Only the points of the forecast
+        region are evaluated, e.g. the members of a cluster, the other points have zero error.
+        '''
+        # condition check: the 2D regions should have the same shape
+        assert forecast_region.x_len == self.x_len
+        assert forecast_region.y_len == self.y_len
+
+        points_n = self.x_len * self.y_len
+        forecast_indices = forecast_region.all_point_indices
+        observation_indices = self.observation_region.all_point_indices
+
+        observation_region = self.observation_region
+        training_region = self.training_region
+        forecast_scale = None
+
+        if observation_region.has_scaling():
+            # a forecast repeated over the observation region is descaled at each point, the
+            # descaling is linear: a * forecast + b
+            zeros = observation_region.repeat_series(np.zeros(1)).descale().as_numpy
+            ones = observation_region.repeat_series(np.ones(1)).descale().as_numpy
+            (a, b) = ((ones - zeros).reshape(points_n), zeros.reshape(points_n))
+            forecast_scale = (a[observation_indices], b[observation_indices])
+
+            observation_region = observation_region.descale()
+            if training_region is not None:
+                training_region = training_region.descale()
+
+        # the series of each point as columns (series_len, points)
+        forecast_np = forecast_region.as_numpy.reshape((-1, points_n))[:, forecast_indices]
+        observation_np = \
+            observation_region.as_numpy.reshape((-1, points_n))[:, observation_indices]
+
+        training_np = None
+        if training_region is not None:
+            training_np = \
+                training_region.as_numpy.reshape((-1, points_n))[:, observation_indices]
+
+        if self.parallel_workers:
+            # the series are shared with the processes, see ParallelForecastError
+            parallel_error = ParallelForecastError(self.parallel_workers, forecast_np,
+                                                   observation_np, training_np, forecast_scale)
+            overall_errors = parallel_error.operate(self.error_type)
+        else:
+            overall_errors = overall_errors_for_each_forecast(self.error_type, forecast_np,
+                                                              observation_np, training_np,
+                                                              forecast_scale)
+
+        log_msg = 'Overall {} errors of {} forecasts against {} observations'
+        self.logger.info(log_msg.format(self.error_type, len(forecast_indices),
+                                        len(observation_indices)))
+
+        result_np = np.zeros(points_n, dtype=self.dtype)
+        result_np[forecast_indices] = overall_errors
+
+        # may be polymorphic, e.g. a spatial cluster
+        return forecast_region.new_spatial_region(result_np.reshape((self.x_len, self.y_len)))
+
+
+def overall_errors_for_each_forecast(error_type, forecast_np, observation_np, training_np=None,
+                                     forecast_scale=None, max_chunk_bytes=2**26):
+    '''
+    For each forecast, the overall error (RMSE of the errors at each point) of using that
+    forecast to predict all the observations, see OverallErrorForEachForecast.
+
+    The errors of all the forecasts against all the observations are computed with broadcasting,
+    in chunks of forecasts so that the errors of a chunk use at most max_chunk_bytes.
+
+    forecast_np
+        array (forecast_len, n_forecasts) with a forecast series in each column.
+
+    observation_np
+        array (forecast_len, n_points) with the observation series of the points.
+
+    training_np
+        array (training_len, n_points) with the training series of the points, for MASE.
+
+    forecast_scale
+        optional tuple (a, b) of arrays (n_points,), the forecast at each point is
+        a * forecast + b (descaling).
+
+    Returns an array (n_forecasts,). The error of a forecast that is all NaN is NaN.
+    '''
+    error_by_point_func = get_error_by_point_func(error_type)
+    if error_by_point_func is None:
+        raise ValueError('Error type not supported for all points: {}'.format(error_type))
+
+    if error_type == 'MASE':
+        if training_np is None:
+            raise ValueError('MASE requires the training series')
+
+        # the denominators only depend on the training series, compute them once
+        naive_error = error_util.naive_error_by_point(training_np)
+        error_by_point_func = functools.partial(error_util.mase_by_point,
+                                                naive_error=naive_error)
+
+    (forecast_len, n_forecasts) = forecast_np.shape
+    n_points = observation_np.shape[1]
+    chunk_size = max(1, max_chunk_bytes // (8 * forecast_len * max(n_points, 1)))
+
+    # (forecast_len, 1, n_points), broadcasts with (forecast_len, chunk_size, 1)
+    observation_3d = observation_np[:, np.newaxis, :]
+
+    overall_errors = np.empty(n_forecasts)
+    for chunk_start in range(0, n_forecasts, chunk_size):
+        chunk_end = min(chunk_start + chunk_size, n_forecasts)
+
+        forecast_3d = forecast_np[:, chunk_start:chunk_end, np.newaxis]
+        if forecast_scale is not None:
+            (a, b) = forecast_scale
+            forecast_3d = a * forecast_3d + b
+
+        # errors (chunk_size, n_points), the training series are only used by MASE
+        errors = error_by_point_func(forecast_3d, observation_3d, None)
+
+        # RMSE ignoring NaN, as in ErrorRegion.overall_error
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            overall_errors[chunk_start:chunk_end] = np.sqrt(np.nanmean(np.square(errors),
+                                                                       axis=1))
+
+    # sanity check: no forecast, no error
+    overall_errors[np.isnan(forecast_np).all(axis=0)] = np.nan
+    return overall_errors
+
 
 class ErrorAnalysis(log_util.LoggerMixin):
     '''
@@ -330,9 +513,9 @@ def get_overall_error_func(error_type):
     Choose an overall error function. New error functions must be specified here and implemented
     below.
 
-    Cannot rely on get_erorr_func only, because we need to pass a top-level function when using the
-    parallel implementation for OverallErrorForEachForecast. For example, overall_error_mase
-    will be passed to the parallel code in error_parallel.
+    These functions compute the overall error of a single forecast, with an ErrorRegion. They are
+    used by OverallErrorForEachForecast for error types without a batched implementation, see
+    overall_errors_for_each_forecast.
     '''
     overall_error_functions = {
         'MASE': overall_error_mase,
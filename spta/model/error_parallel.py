@@ -1,154 +1,206 @@
 '''
-Perform an error/verification operation in parallel.
-This is used to provide a parallel implementation of OverallErrorForEachForecast.
+Parallel computation of the overall error of each forecast, see OverallErrorForEachForecast.
 
-This parallel implementation will iterate over a forecast region. For each point over the
-forecast region, allow full access to provided training and observation regions, and perform
-an operation.
+The forecast, observation and training series are copied once to shared memory blocks
+(multiprocessing.shared_memory), and each process attaches to the blocks when it starts, so the
+series are never pickled. The forecasts are partitioned into contiguous ranges, each task computes
+the overall errors of a range with overall_errors_for_each_forecast and writes them to its own
+slice of the shared output, so no locking is needed.
 
-The operation is assumed to return a scalar value, which is stored in a 2d numpy
-array. Parallelism is implemented using multiprocessing.Pool() and 1-d shared arrays. The arrays
-are wrapped using a special wrapper, so that the function that iterates over the forecast region
-only sees the 3-d objects.
-
-Based on https://research.wmz.ninja/articles/2018/03/
-on-sharing-large-arrays-when-using-pythons-multiprocessing.html
+The tasks report their progress to the parent process through a queue, the parent process logs
+the progress.
 '''
 
-import ctypes
-import itertools
 import numpy as np
 import multiprocessing as mp
-import os
-import sys
+import queue
+
+from multiprocessing import shared_memory
+
+from spta.util import log as log_util
 
 # will be shared among processes
 global_var_dict = {}
 
 
-def init_process(forecast_region, observation_region, training_region, output_1d_shared):
+def attach_shared_arrays(array_specs):
     '''
-    Initializes the parallel processes with the forecast, training and observation regions.
-    Also setups the output array, which is maintained as 1-d.
+    Given the specs {name: (shared_memory_name, shape)} of float64 arrays in shared memory,
+    returns a tuple (arrays, blocks): the numpy views by name and the shared memory blocks, which
+    must be kept open while the views are used.
     '''
+    arrays = {}
+    blocks = []
+    for (name, (shared_memory_name, shape)) in array_specs.items():
+        block = shared_memory.SharedMemory(name=shared_memory_name)
+        arrays[name] = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+        blocks.append(block)
+
+    return (arrays, blocks)
 
-    # read-only inputs, will be sent as pickled objects to the processes
-    global_var_dict['forecast_region'] = forecast_region
-    global_var_dict['observation_region'] = observation_region
-    global_var_dict['training_region'] = training_region
 
-    # writeable output, 1-d aray
-    global_var_dict['output_1d_shared'] = output_1d_shared
+def create_shared_arrays(arrays):
+    '''
+    Copies the arrays {name: array} to new shared memory blocks, as float64. Returns a tuple
+    (array_specs, blocks): the specs for attach_shared_arrays and the shared memory blocks by
+    name, which must be closed and unlinked by the caller (see release_shared_arrays).
+    '''
+    array_specs = {}
+    blocks = {}
+    try:
+        for (name, array) in arrays.items():
+            array = np.asarray(array, dtype=np.float64)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=np.float64, buffer=block.buf)[...] = array
+            array_specs[name] = (block.name, array.shape)
+            blocks[name] = block
 
+    except Exception:
+        release_shared_arrays(blocks)
+        raise
 
-def error_function_wrapper(points_with_error_function):
+    return (array_specs, blocks)
 
-    # unpack the parameter
-    (point, wrapped_error_function) = points_with_error_function
 
-    # Let each process output logs to a separate file, in order to avoid concurrency
-    # https://stackoverflow.com/a/23937468
-    sys.stdout = open(str(os.getpid()) + ".out", "a")
+def release_shared_arrays(blocks):
+    '''
+    Closes and removes the shared memory blocks created by create_shared_arrays.
+    '''
+    for block in blocks.values():
+        block.close()
+        block.unlink()
 
-    # recover the read-only regions
-    forecast_region = global_var_dict['forecast_region']
-    observation_region = global_var_dict['observation_region']
-    training_region = global_var_dict['training_region']
 
-    # data at the specified point
-    forecast_series = forecast_region.series_at(point)
+def init_process(array_specs, progress_queue):
+    '''
+    Initializes the processes with views of the shared arrays and the progress queue.
+    The views are created once per process, not once per task.
+    '''
+    (arrays, blocks) = attach_shared_arrays(array_specs)
+    global_var_dict['arrays'] = arrays
+    global_var_dict['blocks'] = blocks
+    global_var_dict['progress_queue'] = progress_queue
 
-    # call wrapped function to perform operation
-    error_at_point = wrapped_error_function(point, forecast_series, observation_region,
-                                            training_region)
 
-    # prepare 2d representation of the output
-    (_, x_len, y_len) = forecast_region.shape
-    output_2d = None
-    output_2d_shape = (x_len, y_len)
+def forecast_range_task(task):
+    '''
+    Computes the overall errors of the forecasts in [range_start, range_end), and writes them to
+    the same range of the shared output.
+    '''
+    # to avoid circular imports
+    from spta.model.error import overall_errors_for_each_forecast
 
-    # need to lock the writeable shared array
-    # https://stackoverflow.com/a/7908612
-    with global_var_dict['output_1d_shared'].get_lock():
+    (range_start, range_end, error_type) = task
+    arrays = global_var_dict['arrays']
 
-        # recover 2d representation of the output
-        output_2d = np.frombuffer(global_var_dict['output_1d_shared'].get_obj())
-        output_2d = output_2d.reshape(output_2d_shape)
+    forecast_scale = None
+    if 'scale_a' in arrays:
+        forecast_scale = (arrays['scale_a'], arrays['scale_b'])
 
-        # save the operation result
-        output_2d[point.x, point.y] = error_at_point
+    overall_errors = \
+        overall_errors_for_each_forecast(error_type, arrays['forecast'][:, range_start:range_end],
+                                         arrays['observation'], arrays.get('training', None),
+                                         forecast_scale)
 
-    # no output from parallel function, we are writing to array
+    # disjoint slice of the output, no locking
+    arrays['output'][range_start:range_end] = overall_errors
+    global_var_dict['progress_queue'].put((range_start, range_end))
 
 
-class ParallelForecastError(object):
+def forecast_ranges(n_forecasts, num_ranges):
     '''
-    A parallel implementation of a generic forecast error function.
-    It receives the forecast, observation and training regions. The output is assumed to be
-    a spatial region, where each point holds the output of some provided error function evaluated
-    with the forecast series of that point:
+    Partitions the forecasts into at most num_ranges contiguous ranges of similar size.
+    Returns a list of (range_start, range_end) tuples, range_end is exclusive.
+    '''
+    num_ranges = max(1, min(num_ranges, n_forecasts))
+    bounds = np.linspace(0, n_forecasts, num_ranges + 1).astype(int)
+    return [
+        (int(range_start), int(range_end))
+        for (range_start, range_end)
+        in zip(bounds[:-1], bounds[1:])
+        if range_end > range_start
+    ]
+
 
-        output = some SpatialRegion
-        output@point = error_function(forecast@point, obs_region, training_region)
+class ParallelForecastError(log_util.LoggerMixin):
+    '''
+    A parallel implementation of overall_errors_for_each_forecast. Each of the forecasts is used
+    to predict all the observations, the output is the overall error of each forecast.
     '''
 
-    def __init__(self, num_proc, forecast_region, observation_region, training_region):
+    def __init__(self, num_proc, forecast_np, observation_np, training_np=None,
+                 forecast_scale=None, ranges_per_proc=4):
+        '''
+        See overall_errors_for_each_forecast for the arrays. Each process handles ranges_per_proc
+        ranges of forecasts on average, so that the progress is reported a few times.
+        '''
+        super(ParallelForecastError, self).__init__()
         self.num_proc = num_proc
-        self.forecast_region = forecast_region
-        self.observation_region = observation_region
-        self.training_region = training_region
-
-        # initialize the 1-d output array
-        # the parallel output is implemented as a 1-d shared array (thread-safe with locking)
-        # this needs to be length of (x_len * y_len)
-        (_, x_len, y_len) = self.forecast_region.shape
-        self.output_1d_len = x_len * y_len
-        self.output_2d_shape = (x_len, y_len)
-        self.output_1d_shared = mp.Array(ctypes.c_double, self.output_1d_len)
-
-    def operate(self, error_function):
+        self.ranges_per_proc = ranges_per_proc
+
+        self.arrays = {
+            'forecast': forecast_np,
+            'observation': observation_np
+        }
+
+        if training_np is not None:
+            self.arrays['training'] = training_np
+
+        if forecast_scale is not None:
+            (self.arrays['scale_a'], self.arrays['scale_b']) = forecast_scale
+
+        self.n_forecasts = forecast_np.shape[1]
+
+    def operate(self, error_type):
         '''
-        Execute the error_function in parallel.
-        The signature of error_function must be as follows:
-        error_function(point, forecast_series, observation_region, training_region)
+        Computes the overall error of each forecast in parallel, returns a 1-d array.
         '''
+        # the output is also shared, each task writes a disjoint slice
+        arrays = dict(self.arrays)
+        arrays['output'] = np.full(self.n_forecasts, np.nan)
+
+        (array_specs, blocks) = create_shared_arrays(arrays)
+        try:
+            output = self.run_tasks(error_type, array_specs, blocks['output'])
+        finally:
+            release_shared_arrays(blocks)
+
+        return output
 
-        # initialize the pool, the 'init_process' function will be called with supplied args
+    def run_tasks(self, error_type, array_specs, output_block):
+        '''
+        Runs the tasks in a pool of processes, logs the progress reported by the tasks and
+        returns a copy of the output.
+        '''
+        ranges = forecast_ranges(self.n_forecasts, self.num_proc * self.ranges_per_proc)
+        tasks = [
+            (range_start, range_end, error_type)
+            for (range_start, range_end)
+            in ranges
+        ]
+
+        progress_queue = mp.Queue()
         with mp.Pool(processes=self.num_proc, initializer=init_process,
-                     initargs=(self.forecast_region, self.observation_region, self.training_region,
-                               self.output_1d_shared)) as pool:
-
-            # iterate over the forecast region now to get all points
-            # this should work nicely for subclasses of SpatialRegion, e.g. clusters
-            points = [point for (point, _) in self.forecast_region]
-
-            # we need to pass a single iterable to imap, where each item is a tuple of the
-            # point and the wrapped error function
-            # this idiom achieves the effect
-            points_with_error_function = zip(points, itertools.repeat(error_function))
-
-            # put the processes to work using map
-            # imap doesn't work for some reason, outputs error = 0.0 and no .out files
-            # https://docs.python.org/3/library/multiprocessing.html#multiprocessing.pool.Pool.imap
-            pool.map(error_function_wrapper, points_with_error_function, chunksize=10)
-
-        # the parallel processes are finished now
-
-        # prepare a 2-d view of the output
-        # since the output is thread-safe, we need the lock again
-        output_2d = None
-        with self.output_1d_shared.get_lock():
-            output_2d = np.frombuffer(self.output_1d_shared.get_obj())
-            output_2d = output_2d.reshape(self.output_2d_shape)
-
-        # ask the forecast region for a 2-d region with the same shape (and subclass)
-        decorated_region = self.forecast_region.empty_region_2d()
-
-        # we need to write inside the array
-        # trying to assign output_2d to the decorated region does not work,
-        # because it is shared memory
-        np.copyto(decorated_region.as_numpy, output_2d)
-
-        # to avoid circular imports
-        from spta.model.error import ErrorRegion
-        return ErrorRegion(decorated_region)
+                     initargs=(array_specs, progress_queue)) as pool:
+
+            result = pool.map_async(forecast_range_task, tasks, chunksize=1)
+
+            done = 0
+            while done < self.n_forecasts:
+                try:
+                    (range_start, range_end) = progress_queue.get(timeout=1)
+                except queue.Empty:
+                    if result.ready():
+                        # a task failed, the error is raised below
+                        break
+                    continue
+
+                done += range_end - range_start
+                self.logger.info('Overall errors: {}/{} forecasts'.format(done, self.n_forecasts))
+
+            # raises the error of a failed task, if any
+            result.get()
+
+        # copy, so that the shared memory can be released
+        output_shape = array_specs['output'][1]
+        return np.array(np.ndarray(output_shape, dtype=np.float64, buffer=output_block.buf))
@@ -57,6 +57,10 @@ class ForecastAnalysis(log_util.LoggerMixin):
         self.error_analysis = ErrorAnalysis(self.test_region, self.training_region,
                                             self.parallel_workers)
 
+        # train in parallel if requested, unless the trainer already has its own setting
+        if self.trainer.parallel_workers is None:
+            self.trainer.parallel_workers = self.parallel_workers
+
         # call the strategy
         self.logger.info('Training models using: {}'.format(self.trainer.__class__.__name__))
         self.model_region = self.trainer.apply_to(self.training_region)
@@ -314,9 +318,10 @@ class ForecastAnalysis(log_util.LoggerMixin):
         _, subplot = plt.subplots(1, 1, figsize=(7, 5))
         subplot.plot(distances_to_point, forecast_errors, 'bo')
 
-        # get ARIMA order at point of interest
+        # get ARIMA order at point of interest, the model may be compact
+        from spta.arima import model as arima_model
         fitted_arima_at_point = self.model_region.value_at(point_of_interest)
-        arima_order = fitted_arima_at_point.model.order
+        arima_order = arima_model.arima_order(fitted_arima_at_point)
 
         # title
         title = 'Distances to medoid vs forecast errors at medoid'
@@ -8,6 +8,7 @@ import numpy as np
 from .base import ModelRegion
 from .train import ModelTrainer
 
+from spta.distance.nearest import PrunedNearestNeighbors
 from spta.util import arrays as arrays_util
 from spta.util import log as log_util
 
@@ -147,12 +148,12 @@ def find_k_nearest_neighbors(array, k, possible_neighbors, distance_measure):
     if len(possible_neighbors) == k:
         return tuple(range(0, k))
 
-    # calculate distances from array to each neighbor
-    distances_to_possible_neighbors = [
-        distance_measure.measure(array, possible_neighbor)
-        for possible_neighbor in possible_neighbors
-    ]
-
     # find the indices of the k-lowest distances
-    indices_k_lowest_distances = np.argpartition(np.array(distances_to_possible_neighbors), k)[:k]
+    # lower bounds avoid computing the distances to neighbors that cannot be among the nearest
+    nearest_neighbors = PrunedNearestNeighbors(distance_measure, possible_neighbors)
+    (indices_k_lowest_distances, _) = nearest_neighbors.find_nearest(array, k)
+
+    logger = log_util.logger_for_me(find_k_nearest_neighbors)
+    logger.debug('k-NN prune rate: {:.2f}'.format(nearest_neighbors.prune_rate))
+
     return tuple(indices_k_lowest_distances)
@@ -6,6 +6,8 @@ from spta.region.function import FunctionRegionScalar
 
 from spta.util import log as log_util
 
+from .train_parallel import ParallelModelTraining
+
 
 class ModelTrainer(FunctionRegionScalar):
     '''
@@ -20,6 +22,10 @@ class ModelTrainer(FunctionRegionScalar):
     contains the function objects at each point. The FunctionRegion interface assumes that the only
     parameter of the function is the value of the region at each point, so functools.partial is used
     to pass the model parameters to the function and maintain the interface.
+
+    If parallel_workers is set to more than one process, the models are trained in parallel by
+    apply_to, see spta.model.train_parallel. The trainer is copied to each process, so the
+    training function must be picklable.
     '''
 
     def __init__(self, model_params_and_shape=None, model_params_region=None):
@@ -71,6 +77,9 @@ class ModelTrainer(FunctionRegionScalar):
         # to avoid problems with missing attribute
         self.missing_count = 0
 
+        # train models serially by default
+        self.parallel_workers = None
+
     def apply_to(self, training_region):
         '''
         Override the parent behavior of FunctionRegionScalar: instead of returning a value for f_{(x,y)}(x,y),
@@ -80,9 +89,14 @@ class ModelTrainer(FunctionRegionScalar):
         ModelRegion instead. The parent SpatialRegion contains the trained model at training region,
         so this method is decorated to achieve the effect.
         '''
-        # get result from parent behavior
-        # this will already call the training function (see constructor!) and return trained models.
-        spatial_region_with_models = super(ModelTrainer, self).apply_to(training_region)
+        if self.parallel_workers is not None and self.parallel_workers > 1:
+            # same result as the parent behavior, the points are split among processes
+            spatial_region_with_models = self.apply_in_parallel(training_region)
+
+        else:
+            # get result from parent behavior
+            # this will already call the training function (see constructor!) and return trained models.
+            spatial_region_with_models = super(ModelTrainer, self).apply_to(training_region)
 
         # count and log missing models, iterate to find them
         self.missing_count = 0
@@ -99,6 +113,18 @@ class ModelTrainer(FunctionRegionScalar):
         # decorate the output by returning the desired instance (subclasses define the correct instance)
         return self.create_model_region(spatial_region_with_models.as_numpy)
 
+    def apply_in_parallel(self, training_region):
+        '''
+        Trains the models at each point of the training region using parallel_workers processes.
+        Returns a SpatialRegion with the trained models, like the parent behavior of apply_to.
+        '''
+        self.logger.info('Training models with {} processes'.format(self.parallel_workers))
+        parallel_training = ParallelModelTraining(self.parallel_workers, self)
+        models_np = parallel_training.operate(training_region)
+
+        # may be polymorphic, e.g. for clusters
+        return training_region.new_spatial_region(models_np)
+
     def training_function(self, model_params, training_series):
         '''
         Here the training takes place at each point of the region. The model_params and training_series match
@@ -165,6 +191,9 @@ class TrainAtRepresentatives(ModelTrainer):
         self.decorated = decorated
         self.representatives = representatives
 
+        # train in parallel if the decorated does
+        self.parallel_workers = decorated.parallel_workers
+
     def function_at(self, point):
         '''
         Here we decorate the behavior: models will be trained only at the representative points,
@@ -0,0 +1,122 @@
+'''
+Parallel training of the models at each point of a training region, see ModelTrainer.
+
+The training series are copied once to a shared memory block (see spta.model.error_parallel),
+and each process attaches to the block when it starts, together with its own copy of the trainer,
+so neither the series nor the trainer are pickled for each task. The points to be trained are
+partitioned into contiguous ranges, each task trains the models of a range and returns them to
+the parent process, which assembles the array of models.
+
+The trained models are returned by the tasks instead of being written to shared memory, because
+they are arbitrary Python objects.
+'''
+
+import numpy as np
+import multiprocessing as mp
+
+from spta.region import Point
+from spta.util import log as log_util
+
+from .error_parallel import attach_shared_arrays, create_shared_arrays, release_shared_arrays
+from .error_parallel import forecast_ranges
+
+# will be shared among processes
+global_var_dict = {}
+
+
+def init_process(trainer, array_specs, point_indices, y_len):
+    '''
+    Initializes the processes with the trainer, a view of the shared training series and the
+    indices of the points to be trained. Done once per process, not once per task.
+    '''
+    (arrays, blocks) = attach_shared_arrays(array_specs)
+    global_var_dict['trainer'] = trainer
+    global_var_dict['arrays'] = arrays
+    global_var_dict['blocks'] = blocks
+    global_var_dict['point_indices'] = point_indices
+    global_var_dict['y_len'] = y_len
+
+
+def train_range_task(task):
+    '''
+    Trains the models of the points in point_indices[range_start:range_end]. Returns a tuple
+    (range_start, range_end, models), with the models in the same order as the points.
+    '''
+    (range_start, range_end) = task
+    trainer = global_var_dict['trainer']
+    training_series = global_var_dict['arrays']['training']
+    y_len = global_var_dict['y_len']
+
+    models = []
+    for index in global_var_dict['point_indices'][range_start:range_end]:
+        point = Point(int(index // y_len), int(index % y_len))
+
+        # the function can vary by point, e.g. TrainAtRepresentatives
+        # copy the series, the model may keep a reference to it after the memory is released
+        training_function = trainer.function_at(point)
+        models.append(training_function(np.array(training_series[:, index])))
+
+    return (range_start, range_end, models)
+
+
+class ParallelModelTraining(log_util.LoggerMixin):
+    '''
+    A parallel implementation of the training done by ModelTrainer.apply_to. Trains a model at
+    each point of the training region, the output is an array (x_len, y_len) of models.
+    '''
+
+    def __init__(self, num_proc, trainer, ranges_per_proc=4):
+        '''
+        Each process handles ranges_per_proc ranges of points on average, so that the progress is
+        reported a few times and slow points are balanced among the processes.
+        '''
+        super(ParallelModelTraining, self).__init__()
+        self.num_proc = num_proc
+        self.trainer = trainer
+        self.ranges_per_proc = ranges_per_proc
+
+    def operate(self, training_region):
+        '''
+        Trains the models at the points of the training region in parallel. Points that are not
+        iterated by the region (e.g. not members of a cluster) get 0, like in
+        apply_function_scalar.
+        '''
+        (series_len, x_len, y_len) = training_region.shape
+
+        # the series at the points of interest, e.g. members of a cluster
+        point_indices = np.asarray(training_region.all_point_indices, dtype=np.int64)
+        series_2d = np.asarray(training_region.as_numpy).reshape((series_len, x_len * y_len))
+
+        (array_specs, blocks) = create_shared_arrays({'training': series_2d})
+        try:
+            models = self.run_tasks(array_specs, point_indices, y_len)
+        finally:
+            release_shared_arrays(blocks)
+
+        models_np = np.zeros((x_len, y_len), dtype=object)
+        for (index, model) in zip(point_indices, models):
+            models_np[index // y_len, index % y_len] = model
+
+        return models_np
+
+    def run_tasks(self, array_specs, point_indices, y_len):
+        '''
+        Runs the tasks in a pool of processes, logs the progress as the tasks finish and returns
+        the list of models in the order of point_indices.
+        '''
+        n_points = len(point_indices)
+        ranges = forecast_ranges(n_points, self.num_proc * self.ranges_per_proc)
+
+        models = [None] * n_points
+        with mp.Pool(processes=self.num_proc, initializer=init_process,
+                     initargs=(self.trainer, array_specs, point_indices, y_len)) as pool:
+
+            done = 0
+            for (range_start, range_end, range_models) in pool.imap_unordered(train_range_task,
+                                                                               ranges):
+                models[range_start:range_end] = range_models
+
+                done += range_end - range_start
+                self.logger.info('Training: {}/{} points'.format(done, n_points))
+
+        return models
@@ -1,58 +1,74 @@
 import numpy as np
 
+from spta.distance.condensed import CondensedDistanceMatrix
 from spta.distance.dtw import DistanceByDTW
 from spta.util import log as log_util
 
-from . import Region
+from . import Point, Region
+
+
+def sums_of_distances(distance_matrix, point_indices, block_rows=1000):
+    '''
+    Given a distance matrix and the indices of some points, computes the sum of the distances
+    between each of these points and all of these points. The submatrix of the points is read
+    in blocks of rows, so that it is never copied at once.
+    '''
+    point_indices = np.asarray(point_indices, dtype=np.int64)
+    sums = np.empty(len(point_indices))
+
+    for block_start in range(0, len(point_indices), block_rows):
+        block_end = min(block_start + block_rows, len(point_indices))
+        block_indices = point_indices[block_start:block_end]
+
+        # works with dense, memory-mapped and condensed matrices
+        block = distance_matrix[block_indices[:, np.newaxis], point_indices[np.newaxis, :]]
+        sums[block_start:block_end] = np.sum(block, axis=1)
+
+    return sums
 
 
 class CalculateCentroid(log_util.LoggerMixin):
 
-    def __init__(self, distance_measure, use_distance_matrix=True):
+    def __init__(self, distance_measure, use_distance_matrix=True, block_rows=1000):
         self.distance_measure = distance_measure
         self.use_distance_matrix = use_distance_matrix
+        self.block_rows = block_rows
 
     def find_centroid_and_distances(self, spt_region):
         '''
         Given a spatio-temporal region, find the point (and its series) that minimizes the
         sum of distances between its series and all the other series in a region.
         For this, we use the distance matrix, and find the point for which the sum of distances
-        is minimized.
+        is minimized. This also works for clusters, only their members are considered.
+
+        If the distance matrix is not available (or use_distance_matrix=False), only the
+        distances between the points of the region are computed.
         '''
         _, x_len, y_len = spt_region.shape
 
-        # to find the centroid, iterate over all points in the region
-        # it is possible to use np.apply_along_axis to find all the distances, but this does
-        # cannot work for clusters.
-        # combined_distances = np.apply_along_axis(np.sum, axis=1, arr=distance_matrix)
-
-        # see DistanceBetweenSeries.distances_to_point for explanation of why this is needed
-        all_point_indices = spt_region.all_point_indices
+        # the indices of the points in the region, or in the cluster
+        all_point_indices = np.asarray(spt_region.all_point_indices, dtype=np.int64)
 
-        # keep track of local minima until global minimum is found
-        with_min_distance = None
-        min_sum_distances = np.Inf
-        min_distances_to_point = np.Inf
+        distance_matrix = self.distance_matrix_for(spt_region)
+        if distance_matrix is not None:
+            sums = sums_of_distances(distance_matrix, all_point_indices, self.block_rows)
+        else:
+            distance_submatrix = self.compute_distance_submatrix(spt_region, all_point_indices)
+            sums = np.sum(distance_submatrix, axis=1)
 
-        # iterate points in the region, find sum of distances to each point, keep minimum
-        for (point, _) in spt_region:
+        # a point with NaN distances cannot be the centroid
+        sums[np.isnan(sums)] = np.inf
+        position = int(np.argmin(sums))
+        centroid_index = all_point_indices[position]
 
-            # the distance measure will find the distances of each point to this specific point
-            # this will also work for clusters
-            distances_to_point = self.distance_measure.distances_to_point(spt_region, point,
-                                                                          all_point_indices,
-                                                                          self.use_distance_matrix)
-            sum_distances_to_point = np.sum(distances_to_point)
+        # the distances of all points in region to the centroid
+        if distance_matrix is not None:
+            distances_to_centroid = np.asarray(distance_matrix[centroid_index,
+                                                               all_point_indices])
+        else:
+            distances_to_centroid = distance_submatrix[position]
 
-            if sum_distances_to_point < min_sum_distances:
-                # found local minimum
-                with_min_distance = point
-                min_sum_distances = sum_distances_to_point
-                min_distances_to_point = distances_to_point
-
-        # found global minimum
-        centroid = with_min_distance
-        distances_to_centroid = min_distances_to_point
+        centroid = Point(int(centroid_index) // y_len, int(centroid_index) % y_len)
 
         log_msg = 'Centroid found at {} with minimum sum of distances {:.3f}'
         self.logger.info(log_msg.format(centroid, np.sum(distances_to_centroid)))
@@ -60,6 +76,35 @@ class CalculateCentroid(log_util.LoggerMixin):
         # return the centroid and the distances of all points in region to it
         return centroid, distances_to_centroid
 
+    def distance_matrix_for(self, spt_region):
+        '''
+        The distance matrix of the region, loaded if necessary, or None if it is not available.
+        '''
+        if not self.use_distance_matrix:
+            return None
+
+        if self.distance_measure.distance_matrix is None:
+            try:
+                # can we load a saved distance matrix? this requires the metadata of the region
+                self.distance_measure.try_load_distance_matrix(spt_region, mmap_mode='r')
+            except Exception as err:
+                log_msg = 'Calculating distances because saved distances not available: {}'
+                self.logger.warning(log_msg.format(err))
+
+        return self.distance_measure.distance_matrix
+
+    def compute_distance_submatrix(self, spt_region, point_indices):
+        '''
+        Computes the distance matrix between the points of the region (or the members of a
+        cluster), given their indices.
+        '''
+        # for a cluster, only the series of its members, in the order of point_indices
+        series_of_points = np.asarray(spt_region.as_2d)
+
+        points_n = len(point_indices)
+        condensed = self.distance_measure.compute_condensed_rows(series_of_points, 0, points_n)
+        return CondensedDistanceMatrix(condensed, points_n).to_dense()
+
     @classmethod
     def for_sptr_metadata(cls, spt_region_metadata, distance_measure=DistanceByDTW()):
         '''
@@ -1,8 +1,12 @@
+import numpy as np
 import os
 
+from collections import OrderedDict
+
 from . import Point, Region
+from .spatial import SpatialRegion
 from .temporal import SpatioTemporalRegion
-from .scaling import ScaleFunction
+from .scaling import ScaleFunction, SpatioTemporalScaled
 from spta.dataset import temp_brazil
 
 from spta.util import log as log_util
@@ -77,6 +81,20 @@ class SpatioTemporalRegionMetadata(log_util.LoggerMixin):
         '''
         return '{}/distances_{}.npy'.format(self.dataset_dir, self)
 
+    def distances_filename_for(self, distance_measure):
+        '''
+        The distance matrix computed with a specific distance measure, the suffix of the
+        distance measure is appended to the filename.
+        Ex 'raw/distances_sp_small_2015_2015_4spd_scaled_dtw_sakoe_chiba_r10.npy'
+
+        Distance measures without suffix (e.g. DTW) use distances_filename.
+        '''
+        suffix = distance_measure.distances_file_suffix
+        if suffix is None:
+            return self.distances_filename
+
+        return '{}/distances_{}_{}.npy'.format(self.dataset_dir, self, suffix)
+
     @property
     def scaled_min_filename(self):
         '''
@@ -139,6 +157,39 @@ class SpatioTemporalRegionMetadata(log_util.LoggerMixin):
         Creates an instance of SpatioTemporalRegion using the current metadata.
         Currently supports only 1y and 4y, 1spd and 4spd.
 
+        The dataset of the region (already scaled if requested) is retrieved from the dataset
+        cache, see RegionDatasetCache. Each call returns a new instance, but the instances share
+        the same read-only arrays.
+        '''
+        cached = dataset_cache.get(self)
+        if cached is None:
+            # subset and scale the region, then store the result
+            spt_region = self.create_instance_from_dataset()
+
+            if self.scaled:
+                cached = dataset_cache.put(self, spt_region.as_numpy,
+                                           spt_region.scale_min.as_numpy,
+                                           spt_region.scale_max.as_numpy)
+            else:
+                cached = dataset_cache.put(self, spt_region.as_numpy)
+
+        (numpy_dataset, scale_min, scale_max) = cached
+        spt_region = SpatioTemporalRegion(numpy_dataset, region_metadata=self)
+
+        if self.scaled:
+            spt_region = SpatioTemporalScaled(region_with_scaled_dataset=spt_region,
+                                              scale_min=SpatialRegion(scale_min),
+                                              scale_max=SpatialRegion(scale_max),
+                                              region_metadata=self)
+
+        self.logger.info('Loaded spatio-temporal region {}: {}'.format(self, self.region))
+        return spt_region
+
+    def create_instance_from_dataset(self):
+        '''
+        Creates an instance of SpatioTemporalRegion by reading the region from the temp_brazil
+        dataset and scaling it if requested, without using the dataset cache.
+
         Assumes temp_brazil dataset!
         Assumes spd = 1 or spd = 4!
         '''
@@ -146,11 +197,12 @@ class SpatioTemporalRegionMetadata(log_util.LoggerMixin):
         assert self.spd == 1 or self.spd == 4
 
         # read the dataset according to the year interval and spd
+        # only the data of the region is read
         numpy_dataset = temp_brazil.retrieve_dataset_interval(year_start=self.year_start,
                                                               year_end=self.year_end,
-                                                              spd=self.spd)
-        # subset the data to work only with region
-        spt_region = SpatioTemporalRegion(numpy_dataset).region_subset(self.region)
+                                                              spd=self.spd,
+                                                              region=self.region)
+        spt_region = SpatioTemporalRegion(numpy_dataset)
 
         # save the metadata in the instance, can be useful later
         spt_region.region_metadata = self
@@ -162,7 +214,6 @@ class SpatioTemporalRegionMetadata(log_util.LoggerMixin):
             spt_region = scale_function.apply_to(spt_region, series_len)
             self.logger.debug('Scaling data: {}'.format(spt_region.shape))
 
-        self.logger.info('Loaded spatio-temporal region {}: {}'.format(self, self.region))
         return spt_region
 
     def output_dir(self, output_home):
@@ -197,3 +248,143 @@ class SpatioTemporalRegionMetadata(log_util.LoggerMixin):
 
     def __str__(self):
         return repr(self)
+
+
+class RegionDatasetCache(log_util.LoggerMixin):
+    '''
+    Cache for the datasets of spatio-temporal regions, after subsetting and scaling. Each entry
+    has the dataset (series_len, x_len, y_len) and, if the region is scaled, the scale_min and
+    scale_max arrays (x_len, y_len).
+
+    There are two levels:
+
+        memory
+            the most recently used entries of this process, up to maxsize entries.
+
+        disk
+            numpy files designated by the metadata (dataset_filename, scaled_min_filename and
+            scaled_max_filename), loaded read-only with mmap_mode='r'. Remove the files to
+            invalidate the entries.
+
+    The entries are keyed by the metadata representation, which encodes the name of the region,
+    the year interval, the spd and the scaling, together with the dataset directory and the
+    coordinates of the region. The arrays of an entry are read-only, because they are shared
+    by all the regions created from it.
+    '''
+
+    def __init__(self, maxsize=8):
+        super(RegionDatasetCache, self).__init__()
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    def key_for(self, region_metadata):
+        return (region_metadata.dataset_dir, repr(region_metadata), region_metadata.region)
+
+    def get(self, region_metadata):
+        '''
+        Returns the tuple (dataset, scale_min, scale_max) for the metadata, or None if the
+        dataset is not cached. If the region is not scaled, scale_min and scale_max are None.
+        '''
+        key = self.key_for(region_metadata)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        entry = self.load(region_metadata)
+        if entry is not None:
+            self.remember(key, entry)
+
+        return entry
+
+    def put(self, region_metadata, numpy_dataset, scale_min=None, scale_max=None):
+        '''
+        Stores the arrays for the metadata in memory and on disk. Returns the cached entry.
+        '''
+        entry = (self.read_only(numpy_dataset), self.read_only(scale_min),
+                 self.read_only(scale_max))
+
+        try:
+            self.save(region_metadata, entry)
+        except OSError as err:
+            # still useful within this process
+            self.logger.warning('Could not save cached dataset {}: {}'.format(region_metadata, err))
+
+        self.remember(self.key_for(region_metadata), entry)
+        return entry
+
+    def clear(self):
+        '''
+        Removes the entries in memory, the files on disk are kept.
+        '''
+        self.entries.clear()
+
+    def remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def filenames(self, region_metadata):
+        filenames = [region_metadata.dataset_filename]
+        if region_metadata.scaled:
+            filenames.extend([region_metadata.scaled_min_filename,
+                              region_metadata.scaled_max_filename])
+        return filenames
+
+    def load(self, region_metadata):
+        '''
+        Loads the arrays saved for the metadata, or returns None if the files are not available
+        or do not match the region.
+        '''
+        filenames = self.filenames(region_metadata)
+        if not all([os.path.isfile(filename) for filename in filenames]):
+            return None
+
+        try:
+            arrays = [np.load(filename, mmap_mode='r') for filename in filenames]
+        except (OSError, ValueError) as err:
+            self.logger.warning('Error loading cached dataset {}: {}'.format(region_metadata, err))
+            return None
+
+        expected_shape = (region_metadata.x_len, region_metadata.y_len)
+        shapes_match = arrays[0].ndim == 3 and arrays[0].shape[1:] == expected_shape
+        for scale_array in arrays[1:]:
+            shapes_match = shapes_match and scale_array.shape == expected_shape
+
+        if not shapes_match:
+            log_msg = 'Ignoring cached dataset {}: expected region {}, got {}'
+            self.logger.warning(log_msg.format(filenames[0], region_metadata.region,
+                                               arrays[0].shape))
+            return None
+
+        self.logger.debug('Loaded cached dataset: {}'.format(filenames[0]))
+
+        if not region_metadata.scaled:
+            return (arrays[0], None, None)
+
+        return tuple(arrays)
+
+    def save(self, region_metadata, entry):
+        '''
+        Saves the arrays of an entry. Each file is replaced atomically, so that a partially
+        written file is never loaded.
+        '''
+        arrays = [array for array in entry if array is not None]
+        for (filename, array) in zip(self.filenames(region_metadata), arrays):
+            temp_filename = '{}.tmp.npy'.format(filename[:-4])
+            np.save(temp_filename, array)
+            os.replace(temp_filename, filename)
+            self.logger.debug('Saved cached dataset: {} -> {}'.format(filename, array.shape))
+
+    def read_only(self, array):
+        if array is None:
+            return None
+
+        array = np.array(array)
+        array.setflags(write=False)
+        return array
+
+
+# shared by all the metadata instances of this process
+dataset_cache = RegionDatasetCache()
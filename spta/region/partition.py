@@ -54,6 +54,11 @@ class PartitionRegion(BaseRegion):
 
     (7) to_pickle(path):
         Saves this instance as a pickle object, can later be retrieved using try_from_pickle(path).
+
+    (8) cluster_point_indices(index), cluster_points(index):
+        The sorted indices (and the Point instances) of the members of a cluster. They are found
+        once for all the clusters and kept, so that clusters can iterate over their members
+        without scanning the region. Assumes that the membership does not change afterwards.
     '''
 
     def __init__(self, numpy_dataset, k):
@@ -118,6 +123,52 @@ class PartitionRegion(BaseRegion):
         '''
         raise NotImplementedError
 
+    def cluster_point_indices(self, cluster_index):
+        '''
+        Returns a sorted, read-only 1-d array with the indices of the points in the cluster.
+        The indices of all the clusters are found on the first call, see
+        find_point_indices_by_cluster.
+        '''
+        if getattr(self, 'point_indices_by_cluster', None) is None:
+            point_indices_by_cluster = self.find_point_indices_by_cluster()
+            for point_indices in point_indices_by_cluster:
+                point_indices.flags.writeable = False
+            self.point_indices_by_cluster = point_indices_by_cluster
+
+        return self.point_indices_by_cluster[cluster_index]
+
+    def cluster_points(self, cluster_index):
+        '''
+        Returns the list of points in the cluster, sorted by index. Same as
+        cluster_point_indices(cluster_index) but with Point instances.
+        '''
+        if getattr(self, 'points_by_cluster', None) is None:
+            self.points_by_cluster = {}
+
+        if cluster_index not in self.points_by_cluster:
+            self.points_by_cluster[cluster_index] = [
+                Point(int(point_index) // self.y_len, int(point_index) % self.y_len)
+                for point_index
+                in self.cluster_point_indices(cluster_index)
+            ]
+
+        return self.points_by_cluster[cluster_index]
+
+    def find_point_indices_by_cluster(self):
+        '''
+        Returns a list of k sorted arrays, the indices of the points in each cluster. By default,
+        asks for the membership of each point to each cluster (slow?)
+        '''
+        return [
+            np.array([
+                point_index
+                for point_index in range(0, self.x_len * self.y_len)
+                if self.is_member(Point(point_index // self.y_len, point_index % self.y_len),
+                                  cluster_index)
+            ], dtype=np.int64)
+            for cluster_index in range(0, self.k)
+        ]
+
     def create_spatial_cluster(self, spatial_region, cluster_index):
         '''
         Returns an instance of SpatialCluster for this partition and given index.
@@ -211,6 +262,15 @@ class PartitionRegion(BaseRegion):
             pickle.dump(self, pickle_file)
             self.logger.debug('Saved partition with k={} at {}'.format(self.k, pickle_full_path))
 
+    def __getstate__(self):
+        '''
+        The members of the clusters are not pickled, they are found again when needed.
+        '''
+        state = self.__dict__.copy()
+        state.pop('point_indices_by_cluster', None)
+        state.pop('points_by_cluster', None)
+        return state
+
     @classmethod
     def try_from_pickle(cls, pickle_full_path):
         '''
@@ -282,11 +342,26 @@ class PartitionRegionCrisp(PartitionRegion):
         Returns the size of a cluster (number of points) given its index.
         Reimplemented for efficiency here.
         '''
-        return np.count_nonzero(self.numpy_dataset == cluster_index)
+        return len(self.cluster_point_indices(cluster_index))
 
     def clone(self):
         return PartitionRegionCrisp(np.copy(self.numpy_dataset), self.k)
 
+    def find_point_indices_by_cluster(self):
+        '''
+        Returns a list of k sorted arrays, the indices of the points in each cluster.
+        Sorting the labels once finds the members of all the clusters.
+        '''
+        labels = self.numpy_dataset.reshape(self.x_len * self.y_len)
+
+        # stable, so that the indices of each cluster remain sorted
+        point_indices = np.argsort(labels, kind='stable')
+        cluster_bounds = np.searchsorted(labels[point_indices], np.arange(0, self.k + 1))
+        return [
+            point_indices[cluster_bounds[cluster_index]:cluster_bounds[cluster_index + 1]]
+            for cluster_index in range(0, self.k)
+        ]
+
     def merge_clusters_2d(self, spatial_clusters):
         '''
         Given a list of spatial clusters, which are compatible with this partition (same
@@ -420,10 +495,96 @@ class PartitionRegionCrisp(PartitionRegion):
 
 
 class PartitionRegionFuzzy(PartitionRegion):
+    '''
+    A partition that is the result of applying a fuzzy clustering algorithm.
+
+    It contains a 3-d array with shape (k, x_len, y_len), the membership of each point to each
+    cluster (see MaskRegionFuzzy). Membership is determined using a threshold T: the point with
+    index i belongs to cluster j if
 
-    # TODO
-    # use this for threshold? https://stackoverflow.com/a/38532088/3175179
-    pass
+        uim - uij <= T, where m is the index that maximizes uij at point i (best cluster)
+
+    If the threshold is 0, this partition behaves like the 'crisp' version. The members of each
+    cluster are computed once for the threshold, use with_threshold to try another threshold.
+    '''
+
+    def __init__(self, numpy_dataset, k, threshold=0):
+        # assume that the numpy_dataset is a 3-d array (membership of each cluster)
+        assert numpy_dataset.ndim == 3
+        assert numpy_dataset.shape[0] == k
+
+        # sanity checks for threshold
+        assert threshold >= 0
+        assert threshold <= 1
+
+        super(PartitionRegionFuzzy, self).__init__(numpy_dataset, k)
+        self.threshold = threshold
+
+        # (k, x_len, y_len) boolean array, True if the point is a member of the cluster
+        best_membership = np.max(numpy_dataset, axis=0)
+        self.members = best_membership - numpy_dataset <= threshold
+
+    def is_member(self, point, cluster_index):
+        '''
+        Returns True iff the point is a member of the cluster with the specified index, given
+        the threshold.
+        '''
+        # sanity check
+        if point is None:
+            return False
+
+        return bool(self.members[cluster_index, point.x, point.y])
+
+    def membership_of_point_indices(self, point_indices):
+        '''
+        Same as membership_of_points(points) but for point indices instead of Point instances.
+        A point may belong to many clusters, this returns the best cluster of each point.
+        '''
+        best_clusters = np.argmax(self.numpy_dataset, axis=0)
+        return best_clusters.take(point_indices).tolist()
+
+    def cluster_len(self, cluster_index):
+        '''
+        Returns the size of a cluster (number of points) given its index and the threshold.
+        '''
+        return int(np.count_nonzero(self.members[cluster_index]))
+
+    def clone(self):
+        return PartitionRegionFuzzy(np.copy(self.numpy_dataset), self.k, self.threshold)
+
+    def find_point_indices_by_cluster(self):
+        '''
+        Returns a list of k sorted arrays, the indices of the points in each cluster, given the
+        threshold. A point may be in many clusters.
+        '''
+        return [
+            np.flatnonzero(self.members[cluster_index])
+            for cluster_index in range(0, self.k)
+        ]
+
+    def with_threshold(self, threshold):
+        '''
+        Returns a partition with the same memberships and a different threshold. The medoids
+        are kept, if available.
+        '''
+        partition = PartitionRegionFuzzy(self.numpy_dataset, self.k, threshold)
+        if hasattr(self, 'medoids'):
+            partition.medoids = self.medoids
+        return partition
+
+    @classmethod
+    def from_uij_and_region(cls, uij, x_len, y_len, threshold=0):
+        '''
+        Creates an instance of PartitionRegionFuzzy using a 2-d membership array (N, k) and the
+        region shape as input.
+        '''
+        # sanity check for input shape
+        (N, k) = uij.shape
+        assert N == x_len * y_len
+
+        # uij has (N, k) shape, the partition needs (k, x_len, y_len)
+        membership_3d = np.swapaxes(uij, 0, 1).reshape((k, x_len, y_len))
+        return PartitionRegionFuzzy(membership_3d, k, threshold)
 
 
 def intra_cluster_cost(partition, spt_region, distance_measure):
@@ -431,34 +592,37 @@ def intra_cluster_cost(partition, spt_region, distance_measure):
     Given a cluster partition, calculate the total intra-cluster cost.
 
     This is calculated using the SSE (sum of squared errors), where the "error" is the distance of each member
-    of the partition to its corresponding medoid.
+    of the partition to its corresponding medoid. See intra_cluster_cost_from_labels.
 
-    Assumes that the medoids are available in the partition.
+    Assumes that the medoids are available in the partition, and that the distance matrix has been
+    pre-calculated. For a fuzzy partition, each point is a member of its best cluster.
     '''
-    sum_of_intra_cluster_cost = 0
-
-    medoids = partition.medoids
+    if distance_measure.distance_matrix is None:
+        try:
+            # can we load a saved distance matrix? this requires the metadata of the region
+            distance_measure.load_distance_matrix_md(spt_region.region_metadata, mmap_mode='r')
+        except Exception:
+            raise ValueError('Expected a pre-calculated distance matrix!')
 
-    # work with clusters
-    clusters = partition.create_all_spt_clusters(spt_region, medoids=medoids)
+    _, x_len, y_len = spt_region.shape
+    labels = partition.membership_of_point_indices(np.arange(x_len * y_len))
+    medoid_indices = [medoid.x * y_len + medoid.y for medoid in partition.medoids]
 
-    for cluster_index, cluster in enumerate(clusters):
+    return intra_cluster_cost_from_labels(distance_measure.distance_matrix, labels,
+                                          medoid_indices)
 
-        cluster_medoid = medoids[cluster_index]
 
-        # the distance measure requires point indices
-        cluster_points = [point for (point, _) in cluster]
-        cluster_point_indices = [
-            point.x * spt_region.y_len + point.y
-            for point in cluster_points
-        ]
-
-        # use the distance_measure to calculate all distances
-        distances_to_medoid = distance_measure.distances_to_point(spt_region, cluster_medoid, cluster_point_indices)
-        # sum_of_intra_cluster_cost += np.sum(intra_cluster_cost)
-        sum_of_intra_cluster_cost += arrays_util.sum_squared(distances_to_medoid)
+def intra_cluster_cost_from_labels(distance_matrix, labels, medoid_indices):
+    '''
+    The SSE of a clustering given the label of each point and the index of the medoid of each
+    cluster. The distances of the points to their medoids are gathered from the distance matrix
+    at once.
+    '''
+    labels = np.asarray(labels, dtype=np.int64)
+    medoid_of_each_point = np.asarray(medoid_indices, dtype=np.int64)[labels]
 
-    return sum_of_intra_cluster_cost
+    distances_to_medoids = distance_matrix[np.arange(len(labels)), medoid_of_each_point]
+    return arrays_util.sum_squared(distances_to_medoids)
 
 
 if __name__ == '__main__':
@@ -1,13 +1,48 @@
 '''
 This module handles scale and descale of spatio-temporal regions.
+
+Both operations are computed over the whole (series_len, x_len, y_len) array at once, the min
+and max values of each point are broadcast along the time axis.
 '''
 
 import numpy as np
+import warnings
 
-from .function import FunctionRegionScalarSame, FunctionRegionSeries, FunctionRegionSeriesSame
+from .function import FunctionRegionSeries, FunctionRegionSeriesSame
 from .temporal import SpatioTemporalDecorator
 
 
+def scale_dataset(numpy_dataset):
+    '''
+    Scales each series of a (series_len, x_len, y_len) array to [0, 1].
+    Returns a tuple (scaled_dataset, scale_min, scale_max), the last two are (x_len, y_len) arrays.
+
+    A series with NaN min/max (all values NaN) is scaled to NaN, a series with min = max is
+    scaled to zeros.
+    '''
+    with warnings.catch_warnings():
+        # all-NaN series are expected, their min/max is NaN
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        scale_min = np.nanmin(numpy_dataset, axis=0)
+        scale_max = np.nanmax(numpy_dataset, axis=0)
+
+    scale_range = scale_max - scale_min
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled_dataset = (numpy_dataset - scale_min) / scale_range
+
+    # NaN == 0 is False, so all-NaN series stay NaN
+    scaled_dataset = np.where(scale_range == 0, 0, scaled_dataset)
+
+    return (scaled_dataset, scale_min, scale_max)
+
+
+def descale_dataset(scaled_dataset, scale_min, scale_max):
+    '''
+    Reverts scale_dataset, given the (x_len, y_len) arrays with the min and max of each series.
+    '''
+    return (scale_max - scale_min) * scaled_dataset + scale_min
+
+
 class ScaleFunction(FunctionRegionSeriesSame):
     '''
     A function region that scales the series of each point of a spatio-temporal region, so that
@@ -19,8 +54,8 @@ class ScaleFunction(FunctionRegionSeriesSame):
     scaled_region = scale_function.apply_to(spt_region, series_len)
 
     The scaling occurs independently for each point: each series will be scaled to be in the
-    interval [0, 1]. To revert the process, the mininum and maximum values are stored for each
-    point, the relevant data is stored in two spatial regions (scale_min and
+    interval [0, 1], see scale_dataset. To revert the process, the mininum and maximum values
+    are stored for each point, the relevant data is stored in two spatial regions (scale_min and
     scale_max) inside the scaled spatio-temporal region. The process can be reverted
     by calling descale() on the region. This method will only work if the data was scaled
     at some point, but it should work on decorated versions, e.g. a cluster of a scaled region.
@@ -64,18 +99,13 @@ class ScaleFunction(FunctionRegionSeriesSame):
         # TODO get rid of this, always save output_len in FunctionRegionSeries
         self.series_len = series_len
 
-        # calculate the min, max values for each series
-        # we will save these outputs to allow descale
-        minFunction = FunctionRegionScalarSame(np.nanmin, x_len, y_len)
-        self.scale_min = minFunction.apply_to(spt_region)
+        # scale all the series at once, and save the min, max values to allow descale
+        (scaled_dataset, scale_min, scale_max) = scale_dataset(spt_region.as_numpy)
+        self.scale_min = spt_region.new_spatial_region(scale_min)
+        self.scale_max = spt_region.new_spatial_region(scale_max)
 
-        maxFunction = FunctionRegionScalarSame(np.nanmax, x_len, y_len)
-        self.scale_max = maxFunction.apply_to(spt_region)
-
-        # call normal function behavior, function_at will be retrieved at each point of
-        # the region for application.
-        region_with_scaled_dataset = \
-            super(ScaleFunction, self).apply_to(spt_region, output_len)
+        # the new instance may be polymorphic, e.g. a cluster of the scaled dataset
+        region_with_scaled_dataset = spt_region.new_spatio_temporal_region(scaled_dataset)
 
         # now create an instance of SpatioTemporalScaled, which has data for scale
         scaled_region = SpatioTemporalScaled(region_with_scaled_dataset=region_with_scaled_dataset,
@@ -162,40 +192,16 @@ class SpatioTemporalScaled(SpatioTemporalDecorator):
         same properties as the (possibly decorated) region that was scaled.
         '''
 
-        # implement this by creating a FunctionRegionSeries and applying it to this (self) region.
-        class DescaleRegion(FunctionRegionSeriesSame):
-
-            def __init__(function_self, x_len, y_len):
-                # This function region does not have a relevant underlying numpy in it.
-                # We still need the proper shape though
-                super(DescaleRegion, function_self).__init__(None, x_len, y_len)
-
-            def function_at(function_self, point):
-                # Here, we descale the series at the point using the scale data
-                # available in the region. Notice the use of "self" (SpatioTemporalScaled).
-                min_for_point = self.scale_min.value_at(point)
-                max_for_point = self.scale_max.value_at(point)
-
-                # log_msg = 'point {}: scale_min={}, scale_max={}'
-                # self.logger.debug(log_msg.format(point, min_for_point, max_for_point))
-
-                def descale(series):
-                    # the descaling function that will be called on the series at each point
-                    return (max_for_point - min_for_point) * series + min_for_point
-
-                return descale
-
-        # apply the function defined above
-        # this will create a SpatioTemporalScaled region
-        descale_function = DescaleRegion(self.x_len, self.y_len)
-        descaled_region = descale_function.apply_to(self, self.series_len)
+        # descale all the series at once, broadcasting the min/max values of each point
+        descaled_dataset = descale_dataset(self.as_numpy, self.scale_min.as_numpy,
+                                           self.scale_max.as_numpy)
 
         # Drop the scale behavior now: we do this by reverting to an instance of region
         # decorated by this scale instance. The new instance does not have scale_* regions.
         # If there is a chain of decorated regions on top of each other, this should "remove" the
         # scale decoration but leave the others to maintain expected functionalities.
         region_without_scaling = \
-            self.decorated_region.new_spatio_temporal_region(descaled_region.numpy_dataset)
+            self.decorated_region.new_spatio_temporal_region(descaled_dataset)
 
         return region_without_scaling
 
@@ -209,12 +215,12 @@ class SpatioTemporalScaled(SpatioTemporalDecorator):
         super(SpatioTemporalScaled, self).save()
 
         # save min
-        min_filename = self.region_metadata.scale_min_filename
+        min_filename = self.region_metadata.scaled_min_filename
         np.save(min_filename, self.scale_min.numpy_dataset)
         self.logger.info('Saved scale_min to {}'.format(min_filename))
 
         # save max
-        max_filename = self.region_metadata.scale_max_filename
+        max_filename = self.region_metadata.scaled_max_filename
         np.save(max_filename, self.scale_max.numpy_dataset)
         self.logger.info('Saved scale_max to {}'.format(max_filename))
 
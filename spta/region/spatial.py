@@ -372,29 +372,26 @@ class SpatialCluster(SpatialDecorator):
         This iterator will also play a role in apply_function_scalar and apply_function_series,
         the function will be applied only the points that belong to this cluster.
         '''
-        while True:
-
-            # use the base iterator to get next candidate point in region
-            # using DomainRegion instead of BaseRegion to avoid an import...
-            try:
-                candidate_point = DomainRegion.__next__(self)
-            except StopIteration:
-                # self.logger.debug('Base region iteration stopped')
-
-                # when the base iterator stops, we also stop
-                raise
-
-            # self.logger.debug('{}: candidate = {}'.format(self, candidate_point))
+        next_point_in_cluster = self.next_point_in_cluster()
+        next_value = self.value_at(next_point_in_cluster)
+        return (next_point_in_cluster, next_value)
 
-            if self.partition.is_member(candidate_point, self.cluster_index):
-                # found a member of the cluster
-                next_point_in_cluster = candidate_point
-                break
+    def next_point_in_cluster(self):
+        '''
+        The next point in the iteration of the members of the cluster. The partition knows the
+        members, so only the members are visited.
+        '''
+        cluster_points = self.partition.cluster_points(self.cluster_index)
 
-            # the point was not in the cluster, try with next candidate
+        if self.point_index >= len(cluster_points):
+            # reached the end, no more points to iterate
+            # stop iteration, but allow reuse of iterator from start again
+            self.point_index = 0
+            raise StopIteration
 
-        next_value = self.value_at(next_point_in_cluster)
-        return (next_point_in_cluster, next_value)
+        next_point_in_cluster = cluster_points[self.point_index]
+        self.point_index += 1
+        return next_point_in_cluster
 
     def __str__(self):
         '''
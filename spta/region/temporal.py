@@ -109,7 +109,7 @@ class SpatioTemporalRegion(DomainRegion):
             # calculate the centroid, ugly but works...
             from . import centroid
             centroid_calc = centroid.CalculateCentroid(distance_measure)
-            self.centroid, _ = centroid_calc.find_centroid_and_cost(self)
+            self.centroid, _ = centroid_calc.find_centroid_and_distances(self)
             return self.centroid
 
     def has_centroid(self):
@@ -371,24 +371,9 @@ class SpatioTemporalCluster(SpatialCluster, SpatioTemporalDecorator):
     @property
     def all_point_indices(self):
         '''
-        Returns an array containing all indices in this cluster.
+        Returns an array containing all indices in this cluster, the array is read-only.
         '''
-
-        # these are all the point indices in the region (not this cluster!)
-        all_point_indices_region = np.arange(self.x_len * self.y_len)
-
-        # ask the partition for the membership of these points
-        memberships = self.partition.membership_of_point_indices(all_point_indices_region)
-
-        # now filter for this cluster, note that where requires numpy array, and returns 2 tuples
-        point_indices_cluster = np.where(np.array(memberships) == self.cluster_index)[0]
-        return point_indices_cluster
-
-        # all_point_indices = np.zeros(self.cluster_len, dtype=np.uint32)
-        # for i, (point, _) in enumerate(self):
-        #     all_point_indices[i] = point.x * self.y_len + point.y
-
-        # return all_point_indices
+        return self.partition.cluster_point_indices(self.cluster_index)
 
     def __next__(self):
         '''
@@ -396,26 +381,7 @@ class SpatioTemporalCluster(SpatialCluster, SpatioTemporalDecorator):
         by this iterator!
         The iterator returns the tuple (Point, series) for each point.
         '''
-        while True:
-
-            # use the base iterator to get next candidate point in region
-            # when the base iterator stops, we also stop
-            try:
-                candidate_point = DomainRegion.__next__(self)
-            except StopIteration:
-                # self.logger.debug('Base region iteration stopped')
-                raise
-
-            # self.logger.debug('{}: candidate = {}'.format(self, candidate_point))
-
-            # the partition knows which cluster(s) the point belongs to
-            if self.partition.is_member(candidate_point, self.cluster_index):
-                # found a member of the cluster, will be returned
-                next_point_in_cluster = candidate_point
-                break
-
-            # the point was not in the cluster, try with next candidate
-
+        next_point_in_cluster = self.next_point_in_cluster()
         next_value = self.series_at(next_point_in_cluster)
         return (next_point_in_cluster, next_value)
 
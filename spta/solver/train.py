@@ -40,7 +40,8 @@ class SolverTrainer(log_util.LoggerMixin):
         # use pre-computed distance matrix
         # TODO this code is broken if we don't use DTW
         self.distance_measure.load_distance_matrix_2d(self.region_metadata.distances_filename,
-                                                      self.region_metadata.region)
+                                                      self.region_metadata.region,
+                                                      mmap_mode='r')
 
         # clustering algorithm to use
         clustering_factory = ClusteringFactory(self.distance_measure)
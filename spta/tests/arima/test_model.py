@@ -0,0 +1,86 @@
+'''
+Unit tests for spta.arima.model module.
+'''
+
+import numpy as np
+import pickle
+import unittest
+import warnings
+
+from statsmodels.tsa.arima.model import ARIMA
+
+from spta.arima import ArimaPDQ
+from spta.arima.model import CompactArimaResults, ModelRegionArima, arima_order
+from spta.arima.train import TrainerArimaPDQ
+from spta.region.temporal import SpatioTemporalRegion
+
+
+class TestCompactArimaResults(unittest.TestCase):
+    '''
+    Unit tests for model.CompactArimaResults class.
+    '''
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.series = np.cumsum(random_state.randn(60)) * 0.3 + 5
+
+    def fit(self, order):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return ARIMA(self.series, order=order, seasonal_order=(0, 0, 0, 0)).fit()
+
+    def test_forecast_same_as_statsmodels(self):
+
+        for order in ((1, 0, 0), (2, 0, 1), (1, 1, 1), (0, 2, 2)):
+
+            # given a fitted ARIMA model
+            fitted_model = self.fit(order)
+
+            # when
+            compact_model = CompactArimaResults.from_results(fitted_model)
+
+            # then the forecast is the same
+            np.testing.assert_array_almost_equal(compact_model.forecast(8),
+                                                 fitted_model.forecast(8))
+            self.assertEqual(arima_order(compact_model), order)
+            self.assertAlmostEqual(compact_model.aic, fitted_model.aic)
+
+    def test_pickle_is_smaller(self):
+
+        # given
+        fitted_model = self.fit((1, 1, 1))
+
+        # when
+        compact_model = CompactArimaResults.from_results(fitted_model)
+
+        # then
+        self.assertLess(len(pickle.dumps(compact_model)) * 20, len(pickle.dumps(fitted_model)))
+
+
+class TestModelRegionArima(unittest.TestCase):
+    '''
+    Unit tests for model.ModelRegionArima class.
+    '''
+
+    def test_pickle_replicated_models(self):
+
+        # given an ARIMA model trained at a single point, replicated over the region
+        random_state = np.random.RandomState(0)
+        training_region = SpatioTemporalRegion(np.cumsum(random_state.randn(40, 1, 1), axis=0))
+        trainer = TrainerArimaPDQ(ArimaPDQ(1, 0, 0), 1, 1)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            model = trainer.apply_to(training_region).as_numpy[0, 0]
+
+        models_np = np.empty((20, 20), dtype=object)
+        models_np.fill(model)
+        model_region = ModelRegionArima(models_np)
+
+        # when
+        pickled = pickle.dumps(model_region)
+        model_region_loaded = pickle.loads(pickled)
+
+        # then the model is stored once and is still shared
+        self.assertIsInstance(model, CompactArimaResults)
+        self.assertLess(len(pickled), len(pickle.dumps(model)) + 10 * 400)
+        self.assertIs(model_region_loaded.as_numpy[0, 0], model_region_loaded.as_numpy[19, 19])
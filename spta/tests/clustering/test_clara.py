@@ -0,0 +1,57 @@
+'''
+Unit tests for spta.clustering.clara module.
+'''
+
+import numpy as np
+import unittest
+
+from spta.clustering.clara import ClaraClusteringMetadata, ClaransClusteringMetadata
+from spta.clustering.factory import ClusteringFactory
+from spta.distance.dtw import DistanceByDTW
+from spta.region.partition import PartitionRegionCrisp
+from spta.region.temporal import SpatioTemporalRegion
+
+
+class TestClaraClusteringAlgorithms(unittest.TestCase):
+    '''
+    Unit tests for clara.ClaraClusteringAlgorithm and clara.ClaransClusteringAlgorithm.
+    '''
+
+    def setUp(self):
+        # three well separated groups of series, one group per row of the region
+        np.random.seed(0)
+        offsets = np.repeat([0, 10, 20], 5).reshape((1, 3, 5))
+        self.spt_region = SpatioTemporalRegion(np.random.rand(12, 3, 5) + offsets)
+        self.factory = ClusteringFactory(DistanceByDTW())
+
+    def assert_partition_matches_groups(self, partition):
+        # the partition has k distinct medoids, one in each group
+        self.assertIsInstance(partition, PartitionRegionCrisp)
+        self.assertEqual(len(set(partition.medoids)), 3)
+        self.assertEqual(sorted(medoid.x for medoid in partition.medoids), [0, 1, 2])
+
+        # each point is in the cluster of the medoid of its group
+        for medoid in partition.medoids:
+            cluster_index = partition.membership_of_points([medoid])[0]
+            members = partition.numpy_dataset[medoid.x]
+            np.testing.assert_array_equal(members, np.repeat(cluster_index, 5))
+
+    def test_partition_clara(self):
+        # given
+        metadata = ClaraClusteringMetadata(3, num_samples=3, sample_size=10, verbose=False)
+
+        # when
+        partition = self.factory.instance(metadata).partition(self.spt_region)
+
+        # then
+        self.assert_partition_matches_groups(partition)
+
+    def test_partition_clarans(self):
+        # given
+        metadata = ClaransClusteringMetadata(3, num_local=2, max_neighbor=30, verbose=False)
+
+        # when
+        partition = self.factory.instance(metadata).partition(self.spt_region)
+
+        # then
+        self.assert_partition_matches_groups(partition)
@@ -0,0 +1,80 @@
+'''
+Unit tests for spta.clustering.dbscan module.
+'''
+
+import numpy as np
+import unittest
+
+from spta.clustering.dbscan import DbscanClusteringMetadata, DbscanClusteringAlgorithm
+from spta.distance.dtw import DistanceByDTW
+from spta.region.temporal import SpatioTemporalRegion
+
+
+class TestDbscanClusteringMetadata(unittest.TestCase):
+    '''
+    Unit tests for dbscan.DbscanClusteringMetadata class.
+    '''
+
+    def test_repr(self):
+
+        # given
+        metadata = DbscanClusteringMetadata(eps=0.5, min_samples=3)
+
+        # when
+        result = repr(metadata)
+
+        # then
+        self.assertEqual(result, 'dbscan_eps0.5_min3')
+
+    def test_from_repr(self):
+
+        # given
+        repr_string = 'dbscan_eps1.5_min4'
+
+        # when
+        metadata = DbscanClusteringMetadata.from_repr(repr_string)
+
+        # then
+        self.assertEqual(metadata.eps, 1.5)
+        self.assertEqual(metadata.min_samples, 4)
+
+    def test_invalid_eps(self):
+
+        # given a non-positive eps, then error
+        with self.assertRaises(ValueError):
+            DbscanClusteringMetadata(eps=0)
+
+
+class TestDbscanClusteringAlgorithm(unittest.TestCase):
+    '''
+    Unit tests for dbscan.DbscanClusteringAlgorithm class.
+    '''
+
+    def setUp(self):
+        # a 2x4 region with two groups of similar series and one outlier
+        random_state = np.random.RandomState(0)
+        low = random_state.rand(4, 10) * 0.1
+        high = 5 + random_state.rand(3, 10) * 0.1
+        outlier = np.full((1, 10), 20.0)
+
+        # the series of point (i, j) is at index i * y_len + j
+        series_2d = np.concatenate((low[:2], high[:2], low[2:], high[2:], outlier))
+        self.spt_region = SpatioTemporalRegion(series_2d.transpose().reshape(10, 2, 4))
+
+    def test_partition_without_matrix(self):
+
+        # given
+        metadata = DbscanClusteringMetadata(eps=1, min_samples=2)
+        algorithm = DbscanClusteringAlgorithm(metadata, DistanceByDTW())
+
+        # when
+        partition = algorithm.partition(self.spt_region)
+
+        # then the outlier is noise (cluster 0), and each group is a cluster
+        expected = np.array([[1, 1, 2, 2],
+                             [1, 1, 2, 0]])
+        np.testing.assert_array_equal(partition.numpy_dataset, expected)
+
+        # then the number of clusters includes the noise group
+        self.assertEqual(partition.k, 3)
+        self.assertEqual(metadata.k, 3)
@@ -2,9 +2,13 @@
 Unit tests for spta.clustering.factory module
 '''
 
+import numpy as np
 import unittest
 
-from spta.clustering.factory import ClusteringMetadataFactory
+from spta.clustering.clara import ClaraClusteringMetadata, ClaransClusteringMetadata
+from spta.clustering.factory import ClusteringFactory, ClusteringMetadataFactory
+from spta.distance.dtw import DistanceByDTW
+from spta.region.temporal import SpatioTemporalRegion
 
 
 class TestClusteringMetadataFactory(unittest.TestCase):
@@ -63,3 +67,93 @@ class TestClusteringMetadataFactory(unittest.TestCase):
         self.assertEqual(metadata.mode, 'lite')
         self.assertEqual(metadata.max_iter, 5000)
 
+
+    def test_build_clara(self):
+        # given
+        name = 'clara'
+        k = 3
+
+        # when building CLARA metadata, as in a suite
+        metadata = self.factory.instance(name, k, random_seed=2, num_samples=4)
+
+        # then type, name, k and the default sample size match
+        self.assertEqual(metadata.__class__.__name__, 'ClaraClusteringMetadata')
+        self.assertEqual(metadata.name, 'clara')
+        self.assertEqual(metadata.k, 3)
+        self.assertEqual(metadata.sample_size, 46)
+        self.assertEqual(repr(metadata), 'clara_k3_seed2_n4_s46')
+
+    def test_from_repr_clara(self):
+        # when
+        metadata = self.factory.from_repr('clara_k3_seed2_n4_s100')
+
+        # then
+        self.assertEqual(metadata.__class__.__name__, 'ClaraClusteringMetadata')
+        self.assertEqual(metadata.num_samples, 4)
+        self.assertEqual(metadata.sample_size, 100)
+
+    def test_from_repr_clarans(self):
+        # when
+        metadata = self.factory.from_repr('clarans_k3_seed2_l4_mn300')
+
+        # then
+        self.assertEqual(metadata.__class__.__name__, 'ClaransClusteringMetadata')
+        self.assertEqual(metadata.k, 3)
+        self.assertEqual(metadata.random_seed, 2)
+        self.assertEqual(metadata.num_local, 4)
+        self.assertEqual(metadata.max_neighbor, 300)
+        self.assertEqual(repr(metadata), 'clarans_k3_seed2_l4_mn300')
+
+    def test_from_repr_kfuzzy(self):
+        # when
+        metadata = self.factory.from_repr('kfuzzy_k3_m1.5_seed2_th0.1')
+
+        # then
+        self.assertEqual(metadata.__class__.__name__, 'KmedoidsFuzzyClusteringMetadata')
+        self.assertEqual(metadata.k, 3)
+        self.assertEqual(metadata.m, 1.5)
+        self.assertEqual(metadata.random_seed, 2)
+        self.assertEqual(metadata.threshold, 0.1)
+        self.assertIsNone(metadata.num_candidates)
+        self.assertEqual(repr(metadata), 'kfuzzy_k3_m1.5_seed2_th0.1')
+
+    def test_from_repr_dbscan(self):
+        # when
+        metadata = self.factory.from_repr('dbscan_eps0.25_min4')
+
+        # then
+        self.assertEqual(metadata.__class__.__name__, 'DbscanClusteringMetadata')
+        self.assertEqual(metadata.eps, 0.25)
+        self.assertEqual(metadata.min_samples, 4)
+        self.assertEqual(repr(metadata), 'dbscan_eps0.25_min4')
+
+
+class TestClusteringFactory(unittest.TestCase):
+    '''
+    Unit tests for ClusteringFactory
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+        self.spt_region = SpatioTemporalRegion(np.random.rand(10, 4, 5))
+        self.factory = ClusteringFactory(DistanceByDTW())
+
+    def test_partition_clara(self):
+        # given
+        metadata = ClaraClusteringMetadata(3, num_samples=2, verbose=False)
+
+        # when partitioning with the algorithm of the factory
+        partition = self.factory.instance(metadata).partition(self.spt_region)
+
+        # then
+        self.assertEqual(len(partition.medoids), 3)
+
+    def test_partition_clarans(self):
+        # given
+        metadata = ClaransClusteringMetadata(3, max_neighbor=20, verbose=False)
+
+        # when partitioning with the algorithm of the factory
+        partition = self.factory.instance(metadata).partition(self.spt_region)
+
+        # then
+        self.assertEqual(len(partition.medoids), 3)
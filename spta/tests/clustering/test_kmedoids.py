@@ -2,9 +2,13 @@
 Unit tests for spta.clustering.kmedoids module.
 '''
 
+import numpy as np
 import unittest
 
-from spta.clustering.kmedoids import KmedoidsClusteringMetadata
+from spta.clustering.kmedoids import KmedoidsClusteringMetadata, KmedoidsClusteringAlgorithm
+from spta.clustering.kmedoids import data_hash_cache, distance_measure_key
+from spta.distance.dtw import DistanceByDTW, DistanceBySpatialDTW
+from spta.region.temporal import SpatioTemporalRegion
 
 
 class TestKmedoidsClusteringMetadata(unittest.TestCase):
@@ -91,6 +95,19 @@ class TestKmedoidsClusteringMetadata(unittest.TestCase):
         self.assertEqual(instance.random_seed, 0)
         self.assertEqual(instance.mode, 'lite')
 
+    def test_repr_from_repr_warm_start(self):
+        # given
+        metadata = KmedoidsClusteringMetadata(4, random_seed=2, warm_start=True)
+
+        # when
+        r = '{!r}'.format(metadata)
+        instance = KmedoidsClusteringMetadata.from_repr(r)
+
+        # then
+        self.assertEqual('kmedoids_k4_seed2_lite_ws', r)
+        self.assertTrue(instance.warm_start)
+        self.assertEqual(instance.mode, 'lite')
+
     def test_from_classifier_label_k13_seed0(self):
         # given
         classifier_label = '13-0-6'
@@ -103,3 +120,61 @@ class TestKmedoidsClusteringMetadata(unittest.TestCase):
         self.assertEqual(instance.k, 13)
         self.assertEqual(instance.random_seed, 0)
         self.assertEqual(instance.mode, 'lite')
+
+
+class TestKmedoidsClusteringAlgorithm(unittest.TestCase):
+    '''
+    Unit tests for spta.clustering.kmedoids.KmedoidsClusteringAlgorithm.
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+        self.spt_region = SpatioTemporalRegion(np.random.rand(10, 4, 5))
+        self.distance_measure = DistanceByDTW()
+        self.distance_measure.compute_distance_matrix(self.spt_region)
+
+    def test_warm_start_same_result_in_any_order(self):
+        # given warm-started algorithms for k=3 and k=4
+        algorithms = [
+            KmedoidsClusteringAlgorithm(KmedoidsClusteringMetadata(k, warm_start=True,
+                                                                   verbose=False),
+                                        self.distance_measure)
+            for k in (3, 4)
+        ]
+
+        # when running k=4 directly (chain from k=2), then k=3 and k=4 again
+        partition_k4_first = algorithms[1].partition(self.spt_region)
+        algorithms[0].partition(self.spt_region)
+        partition_k4 = algorithms[1].partition(self.spt_region)
+
+        # then the result does not depend on the order
+        self.assertEqual(len(partition_k4.medoids), 4)
+        self.assertEqual(partition_k4_first.medoids, partition_k4.medoids)
+
+    def test_warm_start_data_hash_once_per_region(self):
+        # given warm-started algorithms for k=3 and k=4
+        algorithms = [
+            KmedoidsClusteringAlgorithm(KmedoidsClusteringMetadata(k, warm_start=True,
+                                                                   verbose=False),
+                                        self.distance_measure)
+            for k in (3, 4)
+        ]
+
+        # when
+        for algorithm in algorithms:
+            algorithm.partition(self.spt_region)
+
+        # then the hash of the region was computed once and shared
+        self.assertIn(self.spt_region, data_hash_cache)
+        self.assertEqual(algorithms[0].data_hash, data_hash_cache[self.spt_region])
+        self.assertEqual(algorithms[1].data_hash, data_hash_cache[self.spt_region])
+
+    def test_warm_start_key_includes_measure_parameters(self):
+        # given spatial DTW with different weights, all represented as 'dtw'
+        measures = [DistanceByDTW(), DistanceBySpatialDTW(0.5), DistanceBySpatialDTW(1.0)]
+
+        # when
+        keys = [distance_measure_key(measure) for measure in measures]
+
+        # then the warm start medoids are not shared among them
+        self.assertEqual(len(set(keys)), 3)
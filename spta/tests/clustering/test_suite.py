@@ -2,13 +2,17 @@
 Unit tests for spta.clustering.suite module.
 '''
 
+import numpy as np
 import unittest
 
 from spta.region import Region, Point
 from spta.region.metadata import SpatioTemporalRegionMetadata
+from spta.region.temporal import SpatioTemporalRegion
 from spta.distance.dtw import DistanceByDTW
 from spta.clustering.suite import ClusteringSuite, OrganizeClusteringSuite, FindSuiteElbow
+from spta.clustering.suite import ClusteringSuiteExecutor
 from spta.clustering.kmedoids import KmedoidsClusteringMetadata
+from spta.clustering.dbscan import dbscan_metadata_generator
 
 from spta.tests.stub import stub_clustering
 
@@ -71,6 +75,30 @@ class ClusteringSuiteTest(unittest.TestCase):
         expected = ['regular', 'regular', 'regular']
         self.assertEqual(names_in_list, expected)
 
+    def test_dbscan_list_vary_eps_and_min_samples(self):
+        # given ranges of eps and min_samples for dbscan metadata
+        dbscan_suite = dbscan_metadata_generator(eps_values=[0.5, 0.7], min_samples_values=[3, 5])
+
+        # when
+        dbscan_metadata_list = [metadata for metadata in dbscan_suite]
+
+        # then the list includes the cartesian product of eps and min_samples, k is not iterated
+        reprs_in_list = [repr(metadata) for metadata in dbscan_metadata_list]
+        expected = ['dbscan_eps0.5_min3', 'dbscan_eps0.5_min5', 'dbscan_eps0.7_min3',
+                    'dbscan_eps0.7_min5']
+        self.assertEqual(sorted(reprs_in_list), expected)
+
+    def test_dbscan_single_eps(self):
+        # given a single value of eps for dbscan metadata, with a random seed
+        dbscan_suite = ClusteringSuite('quick', 'dbscan', k=[0], random_seed=1, eps=0.7)
+
+        # when
+        dbscan_metadata_list = [metadata for metadata in dbscan_suite]
+
+        # then the seed is ignored and the default min_samples is used
+        reprs_in_list = [repr(metadata) for metadata in dbscan_metadata_list]
+        self.assertEqual(reprs_in_list, ['dbscan_eps0.7_min5'])
+
     def test_kmedoids_list_vary_k(self):
         # given a range of k for kmedoids metadata
         identifier = 'quick'
@@ -224,6 +252,37 @@ class ClusteringSuiteTest(unittest.TestCase):
         self.assertEqual(suite_result['kmedoids_k3_seed1_lite'][2], Point(48, 89))
 
 
+class TestClusteringSuiteExecutor(unittest.TestCase):
+    '''
+    Unit tests for spta.clustering.suite.ClusteringSuiteExecutor class.
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+        self.spt_region = SpatioTemporalRegion(np.random.rand(10, 4, 5))
+        self.distance_measure = DistanceByDTW()
+        self.distance_measure.compute_distance_matrix(self.spt_region)
+        self.suite = ClusteringSuite('quick', 'kmedoids', k=[2, 3], random_seed=[0, 1],
+                                     verbose=False)
+
+    def test_parallel_same_as_sequential(self):
+        # given
+        sequential = ClusteringSuiteExecutor(self.suite, self.distance_measure, num_proc=1)
+        parallel = ClusteringSuiteExecutor(self.suite, self.distance_measure, num_proc=2)
+
+        # when
+        sequential_partitions = sequential.all_partitions(self.spt_region)
+        parallel_partitions = parallel.all_partitions(self.spt_region)
+
+        # then the partitions are the same, in the order of the suite
+        self.assertEqual(len(parallel_partitions), 4)
+        for (sequential_tuple, parallel_tuple) in zip(sequential_partitions, parallel_partitions):
+            self.assertEqual(repr(sequential_tuple[0]), repr(parallel_tuple[0]))
+            np.testing.assert_array_equal(sequential_tuple[1].numpy_dataset,
+                                          parallel_tuple[1].numpy_dataset)
+            self.assertEqual(sequential_tuple[1].medoids, parallel_tuple[1].medoids)
+
+
 class TestOrganizeClusteringSuite(unittest.TestCase):
     '''
     Unit tests for spta.clustering.suite.OrganizeClusteringSuite
@@ -318,10 +377,10 @@ class TestFindSuiteElbow(unittest.TestCase):
     def test_elbow_only_three_points_elbow_is_middle(self):
 
         # given only three points
-        costs_by_metadata = {
-            KmedoidsClusteringMetadata(2): 7.0,
-            KmedoidsClusteringMetadata(3): 5.0,
-            KmedoidsClusteringMetadata(4): 4.0,
+        costs_by_repr = {
+            repr(KmedoidsClusteringMetadata(2)): 7.0,
+            repr(KmedoidsClusteringMetadata(3)): 5.0,
+            repr(KmedoidsClusteringMetadata(4)): 4.0,
         }
         ordered_metadata_instances = [
             KmedoidsClusteringMetadata(2),
@@ -330,7 +389,8 @@ class TestFindSuiteElbow(unittest.TestCase):
         ]
 
         # when
-        result = self.finds_elbow.find_cost_elbow_given_order(costs_by_metadata, ordered_metadata_instances)
+        result = self.finds_elbow.find_cost_elbow_given_order(costs_by_repr,
+                                                              ordered_metadata_instances)
 
         # then elbow metadata is the middle one
         self.assertEqual(result.k, 3)
@@ -338,12 +398,12 @@ class TestFindSuiteElbow(unittest.TestCase):
     def test_elbow_cubic_function_elbow_is_second_to_last(self):
 
         # given five points following k^3 (d2(k^3)/dk2 = 6k)
-        costs_by_metadata = {
-            KmedoidsClusteringMetadata(2): 8.0,
-            KmedoidsClusteringMetadata(3): 27.0,
-            KmedoidsClusteringMetadata(4): 64.0,
-            KmedoidsClusteringMetadata(5): 125.0,
-            KmedoidsClusteringMetadata(6): 216.0,
+        costs_by_repr = {
+            repr(KmedoidsClusteringMetadata(2)): 8.0,
+            repr(KmedoidsClusteringMetadata(3)): 27.0,
+            repr(KmedoidsClusteringMetadata(4)): 64.0,
+            repr(KmedoidsClusteringMetadata(5)): 125.0,
+            repr(KmedoidsClusteringMetadata(6)): 216.0,
         }
         ordered_metadata_instances = [
             KmedoidsClusteringMetadata(2),
@@ -354,7 +414,8 @@ class TestFindSuiteElbow(unittest.TestCase):
         ]
 
         # when
-        result = self.finds_elbow.find_cost_elbow_given_order(costs_by_metadata, ordered_metadata_instances)
+        result = self.finds_elbow.find_cost_elbow_given_order(costs_by_repr,
+                                                              ordered_metadata_instances)
 
         # then elbow metadata is k = 5 (d2(x^3)/dx2 = 6x, so last value is greatest)
         self.assertEqual(result.k, 5)
@@ -365,18 +426,18 @@ class TestFindSuiteElbow(unittest.TestCase):
         # d(f(k))/dk =  -8k^3 + 144k^2 + 312k - 5000
         # d^2(f(k))/dk^2 = -24 * (k^2 - 12k - 13) = -24 * (k-13)(k+1), max for k = 6
 
-        costs_by_metadata = {
-            KmedoidsClusteringMetadata(2): 10976.0,  # d2 = 792
-            KmedoidsClusteringMetadata(3): 7538.0,  # d2 = 960
-            KmedoidsClusteringMetadata(4): 5056.0,  # d2 = 1080
-            KmedoidsClusteringMetadata(5): 3650.0,  # d2 = 1152
-            KmedoidsClusteringMetadata(6): 3392.0,  # d2 = 1176
-            KmedoidsClusteringMetadata(7): 4306.0,  # d2 = 1152
-            KmedoidsClusteringMetadata(8): 6368.0,  # d2 = 1080
-            KmedoidsClusteringMetadata(9): 9506.0,  # d2 = 960
-            KmedoidsClusteringMetadata(10): 13600.0,  # d2 = 792
-            KmedoidsClusteringMetadata(11): 18482.0,
-            KmedoidsClusteringMetadata(12): 23936.0,
+        costs_by_repr = {
+            repr(KmedoidsClusteringMetadata(2)): 10976.0,  # d2 = 792
+            repr(KmedoidsClusteringMetadata(3)): 7538.0,  # d2 = 960
+            repr(KmedoidsClusteringMetadata(4)): 5056.0,  # d2 = 1080
+            repr(KmedoidsClusteringMetadata(5)): 3650.0,  # d2 = 1152
+            repr(KmedoidsClusteringMetadata(6)): 3392.0,  # d2 = 1176
+            repr(KmedoidsClusteringMetadata(7)): 4306.0,  # d2 = 1152
+            repr(KmedoidsClusteringMetadata(8)): 6368.0,  # d2 = 1080
+            repr(KmedoidsClusteringMetadata(9)): 9506.0,  # d2 = 960
+            repr(KmedoidsClusteringMetadata(10)): 13600.0,  # d2 = 792
+            repr(KmedoidsClusteringMetadata(11)): 18482.0,
+            repr(KmedoidsClusteringMetadata(12)): 23936.0,
         }
         ordered_metadata_instances = [
             KmedoidsClusteringMetadata(k)
@@ -384,7 +445,8 @@ class TestFindSuiteElbow(unittest.TestCase):
         ]
 
         # when
-        result = self.finds_elbow.find_cost_elbow_given_order(costs_by_metadata, ordered_metadata_instances)
+        result = self.finds_elbow.find_cost_elbow_given_order(costs_by_repr,
+                                                              ordered_metadata_instances)
 
         # then elbow metadata is k = 6 per equations above
         self.assertEqual(result.k, 6)
@@ -393,18 +455,18 @@ class TestFindSuiteElbow(unittest.TestCase):
 
         # same as above but we don't have all points
 
-        costs_by_metadata = {
-            KmedoidsClusteringMetadata(2): 10976.0,  # d2 = 792
-            # KmedoidsClusteringMetadata(3): 7538.0,  # d2 = 960
-            KmedoidsClusteringMetadata(4): 5056.0,  # d2 = 1080
-            # KmedoidsClusteringMetadata(5): 3650.0,  # d2 = 1152
-            KmedoidsClusteringMetadata(6): 3392.0,  # d2 = 1176
-            KmedoidsClusteringMetadata(7): 4306.0,  # d2 = 1152
-            KmedoidsClusteringMetadata(8): 6368.0,  # d2 = 1080
-            KmedoidsClusteringMetadata(9): 9506.0,  # d2 = 960
-            # KmedoidsClusteringMetadata(10): 13600.0,  # d2 = 792
-            # KmedoidsClusteringMetadata(11): 18482.0,
-            KmedoidsClusteringMetadata(12): 23936.0,
+        costs_by_repr = {
+            repr(KmedoidsClusteringMetadata(2)): 10976.0,  # d2 = 792
+            # repr(KmedoidsClusteringMetadata(3)): 7538.0,  # d2 = 960
+            repr(KmedoidsClusteringMetadata(4)): 5056.0,  # d2 = 1080
+            # repr(KmedoidsClusteringMetadata(5)): 3650.0,  # d2 = 1152
+            repr(KmedoidsClusteringMetadata(6)): 3392.0,  # d2 = 1176
+            repr(KmedoidsClusteringMetadata(7)): 4306.0,  # d2 = 1152
+            repr(KmedoidsClusteringMetadata(8)): 6368.0,  # d2 = 1080
+            repr(KmedoidsClusteringMetadata(9)): 9506.0,  # d2 = 960
+            # repr(KmedoidsClusteringMetadata(10)): 13600.0,  # d2 = 792
+            # repr(KmedoidsClusteringMetadata(11)): 18482.0,
+            repr(KmedoidsClusteringMetadata(12)): 23936.0,
         }
         ordered_metadata_instances = [
             KmedoidsClusteringMetadata(k)
@@ -412,7 +474,31 @@ class TestFindSuiteElbow(unittest.TestCase):
         ]
 
         # when
-        result = self.finds_elbow.find_cost_elbow_given_order(costs_by_metadata, ordered_metadata_instances)
+        result = self.finds_elbow.find_cost_elbow_given_order(costs_by_repr,
+                                                              ordered_metadata_instances)
 
         # then elbow metadata is k = 6 per equations above
         self.assertEqual(result.k, 6)
+
+    def test_elbow_for_each_seed(self):
+
+        # given a suite with two seeds, where the costs of the same k are different
+        suite = ClusteringSuite('test', 'kmedoids', k=range(2, 6), random_seed=(0, 1))
+        finds_elbow = FindSuiteElbow(suite, None, None)
+        costs_by_repr = {
+            'kmedoids_k2_seed0_lite': 10.0,
+            'kmedoids_k3_seed0_lite': 4.0,
+            'kmedoids_k4_seed0_lite': 3.0,
+            'kmedoids_k5_seed0_lite': 2.0,
+            'kmedoids_k2_seed1_lite': 10.0,
+            'kmedoids_k3_seed1_lite': 9.0,
+            'kmedoids_k4_seed1_lite': 3.0,
+            'kmedoids_k5_seed1_lite': 2.0,
+        }
+
+        # when
+        result = finds_elbow.find_cost_elbow_for_each_kmedoids_seed(costs_by_repr)
+
+        # then each seed has its own elbow
+        self.assertEqual(result[0].k, 3)
+        self.assertEqual(result[1].k, 4)
@@ -0,0 +1,62 @@
+'''
+Unit tests for spta.dataset.temp_brazil module.
+'''
+
+import h5py
+import numpy as np
+import os
+import tempfile
+import unittest
+
+from spta.dataset import temp_brazil
+from spta.region import Region
+
+
+class TestReadHdf5Dataset(unittest.TestCase):
+    '''
+    Unit tests for temp_brazil.read_hdf5_dataset function.
+    '''
+
+    def setUp(self):
+        # a small dataset with 2 years (1979, 1980) at 4 samples per day
+        self.real = np.random.rand(4 * (365 + 366), 6, 5)
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dataset_source = os.path.join(self.tmp_dir.name, 'dataset.hdf')
+        with h5py.File(self.dataset_source, 'w') as f:
+            f.create_dataset('real', data=self.real, chunks=(100, 2, 2))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_read_entire_coordinates(self):
+        # when
+        result = temp_brazil.read_hdf5_dataset(10, 20, self.dataset_source)
+
+        # then
+        np.testing.assert_array_equal(result, self.real[10:20])
+
+    def test_read_region(self):
+        # given
+        region = Region(1, 4, 2, 5)
+
+        # when
+        result = temp_brazil.read_hdf5_dataset(10, 20, self.dataset_source, region)
+
+        # then only the region is read
+        self.assertEqual(result.shape, (10, 3, 3))
+        np.testing.assert_array_equal(result, self.real[10:20, 1:4, 2:5])
+
+    def test_read_region_by_year(self):
+        # given
+        region = Region(0, 2, 0, 1)
+
+        # when
+        result = temp_brazil.read_hdf5_dataset_by_year(1980, 1980, self.dataset_source, region)
+
+        # then the second year
+        np.testing.assert_array_equal(result, self.real[(4 * 365):, 0:2, 0:1])
+
+    def test_read_missing_dataset(self):
+        with self.assertRaises(ValueError):
+            temp_brazil.read_hdf5_dataset(0, 10, 'missing.hdf')
@@ -0,0 +1,106 @@
+'''
+Unit tests for spta.distance.condensed module.
+'''
+
+import numpy as np
+import os
+import tempfile
+import unittest
+
+from spta.distance.condensed import CondensedDistanceMatrix, condensed_len, n_from_condensed_len
+from spta.region import Region
+from spta.region.centroid import CalculateCentroid
+from spta.region import Point
+
+from spta.tests.stub import stub_distance, stub_region
+
+
+class TestCondensedDistanceMatrix(unittest.TestCase):
+    '''
+    Unit tests for condensed.CondensedDistanceMatrix class.
+    '''
+
+    def setUp(self):
+        self.dense = stub_distance.stub_distance_matrix()
+        self.condensed = CondensedDistanceMatrix.from_dense(self.dense)
+
+    def test_condensed_len(self):
+        self.assertEqual(condensed_len(6), 15)
+        self.assertEqual(n_from_condensed_len(15), 6)
+
+    def test_n_from_condensed_len_invalid(self):
+        with self.assertRaises(ValueError):
+            n_from_condensed_len(14)
+
+    def test_from_dense_keeps_upper_triangle(self):
+        # then the first values are the distances of index 0
+        np.testing.assert_array_equal(self.condensed.condensed[0:5], (11, 12, 13, 14, 15))
+        self.assertEqual(self.condensed.shape, (6, 6))
+        self.assertEqual(len(self.condensed.condensed), 15)
+
+    def test_to_dense(self):
+        np.testing.assert_array_equal(self.condensed.to_dense(), self.dense)
+
+    def test_single_value(self):
+        self.assertEqual(self.condensed[3, 1], 5)
+        self.assertEqual(self.condensed[1, 3], 5)
+        self.assertEqual(self.condensed[4, 4], 0)
+
+    def test_row(self):
+        np.testing.assert_array_equal(self.condensed[2], self.dense[2])
+        np.testing.assert_array_equal(self.condensed[-1], self.dense[-1])
+
+    def test_point_to_indices(self):
+        # given indices like in distances_to_point_with_matrix
+        indices = np.array([0, 2, 3, 5])
+
+        # then
+        np.testing.assert_array_equal(self.condensed[2, indices], self.dense[2, indices])
+
+    def test_rows_and_slice(self):
+        # given medoid indices like in kmedoids
+        medoid_indices = [4, 1]
+
+        # when
+        rows = self.condensed[medoid_indices, :]
+
+        # then
+        self.assertEqual(rows.shape, (2, 6))
+        np.testing.assert_array_equal(rows, self.dense[medoid_indices, :])
+
+    def test_fancy_indexing(self):
+        rows = np.array([[0], [3], [5]])
+        cols = np.array([[1, 2, 5]])
+        np.testing.assert_array_equal(self.condensed[rows, cols], self.dense[rows, cols])
+
+    def test_float32(self):
+        condensed32 = CondensedDistanceMatrix.from_dense(self.dense, np.float32)
+        self.assertEqual(condensed32.dtype, np.float32)
+        np.testing.assert_array_equal(condensed32.to_dense(), self.dense)
+
+    def test_save_and_load_distance_matrix(self):
+        # given a condensed matrix saved to a file
+        distance_measure = stub_distance.stub_distance_measure()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'distances.npy')
+            self.condensed.save(filename)
+
+            # when loading it for a 2x3 region
+            loaded = distance_measure.load_distance_matrix_2d(filename, Region(0, 2, 0, 3))
+
+        # then the loaded matrix is condensed
+        self.assertIsInstance(loaded, CondensedDistanceMatrix)
+        np.testing.assert_array_equal(loaded.to_dense(), self.dense)
+
+    def test_centroid_with_condensed(self):
+        # given a condensed distance measure
+        distance_measure = stub_distance.stub_condensed_distance_measure()
+        calculate_centroid = CalculateCentroid(distance_measure)
+        spt_region = stub_region.spatio_temporal_region_stub()
+
+        # when
+        centroid, distances = calculate_centroid.find_centroid_and_distances(spt_region)
+
+        # then index 1 in the matrix has the least distance, so Point(0, 1)
+        self.assertEqual(centroid, Point(0, 1))
+        np.testing.assert_array_equal(distances, self.dense[1])
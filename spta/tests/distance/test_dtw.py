@@ -0,0 +1,133 @@
+'''
+Unit tests for spta.distance.dtw module.
+'''
+
+import numpy as np
+import unittest
+
+from tslearn.metrics import dtw
+
+from spta.distance.dtw import DistanceByDTW, DistanceBySakoeChibaDTW, DistanceByItakuraDTW
+from spta.region import Region
+from spta.region.metadata import SpatioTemporalRegionMetadata
+from spta.region.temporal import SpatioTemporalRegion
+
+
+class TestDistanceByDTW(unittest.TestCase):
+    '''
+    Unit tests for dtw.DistanceByDTW class.
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+        self.X = np.random.rand(6, 8)
+        self.distance_measure = DistanceByDTW()
+
+    def test_compute_distances_to_a_series(self):
+        # when
+        distances = self.distance_measure.compute_distances_to_a_series(self.X[0], self.X)
+
+        # then same as measuring each pair
+        expected = [dtw(self.X[0], other_series) for other_series in self.X]
+        np.testing.assert_array_almost_equal(distances, expected)
+
+    def test_compute_distances_between_blocks(self):
+        # when
+        distances = self.distance_measure.compute_distances_between_blocks(self.X[:2], self.X[2:])
+
+        # then same as measuring each pair
+        self.assertEqual(distances.shape, (2, 4))
+        self.assertAlmostEqual(distances[1, 3], dtw(self.X[1], self.X[5]))
+
+    def test_compute_distances_between_blocks_nan(self):
+        # given a series with NaN in each block
+        first_block = self.X[:2].copy()
+        first_block[0, 3] = np.nan
+        second_block = self.X[2:].copy()
+        second_block[1, 0] = np.nan
+
+        # when
+        distances = self.distance_measure.compute_distances_between_blocks(first_block,
+                                                                           second_block)
+
+        # then NaN for the series with NaN, same as measure
+        self.assertTrue(np.isnan(distances[0]).all())
+        self.assertTrue(np.isnan(distances[:, 1]).all())
+        self.assertAlmostEqual(distances[1, 2], dtw(self.X[1], self.X[4]))
+
+    def test_compute_distance_matrix_sptr(self):
+        # given a region with shape (8, 2, 3)
+        spt_region = SpatioTemporalRegion(self.X.T.reshape((8, 2, 3)))
+
+        # when
+        distance_matrix = self.distance_measure.compute_distance_matrix(spt_region)
+
+        # then point (i, j) is at index i * y_len + j, matrix is symmetric with zero diagonal
+        self.assertEqual(distance_matrix.shape, (6, 6))
+        self.assertAlmostEqual(distance_matrix[4, 1], dtw(self.X[4], self.X[1]))
+        np.testing.assert_array_equal(distance_matrix, distance_matrix.T)
+        np.testing.assert_array_equal(np.diag(distance_matrix), np.zeros(6))
+
+
+class TestConstrainedDTW(unittest.TestCase):
+    '''
+    Unit tests for dtw.DistanceBySakoeChibaDTW and dtw.DistanceByItakuraDTW classes.
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+        self.X = np.random.rand(5, 20)
+
+    def test_sakoe_chiba_measure(self):
+        # given
+        distance_measure = DistanceBySakoeChibaDTW(radius=2)
+
+        # when
+        distance = distance_measure.measure(self.X[0], self.X[1])
+
+        # then same as tslearn with the band, never less than full DTW
+        expected = dtw(self.X[0], self.X[1], global_constraint='sakoe_chiba',
+                       sakoe_chiba_radius=2)
+        self.assertAlmostEqual(distance, expected)
+        self.assertGreaterEqual(distance, dtw(self.X[0], self.X[1]))
+
+    def test_sakoe_chiba_matrix_same_as_measure(self):
+        # given
+        distance_measure = DistanceBySakoeChibaDTW(radius=2)
+
+        # when
+        distance_matrix = distance_measure.compute_distance_matrix(self.X)
+
+        # then
+        expected = distance_measure.measure(self.X[3], self.X[1])
+        self.assertAlmostEqual(distance_matrix[3, 1], expected)
+
+    def test_itakura_matrix_same_as_measure(self):
+        # given
+        distance_measure = DistanceByItakuraDTW(max_slope=1.5)
+
+        # when
+        distance_matrix = distance_measure.compute_distance_matrix(self.X)
+
+        # then
+        expected = dtw(self.X[2], self.X[4], global_constraint='itakura', itakura_max_slope=1.5)
+        self.assertAlmostEqual(distance_matrix[2, 4], expected)
+
+    def test_repr_encodes_window(self):
+        self.assertEqual(repr(DistanceBySakoeChibaDTW(10)), 'dtw_sakoe_chiba_r10')
+        self.assertEqual(repr(DistanceByItakuraDTW(2.0)), 'dtw_itakura_s2')
+        self.assertEqual(repr(DistanceByDTW()), 'dtw')
+
+    def test_distances_filename_for(self):
+        # given
+        region_metadata = SpatioTemporalRegionMetadata('sp_small', Region(40, 50, 50, 60),
+                                                       2015, 2015, 1)
+
+        # when
+        full_filename = region_metadata.distances_filename_for(DistanceByDTW())
+        band_filename = region_metadata.distances_filename_for(DistanceBySakoeChibaDTW(10))
+
+        # then full DTW keeps the original file
+        self.assertEqual(full_filename, region_metadata.distances_filename)
+        self.assertEqual(band_filename,
+                         'raw/distances_sp_small_2015_2015_1spd_scaled_dtw_sakoe_chiba_r10.npy')
@@ -0,0 +1,68 @@
+'''
+Unit tests for spta.distance.dtw_parallel module.
+'''
+
+import numpy as np
+import unittest
+
+from spta.distance.dtw import DistanceByDTW, DistanceBySakoeChibaDTW
+from spta.distance.dtw_parallel import DistanceByDTWParallel
+from spta.region.temporal import SpatioTemporalRegion
+
+
+class TestDistanceByDTWParallel(unittest.TestCase):
+    '''
+    Unit tests for dtw_parallel.DistanceByDTWParallel class.
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+        self.spt_region = SpatioTemporalRegion(np.random.rand(10, 3, 4))
+
+    def test_compute_distance_matrix_sptr(self):
+        # given
+        distance_measure = DistanceByDTWParallel(2)
+
+        # when
+        distance_matrix = distance_measure.compute_distance_matrix(self.spt_region)
+
+        # then same result as the sequential version
+        expected = DistanceByDTW().compute_distance_matrix(self.spt_region)
+        np.testing.assert_array_almost_equal(distance_matrix, expected)
+
+    def test_compute_distance_matrix_series_array(self):
+        # given
+        distance_measure = DistanceByDTWParallel(3)
+        X = self.spt_region.as_2d
+
+        # when
+        distance_matrix = distance_measure.compute_distance_matrix(X)
+
+        # then same result as the sequential version
+        expected = DistanceByDTW().compute_distance_matrix(X)
+        np.testing.assert_array_almost_equal(distance_matrix, expected)
+
+    def test_compute_distance_matrix_sakoe_chiba(self):
+        # given a constrained DTW variant
+        sakoe_chiba = DistanceBySakoeChibaDTW(radius=2)
+        distance_measure = DistanceByDTWParallel(2, sakoe_chiba)
+
+        # when
+        distance_matrix = distance_measure.compute_distance_matrix(self.spt_region)
+
+        # then same result as the sequential version, stored in the file of the variant
+        expected = sakoe_chiba.compute_distance_matrix(self.spt_region)
+        np.testing.assert_array_almost_equal(distance_matrix, expected)
+        self.assertEqual(repr(distance_measure), 'dtw_sakoe_chiba_r2')
+
+    def test_compute_condensed_rows_range(self):
+        # given
+        distance_measure = DistanceByDTWParallel(2)
+        X = self.spt_region.as_2d
+
+        # when only some rows are computed
+        condensed = distance_measure.compute_condensed_rows(X, 3, 7)
+
+        # then same result as the sequential version, only for those rows
+        expected = DistanceByDTW().compute_condensed_rows(X, 3, 7)
+        np.testing.assert_array_almost_equal(condensed, expected)
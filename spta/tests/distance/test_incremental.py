@@ -0,0 +1,183 @@
+'''
+Unit tests for spta.distance.incremental module.
+'''
+
+import numpy as np
+import os
+import tempfile
+import unittest
+
+from spta.distance.condensed import CondensedDistanceMatrix
+from spta.distance.dtw import DistanceByDTW
+from spta.distance.dtw_parallel import DistanceByDTWParallel
+from spta.distance.incremental import DistanceMatrixCheckpoint, extend_distance_matrix
+from spta.region import Region
+from spta.region.temporal import SpatioTemporalRegion
+
+
+class FailingDTW(DistanceByDTW):
+    '''
+    Fails after computing some blocks, to simulate a crash. Counts the computed rows.
+    '''
+
+    def __init__(self, blocks_before_failure=None):
+        super(FailingDTW, self).__init__()
+        self.blocks_before_failure = blocks_before_failure
+        self.computed_rows = []
+
+    def compute_condensed_rows(self, series_2d, row_start, row_end):
+        if self.blocks_before_failure == 0:
+            raise RuntimeError('crash')
+        if self.blocks_before_failure is not None:
+            self.blocks_before_failure -= 1
+
+        self.computed_rows.extend(range(row_start, row_end))
+        return super(FailingDTW, self).compute_condensed_rows(series_2d, row_start, row_end)
+
+
+class TestDistanceMatrixCheckpoint(unittest.TestCase):
+    '''
+    Unit tests for incremental.DistanceMatrixCheckpoint class.
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+        self.X = np.random.rand(9, 12)
+        self.expected = DistanceByDTW().compute_distance_matrix(self.X)
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'distances.npy')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_compute(self):
+        # given
+        checkpoint = DistanceMatrixCheckpoint(self.filename, block_rows=3)
+
+        # when
+        distance_matrix = checkpoint.compute(DistanceByDTW(), self.X)
+
+        # then same as computing the matrix at once
+        np.testing.assert_array_almost_equal(distance_matrix.to_dense(), self.expected)
+
+    def test_compute_parallel(self):
+        # given
+        checkpoint = DistanceMatrixCheckpoint(self.filename, block_rows=3)
+
+        # when each block is computed in parallel
+        distance_matrix = checkpoint.compute(DistanceByDTWParallel(2), self.X)
+
+        # then same as computing the matrix at once
+        np.testing.assert_array_almost_equal(distance_matrix.to_dense(), self.expected)
+
+    def test_resume_after_failure(self):
+        # given a computation that crashed after two blocks
+        checkpoint = DistanceMatrixCheckpoint(self.filename, block_rows=3)
+        with self.assertRaises(RuntimeError):
+            checkpoint.compute(FailingDTW(blocks_before_failure=2), self.X)
+
+        # when computing again
+        distance_measure = FailingDTW()
+        distance_matrix = checkpoint.compute(distance_measure, self.X)
+
+        # then only the remaining rows are computed
+        self.assertEqual(distance_measure.computed_rows, [6, 7])
+        np.testing.assert_array_almost_equal(distance_matrix.to_dense(), self.expected)
+
+    def test_ignore_checkpoint_of_other_shape(self):
+        # given a checkpoint for other data
+        checkpoint = DistanceMatrixCheckpoint(self.filename, block_rows=3)
+        checkpoint.compute(DistanceByDTW(), self.X[:5])
+
+        # when
+        distance_measure = FailingDTW()
+        distance_matrix = checkpoint.compute(distance_measure, self.X)
+
+        # then everything is computed
+        self.assertEqual(distance_measure.computed_rows, list(range(0, 8)))
+        np.testing.assert_array_almost_equal(distance_matrix.to_dense(), self.expected)
+
+    def test_remove(self):
+        # given
+        checkpoint = DistanceMatrixCheckpoint(self.filename, block_rows=3)
+        checkpoint.compute(DistanceByDTW(), self.X)
+
+        # when
+        checkpoint.remove()
+
+        # then
+        self.assertFalse(os.path.isfile(checkpoint.checkpoint_filename))
+        self.assertFalse(os.path.isfile(checkpoint.progress_filename))
+
+
+class TestExtendDistanceMatrix(unittest.TestCase):
+    '''
+    Unit tests for incremental.extend_distance_matrix function.
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+
+        # region (10, 13, 20, 24), shape 3x4
+        self.new_region = Region(10, 13, 20, 24)
+        self.spt_region = SpatioTemporalRegion(np.random.rand(8, 3, 4))
+        self.expected = DistanceByDTW().compute_distance_matrix(self.spt_region)
+
+        # the distances of a smaller region (11, 13, 21, 23) with shape 2x2
+        self.region = Region(11, 13, 21, 23)
+        smaller_spt_region = SpatioTemporalRegion(self.spt_region.as_numpy[:, 1:3, 1:3])
+        self.distance_matrix = DistanceByDTW().compute_distance_matrix(smaller_spt_region)
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'distances_extend.npy')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_extend_distance_matrix(self):
+        # when
+        extended = extend_distance_matrix(DistanceByDTW(), self.distance_matrix, self.region,
+                                          self.spt_region, self.new_region)
+
+        # then same as computing the whole matrix
+        self.assertIsInstance(extended, CondensedDistanceMatrix)
+        np.testing.assert_array_almost_equal(extended.to_dense(), self.expected)
+
+    def test_extend_with_checkpoint_parallel(self):
+        # given
+        checkpoint = DistanceMatrixCheckpoint(self.filename, block_rows=3)
+
+        # when the new rows are computed in parallel, with single precision
+        extended = extend_distance_matrix(DistanceByDTWParallel(2), self.distance_matrix,
+                                          self.region, self.spt_region, self.new_region,
+                                          checkpoint, np.float32)
+
+        # then
+        self.assertEqual(extended.dtype, np.float32)
+        np.testing.assert_array_almost_equal(extended.to_dense(), self.expected, decimal=5)
+
+    def test_extend_resume_after_failure(self):
+        # given an extension that crashed after a block of new rows (8 new points)
+        checkpoint = DistanceMatrixCheckpoint(self.filename, block_rows=3)
+        with self.assertRaises(RuntimeError):
+            extend_distance_matrix(FailingDTW(blocks_before_failure=1), self.distance_matrix,
+                                   self.region, self.spt_region, self.new_region, checkpoint)
+
+        # when extending again
+        distance_measure = FailingDTW()
+        extended = extend_distance_matrix(distance_measure, self.distance_matrix, self.region,
+                                          self.spt_region, self.new_region, checkpoint)
+
+        # then only the remaining new rows are computed
+        self.assertEqual(distance_measure.computed_rows, [3, 4, 5, 6, 7])
+        np.testing.assert_array_almost_equal(extended.to_dense(), self.expected)
+
+    def test_extend_region_not_contained(self):
+        # given a region that is not contained
+        region = Region(9, 11, 21, 23)
+
+        # then
+        with self.assertRaises(ValueError):
+            extend_distance_matrix(DistanceByDTW(), self.distance_matrix, region,
+                                   self.spt_region, self.new_region)
@@ -0,0 +1,70 @@
+'''
+Unit tests for loading pre-computed distance matrices in spta.distance module.
+'''
+
+import numpy as np
+import os
+import tempfile
+import unittest
+
+from spta.distance.condensed import CondensedDistanceMatrix
+from spta.distance.dtw import DistanceBySpatialDTW
+from spta.region import Region
+
+from spta.tests.stub import stub_distance
+
+
+class TestLoadDistanceMatrix(unittest.TestCase):
+    '''
+    Unit tests for DistanceBetweenSeries.load_distance_matrix_2d with mmap_mode.
+    '''
+
+    def setUp(self):
+        self.dense = stub_distance.stub_distance_matrix()
+        self.region = Region(0, 2, 0, 3)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, 'distances.npy')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_dense_mmap(self):
+        # given a dense matrix saved to a file
+        np.save(self.filename, self.dense)
+        distance_measure = stub_distance.stub_distance_measure()
+
+        # when loading it read-only
+        loaded = distance_measure.load_distance_matrix_2d(self.filename, self.region,
+                                                          mmap_mode='r')
+
+        # then the matrix is memory-mapped and cannot be modified
+        self.assertIsInstance(loaded, np.memmap)
+        self.assertFalse(loaded.flags.writeable)
+        np.testing.assert_array_equal(loaded, self.dense)
+
+    def test_load_condensed_mmap(self):
+        # given a condensed matrix saved to a file
+        CondensedDistanceMatrix.from_dense(self.dense).save(self.filename)
+        distance_measure = stub_distance.stub_distance_measure()
+
+        # when loading it read-only
+        loaded = distance_measure.load_distance_matrix_2d(self.filename, self.region,
+                                                          mmap_mode='r')
+
+        # then the condensed array is memory-mapped
+        self.assertIsInstance(loaded.condensed, np.memmap)
+        np.testing.assert_array_equal(loaded[1], self.dense[1])
+
+    def test_load_spatial_dtw_mmap(self):
+        # given a dense matrix saved to a file
+        np.save(self.filename, self.dense)
+        distance_measure = DistanceBySpatialDTW(weight=0.5)
+
+        # when loading it read-only, then weighting it
+        weighted = distance_measure.load_distance_matrix_2d(self.filename, self.region,
+                                                            mmap_mode='r')
+
+        # then the weighted matrix is an in-memory copy, the file is untouched
+        self.assertNotIsInstance(weighted, np.memmap)
+        self.assertGreater(weighted[0, 1], self.dense[0, 1])
+        np.testing.assert_array_equal(np.load(self.filename), self.dense)
@@ -0,0 +1,113 @@
+'''
+Unit tests for spta.distance.nearest module.
+'''
+
+import numpy as np
+import unittest
+
+from tslearn.metrics import dtw
+
+from spta.distance import nearest
+from spta.distance.dtw import DistanceByDTW, DistanceBySakoeChibaDTW
+from spta.distance.rmse import DistanceByRMSE
+
+
+class TestLowerBounds(unittest.TestCase):
+    '''
+    Unit tests for the lower bounds in nearest module.
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+        self.X = np.cumsum(np.random.randn(20, 30), axis=1)
+
+    def test_envelope(self):
+        # given
+        series_block = np.array([[1.0, 3.0, 2.0, 0.0, 5.0]])
+
+        # when
+        (lower, upper) = nearest.envelope(series_block, radius=1)
+
+        # then
+        np.testing.assert_array_equal(lower, [[1, 1, 0, 0, 0]])
+        np.testing.assert_array_equal(upper, [[3, 3, 3, 5, 5]])
+
+    def test_lower_bounds_below_dtw(self):
+        # given
+        query = self.X[0]
+        (lower, upper) = nearest.envelope(self.X, radius=3)
+
+        # when
+        kim = nearest.lb_kim(query, self.X)
+        keogh = nearest.lb_keogh(query, lower, upper)
+
+        # then the bounds never exceed the constrained DTW
+        expected = [
+            dtw(query, series, global_constraint='sakoe_chiba', sakoe_chiba_radius=3)
+            for series in self.X
+        ]
+        self.assertTrue(np.all(kim <= np.array(expected) + 1e-9))
+        self.assertTrue(np.all(keogh <= np.array(expected) + 1e-9))
+
+
+class TestPrunedNearestNeighbors(unittest.TestCase):
+    '''
+    Unit tests for nearest.PrunedNearestNeighbors class.
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+        self.X = np.cumsum(np.random.randn(40, 30), axis=1)
+
+    def test_find_nearest_same_as_all_distances(self):
+        # given
+        distance_measure = DistanceByDTW()
+        nearest_neighbors = nearest.PrunedNearestNeighbors(distance_measure, self.X[1:])
+
+        # when
+        (indices, distances) = nearest_neighbors.find_nearest(self.X[0], k=3)
+
+        # then same as computing all the distances
+        all_distances = distance_measure.compute_distances_to_a_series(self.X[0], self.X[1:])
+        expected = np.argsort(all_distances)[:3]
+        np.testing.assert_array_equal(indices, expected)
+        np.testing.assert_array_almost_equal(distances, all_distances[expected])
+
+    def test_find_nearest_prunes_with_band(self):
+        # given
+        distance_measure = DistanceBySakoeChibaDTW(radius=2)
+        nearest_neighbors = nearest.PrunedNearestNeighbors(distance_measure, self.X)
+
+        # when
+        for query in self.X[:5]:
+            (indices, distances) = nearest_neighbors.find_nearest(query)
+
+        # then the last query is its own nearest, and some distances were not computed
+        self.assertEqual(indices[0], 4)
+        self.assertEqual(distances[0], 0)
+        self.assertEqual(nearest_neighbors.computed + nearest_neighbors.pruned, 5 * 40)
+        self.assertGreater(nearest_neighbors.prune_rate, 0)
+
+    def test_find_nearest_without_lower_bounds(self):
+        # given a measure without lower bounds
+        nearest_neighbors = nearest.PrunedNearestNeighbors(DistanceByRMSE(), self.X)
+
+        # when
+        (indices, _) = nearest_neighbors.find_nearest(self.X[7])
+
+        # then all distances are computed
+        self.assertEqual(indices[0], 7)
+        self.assertEqual(nearest_neighbors.prune_rate, 0)
+
+    def test_find_nearest_skips_nan_candidates(self):
+        # given a candidate with NaN
+        candidates = self.X[:3].copy()
+        candidates[0, 5] = np.nan
+        nearest_neighbors = nearest.PrunedNearestNeighbors(DistanceByDTW(), candidates)
+
+        # when
+        (indices, distances) = nearest_neighbors.find_nearest(self.X[0], k=3)
+
+        # then the NaN candidate is last, with NaN distance
+        self.assertEqual(indices[2], 0)
+        self.assertTrue(np.isnan(distances[2]))
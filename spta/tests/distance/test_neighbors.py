@@ -0,0 +1,84 @@
+'''
+Unit tests for spta.distance.neighbors module.
+'''
+
+import numpy as np
+import unittest
+
+from spta.distance.dtw import DistanceByDTW, DistanceBySakoeChibaDTW
+from spta.distance.neighbors import radius_neighbors_graph
+
+
+class TestRadiusNeighborsGraph(unittest.TestCase):
+    '''
+    Unit tests for neighbors.radius_neighbors_graph function.
+    '''
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.series_2d = random_state.rand(20, 10)
+
+    def expected_graph(self, distance_measure, eps):
+        distance_matrix = distance_measure.compute_distance_matrix(self.series_2d)
+        expected = np.where(distance_matrix <= eps, distance_matrix, 0)
+        np.fill_diagonal(expected, 0)
+        return expected
+
+    def test_graph_without_matrix(self):
+
+        # given a distance measure without distance matrix, and eps below the median distance
+        distance_measure = DistanceByDTW()
+        eps = 0.75
+        expected = self.expected_graph(DistanceByDTW(), eps)
+
+        # when computing the graph in small blocks
+        graph = radius_neighbors_graph(self.series_2d, eps, distance_measure, block_rows=3)
+
+        # then only the distances within eps are stored, and they match DTW
+        np.testing.assert_array_almost_equal(graph.toarray(), expected)
+        self.assertEqual(graph.nnz, np.count_nonzero(expected))
+
+    def test_graph_without_matrix_sakoe_chiba(self):
+
+        # given a constrained DTW, where the lower bounds are tighter
+        distance_measure = DistanceBySakoeChibaDTW(2)
+        eps = 0.75
+        expected = self.expected_graph(DistanceBySakoeChibaDTW(2), eps)
+
+        # when
+        graph = radius_neighbors_graph(self.series_2d, eps, distance_measure, block_rows=3)
+
+        # then
+        np.testing.assert_array_almost_equal(graph.toarray(), expected)
+
+    def test_graph_with_matrix(self):
+
+        # given a distance measure with its distance matrix
+        distance_measure = DistanceByDTW()
+        distance_measure.compute_distance_matrix(self.series_2d)
+        eps = 0.75
+        expected = self.expected_graph(DistanceByDTW(), eps)
+
+        # when
+        graph = radius_neighbors_graph(self.series_2d, eps, distance_measure, block_rows=3)
+
+        # then the distances are read from the matrix
+        np.testing.assert_array_almost_equal(graph.toarray(), expected)
+
+    def test_graph_series_with_nan(self):
+
+        # given series where one has NaN, and another is repeated
+        series_2d = np.array([
+            [0.0, 1.0, 2.0],
+            [0.0, 1.0, 2.0],
+            [np.nan, 1.0, 2.0],
+            [5.0, 5.0, 5.0]
+        ])
+
+        # when
+        graph = radius_neighbors_graph(series_2d, 0.5, DistanceByDTW())
+
+        # then identical series are neighbors with zero distance, NaN has no neighbors
+        self.assertEqual(graph.nnz, 2)
+        self.assertEqual(graph[0, 1], 0)
+        self.assertEqual(graph.getrow(2).nnz, 0)
@@ -0,0 +1,93 @@
+'''
+Unit tests for spta.kmedoids.clara module.
+'''
+
+import numpy as np
+import unittest
+
+from spta.distance.dtw import DistanceByDTW
+from spta.kmedoids.clara import run_clara, run_clarans
+
+
+class TestClara(unittest.TestCase):
+    '''
+    Unit tests for clara.run_clara and clara.run_clarans.
+    '''
+
+    def setUp(self):
+        # three well separated groups of series
+        np.random.seed(0)
+        offsets = np.repeat([0, 10, 20], 20)
+        self.X = np.random.rand(60, 15) + offsets[:, np.newaxis]
+        self.expected_groups = offsets // 10
+        self.distance_measure = DistanceByDTW()
+
+    def assert_partition_matches_groups(self, result):
+        # each medoid is in a different group, and each point is assigned to its group
+        medoid_groups = self.expected_groups[result.medoids]
+        self.assertEqual(sorted(medoid_groups), [0, 1, 2])
+        np.testing.assert_array_equal(medoid_groups[result.labels], self.expected_groups)
+
+    def test_run_clara(self):
+        # when
+        result = run_clara(self.X, 3, self.distance_measure, num_samples=3, sample_size=20,
+                           verbose=False)
+
+        # then
+        self.assertEqual(result.mode, 'clara')
+        self.assert_partition_matches_groups(result)
+        self.assertEqual(result.medoid_distances.shape, (60, 3))
+
+    def test_run_clara_without_computing_matrix(self):
+        # when
+        run_clara(self.X, 3, self.distance_measure, num_samples=2, verbose=False)
+
+        # then the full distance matrix was not computed
+        self.assertFalse(hasattr(self.distance_measure, 'distance_matrix')
+                         and self.distance_measure.distance_matrix is not None)
+
+    def test_run_clarans(self):
+        # when
+        result = run_clarans(self.X, 3, self.distance_measure, num_local=2, max_neighbor=50,
+                             verbose=False)
+
+        # then
+        self.assertEqual(result.mode, 'clarans')
+        self.assert_partition_matches_groups(result)
+
+        # then the total cost is the sum of the distances to the nearest medoids
+        expected_cost = np.sum(np.min(result.medoid_distances, axis=1))
+        self.assertAlmostEqual(result.total_cost, expected_cost)
+
+    def test_run_clara_with_nan(self):
+        # given a series with NaN
+        self.X[5] = np.nan
+
+        # when
+        result = run_clara(self.X, 3, self.distance_measure, num_samples=5, sample_size=20,
+                           verbose=False)
+
+        # then the series with NaN is not a medoid and the cost is finite
+        self.assertNotIn(5, result.medoids)
+        self.assertTrue(np.isfinite(result.total_cost))
+
+        # then the other points are assigned to their groups
+        medoid_groups = self.expected_groups[result.medoids]
+        self.assertEqual(sorted(medoid_groups), [0, 1, 2])
+        others = np.arange(60) != 5
+        np.testing.assert_array_equal(medoid_groups[result.labels][others],
+                                      self.expected_groups[others])
+
+    def test_run_clarans_with_nan(self):
+        # given a series with NaN
+        self.X[5] = np.nan
+
+        # when
+        result = run_clarans(self.X, 3, self.distance_measure, num_local=2, max_neighbor=50,
+                             verbose=False)
+
+        # then the series with NaN is not a medoid and the cost is finite
+        self.assertNotIn(5, result.medoids)
+        self.assertTrue(np.isfinite(result.total_cost))
+        medoid_groups = self.expected_groups[result.medoids]
+        self.assertEqual(sorted(medoid_groups), [0, 1, 2])
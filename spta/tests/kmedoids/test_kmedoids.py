@@ -0,0 +1,123 @@
+'''
+Unit tests for spta.kmedoids.kmedoids module.
+'''
+
+import numpy as np
+import unittest
+
+from spta.distance.dtw import DistanceByDTW
+from spta.kmedoids.kmedoids import NearestMedoids, add_medoid_greedy, run_kmedoids
+
+
+def total_cost(distance_matrix, medoid_indices):
+    return np.sum(np.min(distance_matrix[medoid_indices, :], axis=0))
+
+
+class TestNearestMedoids(unittest.TestCase):
+    '''
+    Unit tests for kmedoids.NearestMedoids.
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+        points = np.random.rand(30, 2)
+        self.distance_matrix = np.linalg.norm(points[:, np.newaxis] - points[np.newaxis],
+                                              axis=2)
+
+    def test_swap_delta(self):
+        # given
+        medoid_indices = [3, 10, 22]
+        nearest_medoids = NearestMedoids(self.distance_matrix[medoid_indices, :].transpose())
+
+        for j in range(0, 3):
+            for candidate in [0, 5, 17, 29]:
+
+                # when
+                delta = nearest_medoids.swap_delta(j, self.distance_matrix[candidate])
+
+                # then the delta is the difference of total costs
+                swapped_indices = list(medoid_indices)
+                swapped_indices[j] = candidate
+                expected = total_cost(self.distance_matrix, swapped_indices) - \
+                    total_cost(self.distance_matrix, medoid_indices)
+                self.assertAlmostEqual(delta, expected)
+
+
+class TestRunKmedoids(unittest.TestCase):
+    '''
+    Unit tests for kmedoids.run_kmedoids.
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+        self.X = np.cumsum(np.random.rand(40, 20) - 0.5, axis=1)
+        self.distance_measure = DistanceByDTW()
+        self.distance_measure.distance_matrix = \
+            self.distance_measure.compute_distance_matrix_series_array(self.X)
+
+    def test_robust_is_local_minimum(self):
+        # when
+        result = run_kmedoids(self.X, 3, self.distance_measure, random_seed=1, mode='robust',
+                              verbose=False)
+
+        # then no single swap reduces the total cost
+        medoid_indices = list(result.medoids)
+        for j in range(0, 3):
+            for candidate in range(0, len(self.X)):
+                swapped_indices = list(medoid_indices)
+                swapped_indices[j] = candidate
+                swapped_cost = total_cost(self.distance_measure.distance_matrix, swapped_indices)
+                self.assertGreater(swapped_cost, result.total_cost - 0.001)
+
+    def test_result_without_distance_matrix(self):
+        # given the same measure without the distance matrix
+        result_with_matrix = run_kmedoids(self.X, 3, self.distance_measure, random_seed=1,
+                                          verbose=False)
+
+        # when
+        result = run_kmedoids(self.X, 3, DistanceByDTW(), random_seed=1, verbose=False)
+
+        # then the result is the same
+        self.assertEqual(list(result.medoids), list(result_with_matrix.medoids))
+        np.testing.assert_array_equal(result.labels, result_with_matrix.labels)
+        np.testing.assert_array_almost_equal(result.medoid_distances,
+                                             result_with_matrix.medoid_distances)
+        self.assertAlmostEqual(result.total_cost, result_with_matrix.total_cost)
+
+    def test_robust_result_without_distance_matrix(self):
+        # given more than two medoids, so that some distances to the medoids are pruned
+        result_with_matrix = run_kmedoids(self.X, 5, self.distance_measure, random_seed=1,
+                                          mode='robust', verbose=False)
+
+        # when
+        result = run_kmedoids(self.X, 5, DistanceByDTW(), random_seed=1, mode='robust',
+                              verbose=False)
+
+        # then the swaps are the same, and the result includes all the distances
+        self.assertEqual(list(result.medoids), list(result_with_matrix.medoids))
+        np.testing.assert_array_equal(result.labels, result_with_matrix.labels)
+        np.testing.assert_array_almost_equal(result.costs, result_with_matrix.costs)
+        np.testing.assert_array_almost_equal(result.medoid_distances,
+                                             result_with_matrix.medoid_distances)
+
+    def test_add_medoid_greedy_with_matrix(self):
+        # given
+        medoid_indices = [3, 10]
+
+        # when
+        new_medoid_indices = add_medoid_greedy(self.X, medoid_indices, self.distance_measure)
+
+        # then the new medoid is the point that reduces the total cost the most
+        costs = [
+            total_cost(self.distance_measure.distance_matrix, medoid_indices + [candidate])
+            for candidate in range(0, len(self.X))
+        ]
+        self.assertEqual(new_medoid_indices, [3, 10, int(np.argmin(costs))])
+
+    def test_add_medoid_greedy_without_matrix(self):
+        # when
+        new_medoid_indices = add_medoid_greedy(self.X, [3, 10], DistanceByDTW(), random_seed=0)
+
+        # then a point that is not a medoid is added
+        self.assertEqual(len(new_medoid_indices), 3)
+        self.assertNotIn(new_medoid_indices[2], [3, 10])
@@ -0,0 +1,110 @@
+'''
+Unit tests for spta.kmedoids.kmedoids_fuzzy module.
+'''
+
+import numpy as np
+import unittest
+
+from spta.distance.dtw import DistanceByDTW
+from spta.kmedoids.kmedoids_fuzzy import fcm_membership, run_kmedoids_fuzzy
+
+
+class TestFcmMembership(unittest.TestCase):
+    '''
+    Unit tests for kmedoids_fuzzy.fcm_membership.
+    '''
+
+    def test_fcm_membership(self):
+        # given the distances of three points to two medoids, the first point is a medoid
+        dist_mat = np.array([[0.0, 2.0],
+                             [1.0, 3.0],
+                             [2.0, 2.0]])
+
+        # when
+        uij = fcm_membership(dist_mat, m=2)
+
+        # then the memberships are inversely proportional to the distances (m=2)
+        expected = np.array([[1.0, 0.0],
+                             [0.75, 0.25],
+                             [0.5, 0.5]])
+        np.testing.assert_array_almost_equal(uij, expected)
+
+
+class TestRunKmedoidsFuzzy(unittest.TestCase):
+    '''
+    Unit tests for kmedoids_fuzzy.run_kmedoids_fuzzy.
+    '''
+
+    def setUp(self):
+        # three well separated groups of series
+        np.random.seed(0)
+        offsets = np.repeat([0, 10, 20], 20)
+        self.X = np.random.rand(60, 15) + offsets[:, np.newaxis]
+        self.expected_groups = offsets // 10
+        self.distance_measure = DistanceByDTW()
+
+    def test_run_kmedoids_fuzzy(self):
+        # when
+        result = run_kmedoids_fuzzy(self.X, 3, 2, self.distance_measure, random_seed=1,
+                                    verbose=False)
+
+        # then each medoid is in a different group, and each point has the highest membership
+        # to the cluster of its group
+        medoid_groups = self.expected_groups[result.medoids]
+        self.assertEqual(sorted(medoid_groups), [0, 1, 2])
+        best_clusters = np.argmax(result.uij, axis=1)
+        np.testing.assert_array_equal(medoid_groups[best_clusters], self.expected_groups)
+        np.testing.assert_array_almost_equal(np.sum(result.uij, axis=1), np.ones(60))
+
+    def test_run_kmedoids_fuzzy_with_matrix(self):
+        # given the distance matrix, the same medoids are found with all the candidates
+        result_without_matrix = run_kmedoids_fuzzy(self.X, 3, 2, self.distance_measure,
+                                                   random_seed=1, verbose=False,
+                                                   num_candidates=60)
+        self.distance_measure.compute_distance_matrix(self.X)
+
+        # when
+        result = run_kmedoids_fuzzy(self.X, 3, 2, self.distance_measure, random_seed=1,
+                                    verbose=False)
+
+        # then
+        self.assertEqual(result.medoids, result_without_matrix.medoids)
+        self.assertAlmostEqual(result.total_cost, result_without_matrix.total_cost)
+
+    def test_run_kmedoids_fuzzy_with_nan(self):
+        # given a series with NaN
+        self.X[5] = np.nan
+
+        # when
+        result = run_kmedoids_fuzzy(self.X, 3, 2, self.distance_measure, random_seed=1,
+                                    verbose=False)
+
+        # then the series with NaN is not a medoid and the cost is finite
+        self.assertNotIn(5, result.medoids)
+        self.assertEqual(len(set(result.medoids)), 3)
+        self.assertTrue(np.isfinite(result.total_cost))
+
+        # then the other points have the highest membership to the cluster of their group,
+        # and the series with NaN is assigned to a single cluster
+        medoid_groups = self.expected_groups[result.medoids]
+        self.assertEqual(sorted(medoid_groups), [0, 1, 2])
+        best_clusters = np.argmax(result.uij, axis=1)
+        others = np.arange(60) != 5
+        np.testing.assert_array_equal(medoid_groups[best_clusters][others],
+                                      self.expected_groups[others])
+        self.assertEqual(sorted(result.uij[5]), [0, 0, 1])
+
+    def test_run_kmedoids_fuzzy_with_nan_and_matrix(self):
+        # given a series with NaN and the distance matrix
+        self.X[5] = np.nan
+        self.distance_measure.compute_distance_matrix(self.X)
+
+        # when
+        result = run_kmedoids_fuzzy(self.X, 3, 2, self.distance_measure, random_seed=1,
+                                    verbose=False)
+
+        # then
+        self.assertNotIn(5, result.medoids)
+        self.assertEqual(len(set(result.medoids)), 3)
+        self.assertTrue(np.isfinite(result.total_cost))
+        np.testing.assert_array_almost_equal(np.sum(result.uij, axis=1), np.ones(60))
@@ -0,0 +1,193 @@
+'''
+Unit tests for spta.model.error module.
+'''
+
+import numpy as np
+import unittest
+
+from spta.model.error import MeasureForecastingError, OverallErrorForEachForecast, \
+    get_error_func, get_overall_error_func, overall_errors_for_each_forecast
+from spta.model.error_parallel import ParallelForecastError, forecast_ranges
+from spta.model.train import SplitTrainingAndTestLast
+from spta.region import Point
+from spta.region.function import FunctionRegionScalar
+from spta.region.partition import PartitionRegionCrisp
+from spta.region.scaling import ScaleFunction
+from spta.region.temporal import SpatioTemporalRegion
+
+
+class TestMeasureForecastingError(unittest.TestCase):
+    '''
+    Unit tests for error.MeasureForecastingError class.
+    '''
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.forecast_region = SpatioTemporalRegion(random_state.rand(4, 2, 3) + 1)
+        self.observation_region = SpatioTemporalRegion(random_state.rand(4, 2, 3) + 1)
+        self.training_region = SpatioTemporalRegion(random_state.rand(10, 2, 3))
+
+    def errors_at_each_point(self, error_type, forecast_region):
+        # the errors computed at each point, with the default FunctionRegionScalar behavior
+        measure_error = MeasureForecastingError(get_error_func(error_type),
+                                                self.observation_region, self.training_region)
+        return FunctionRegionScalar.apply_to(measure_error, forecast_region)
+
+    def test_apply_to_region(self):
+
+        for error_type in ('MASE', 'sMAPE', 'MSE'):
+
+            # given
+            measure_error = MeasureForecastingError(get_error_func(error_type),
+                                                    self.observation_region,
+                                                    self.training_region)
+            expected = self.errors_at_each_point(error_type, self.forecast_region)
+
+            # when
+            error_region = measure_error.apply_to(self.forecast_region)
+
+            # then the errors of all the points at once match the errors at each point
+            np.testing.assert_array_almost_equal(error_region.as_numpy, expected.as_numpy)
+
+    def test_apply_to_cluster(self):
+
+        # given a forecast for the members of a cluster
+        members = np.array([1, 0, 1, 1, 0, 0])
+        partition = PartitionRegionCrisp.from_membership_array(members, 2, 3)
+        (_, cluster1) = partition.create_all_spt_clusters(self.forecast_region)
+
+        measure_error = MeasureForecastingError(get_error_func('MASE'),
+                                                self.observation_region, self.training_region)
+        expected = self.errors_at_each_point('MASE', cluster1)
+
+        # when
+        error_region = measure_error.apply_to(cluster1)
+
+        # then only the members have errors, and the overall error only uses the members
+        np.testing.assert_array_almost_equal(error_region.as_numpy, expected.as_numpy)
+        self.assertEqual(np.count_nonzero(error_region.as_numpy), 3)
+        member_errors = expected.as_numpy[[0, 0, 1], [0, 2, 0]]
+        expected_overall = np.sqrt(np.mean(np.square(member_errors)))
+        self.assertAlmostEqual(error_region.overall_error, expected_overall)
+
+
+class TestOverallErrorForEachForecast(unittest.TestCase):
+    '''
+    Unit tests for error.OverallErrorForEachForecast class.
+    '''
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.spt_region = SpatioTemporalRegion(random_state.rand(14, 2, 3) + 1)
+        self.forecast_np = random_state.rand(4, 2, 3) + 1
+
+        # a point without forecast
+        self.forecast_np[:, 1, 1] = np.nan
+
+    def overall_errors_at_each_point(self, error_type, forecast_region, observation_region,
+                                     training_region):
+        # the overall error of each forecast, with an ErrorRegion for each point
+        overall_error_func = get_overall_error_func(error_type)
+        expected = np.zeros((2, 3))
+        for index in forecast_region.all_point_indices:
+            point = Point(index // 3, index % 3)
+            forecast_series = forecast_region.series_at(point)
+            expected[point.x, point.y] = overall_error_func(point, forecast_series,
+                                                            observation_region,
+                                                            training_region,
+                                                            with_print=False)
+        return expected
+
+    def assert_same_as_each_point(self, spt_region, forecast_region):
+
+        (training_region, observation_region) = SplitTrainingAndTestLast(4).split(spt_region)
+
+        for error_type in ('MASE', 'sMAPE', 'MSE'):
+
+            # given
+            overall_each = OverallErrorForEachForecast(error_type, observation_region,
+                                                       training_region)
+            expected = self.overall_errors_at_each_point(error_type, forecast_region,
+                                                         observation_region, training_region)
+
+            # when
+            result = overall_each.apply_to(forecast_region)
+
+            # then
+            np.testing.assert_array_almost_equal(result.as_numpy, expected)
+
+    def test_apply_to_region(self):
+        forecast_region = SpatioTemporalRegion(self.forecast_np)
+        self.assert_same_as_each_point(self.spt_region, forecast_region)
+
+    def test_apply_to_scaled_region(self):
+
+        # given a scaled region, the forecast is also scaled
+        scaled_region = ScaleFunction(2, 3).apply_to(self.spt_region, 14)
+        forecast_region = scaled_region.new_spatio_temporal_region(self.forecast_np / 2)
+
+        # then the forecast is descaled at each observation
+        self.assert_same_as_each_point(scaled_region, forecast_region)
+
+    def test_apply_to_cluster(self):
+
+        # given a cluster of the region
+        members = np.array([1, 0, 1, 1, 1, 0])
+        partition = PartitionRegionCrisp.from_membership_array(members, 2, 3)
+        cluster = partition.create_all_spt_clusters(self.spt_region)[1]
+        forecast_cluster = cluster.new_spatio_temporal_region(self.forecast_np)
+
+        # then only the members are used as forecasts and as observations
+        self.assert_same_as_each_point(cluster, forecast_cluster)
+
+    def test_overall_errors_in_chunks(self):
+
+        # given
+        random_state = np.random.RandomState(1)
+        forecast_np = random_state.rand(4, 10)
+        observation_np = random_state.rand(4, 6)
+        training_np = random_state.rand(10, 6)
+        expected = overall_errors_for_each_forecast('MASE', forecast_np, observation_np,
+                                                    training_np)
+
+        # when the chunks only have one forecast
+        result = overall_errors_for_each_forecast('MASE', forecast_np, observation_np,
+                                                  training_np, max_chunk_bytes=1)
+
+        # then
+        np.testing.assert_array_almost_equal(result, expected)
+
+
+class TestParallelForecastError(unittest.TestCase):
+    '''
+    Unit tests for error_parallel.ParallelForecastError class.
+    '''
+
+    def test_operate_same_as_serial(self):
+
+        # given
+        random_state = np.random.RandomState(2)
+        forecast_np = random_state.rand(4, 25) + 1
+        observation_np = random_state.rand(4, 25) + 1
+        training_np = random_state.rand(10, 25)
+        forecast_scale = (random_state.rand(25) + 1, random_state.rand(25))
+        forecast_np[:, 3] = np.nan
+
+        expected = overall_errors_for_each_forecast('MASE', forecast_np, observation_np,
+                                                    training_np, forecast_scale)
+
+        # when using two processes
+        parallel_error = ParallelForecastError(2, forecast_np, observation_np, training_np,
+                                               forecast_scale)
+        result = parallel_error.operate('MASE')
+
+        # then
+        np.testing.assert_array_almost_equal(result, expected)
+
+    def test_forecast_ranges(self):
+
+        # when
+        result = forecast_ranges(10, 4)
+
+        # then contiguous ranges of similar size cover all the forecasts
+        self.assertEqual(result, [(0, 2), (2, 5), (5, 7), (7, 10)])
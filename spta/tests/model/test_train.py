@@ -0,0 +1,77 @@
+'''
+Unit tests for spta.model.train module.
+'''
+
+import numpy as np
+import unittest
+
+from spta.model.mean import MeanOfPastParams, ModelRegionMeanOfPast, TrainerMeanOfPast
+from spta.model.train import TrainAtRepresentatives
+from spta.region import Point
+from spta.region.partition import PartitionRegionCrisp
+from spta.region.temporal import SpatioTemporalRegion
+
+
+class TestModelTrainerParallel(unittest.TestCase):
+    '''
+    Unit tests for the parallel training of train.ModelTrainer.
+    '''
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.training_region = SpatioTemporalRegion(random_state.rand(10, 2, 3))
+        self.model_params = MeanOfPastParams(past=4)
+
+    def train_models(self, training_region, parallel_workers):
+        trainer = TrainerMeanOfPast(self.model_params, 2, 3)
+        trainer.parallel_workers = parallel_workers
+        return (trainer, trainer.apply_to(training_region))
+
+    def test_apply_to_region(self):
+
+        # given
+        (_, expected) = self.train_models(self.training_region, None)
+
+        # when training with two processes
+        (trainer, model_region) = self.train_models(self.training_region, 2)
+
+        # then the models are the same as the serial training
+        self.assertIsInstance(model_region, ModelRegionMeanOfPast)
+        np.testing.assert_array_almost_equal(model_region.as_numpy.astype(np.float64),
+                                             expected.as_numpy.astype(np.float64))
+        self.assertEqual(trainer.missing_count, 0)
+
+    def test_apply_to_cluster(self):
+
+        # given a cluster of the training region
+        members = np.array([1, 0, 1, 1, 0, 0])
+        partition = PartitionRegionCrisp.from_membership_array(members, 2, 3)
+        (_, cluster1) = partition.create_all_spt_clusters(self.training_region)
+        (_, expected) = self.train_models(cluster1, None)
+
+        # when
+        (_, model_region) = self.train_models(cluster1, 2)
+
+        # then the models of the members are the same as the serial training
+        for point in (Point(0, 0), Point(0, 2), Point(1, 0)):
+            self.assertAlmostEqual(model_region.as_numpy[point.x, point.y],
+                                   expected.as_numpy[point.x, point.y])
+
+    def test_apply_to_representatives(self):
+
+        # given a trainer that only trains at two representatives
+        trainer = TrainerMeanOfPast(self.model_params, 2, 3)
+        trainer.parallel_workers = 2
+        representatives = [Point(0, 1), Point(1, 2)]
+        trainer_at_representatives = TrainAtRepresentatives(trainer, representatives)
+
+        # when
+        model_region = trainer_at_representatives.apply_to(self.training_region)
+
+        # then only the representatives have models, the other points are missing
+        for point in representatives:
+            expected = np.mean(self.training_region.series_at(point)[-4:])
+            self.assertAlmostEqual(model_region.as_numpy[point.x, point.y], expected)
+
+        self.assertIsNone(model_region.as_numpy[0, 0])
+        self.assertEqual(trainer.missing_count, 4)
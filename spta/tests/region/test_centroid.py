@@ -5,14 +5,34 @@ Unit tests for spta.region.centroid module.
 import numpy as np
 import unittest
 
+from spta.distance.dtw import DistanceByDTW
 from spta.region import Point
-from spta.region.centroid import CalculateCentroid
+from spta.region.centroid import CalculateCentroid, sums_of_distances
 from spta.region.partition import PartitionRegionCrisp
-from spta.region.temporal import SpatioTemporalCluster
+from spta.region.temporal import SpatioTemporalCluster, SpatioTemporalRegion
 
 from spta.tests.stub import stub_region, stub_distance
 
 
+class TestSumsOfDistances(unittest.TestCase):
+    '''
+    Unit tests for centroid.sums_of_distances function.
+    '''
+
+    def test_sums_of_distances_in_blocks(self):
+
+        # given the stub distance matrix and some of its points
+        distance_matrix = stub_distance.stub_distance_matrix()
+        point_indices = np.array([0, 2, 3])
+
+        # when computing the sums with blocks smaller than the points
+        result = sums_of_distances(distance_matrix, point_indices, block_rows=2)
+
+        # then the sums only consider the distances between these points
+        expected = np.array([25, 21, 22])
+        np.testing.assert_array_equal(result, expected)
+
+
 class TestCalculateCentroid(unittest.TestCase):
     '''
     Unit tests for centroid.CalculateCentroid class.
@@ -60,3 +80,30 @@ class TestCalculateCentroid(unittest.TestCase):
         # then index 2 -> Point(0, 2)
         expected1 = Point(0, 2)
         self.assertEqual(centroid1, expected1)
+
+    def test_find_centroid_and_distances_without_matrix(self):
+
+        # given a spatio-temporal region with random series, divided into two clusters
+        random_state = np.random.RandomState(0)
+        spt_region = SpatioTemporalRegion(random_state.rand(10, 2, 4))
+        _, x_len, y_len = spt_region.shape
+        members = np.array([0, 1, 1, 0, 1, 0, 0, 1])
+
+        partition = PartitionRegionCrisp.from_membership_array(members, x_len, y_len)
+        (_, cluster1) = partition.create_all_spt_clusters(spt_region)
+
+        # and the full DTW distance matrix, to check the result
+        full_measure = DistanceByDTW()
+        full_measure.compute_distance_matrix(spt_region)
+        with_matrix = CalculateCentroid(full_measure)
+        (expected_centroid, expected_distances) = \
+            with_matrix.find_centroid_and_distances(cluster1)
+
+        # when finding the centroid without a distance matrix
+        without_matrix = CalculateCentroid(DistanceByDTW(), use_distance_matrix=False)
+        (centroid, distances) = without_matrix.find_centroid_and_distances(cluster1)
+
+        # then only the distances between the members are computed, with the same result
+        self.assertEqual(centroid, expected_centroid)
+        np.testing.assert_array_almost_equal(distances, expected_distances)
+        self.assertEqual(len(distances), 4)
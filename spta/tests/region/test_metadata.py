@@ -1,7 +1,10 @@
+import numpy as np
+import tempfile
 import unittest
 
 from spta.region import Point, Region
-from spta.region.metadata import SpatioTemporalRegionMetadata
+from spta.region.metadata import SpatioTemporalRegionMetadata, RegionDatasetCache
+from spta.region import metadata as metadata_module
 
 
 class TestSptrMetadata(unittest.TestCase):
@@ -96,3 +99,106 @@ class TestSptrMetadata(unittest.TestCase):
 
         # then
         self.assertEqual(output_dir, 'outputs/sp_small_2015_2015_1spd_scaled')
+
+
+class TestRegionDatasetCache(unittest.TestCase):
+    '''
+    Unit tests for metadata.RegionDatasetCache
+    '''
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.metadata = SpatioTemporalRegionMetadata('sp_small', Region(40, 43, 50, 52), 2015,
+                                                     2015, 1, scaled=True,
+                                                     dataset_dir=self.tmp_dir.name)
+        self.dataset = np.random.rand(10, 3, 2)
+        self.scale_min = np.random.rand(3, 2)
+        self.scale_max = self.scale_min + 1
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_missing(self):
+        # given an empty cache
+        cache = RegionDatasetCache()
+
+        # when/then
+        self.assertIsNone(cache.get(self.metadata))
+
+    def test_put_then_get_in_memory(self):
+        # given
+        cache = RegionDatasetCache()
+
+        # when
+        cache.put(self.metadata, self.dataset, self.scale_min, self.scale_max)
+        (dataset, scale_min, scale_max) = cache.get(self.metadata)
+
+        # then the arrays are read-only copies
+        np.testing.assert_array_equal(dataset, self.dataset)
+        np.testing.assert_array_equal(scale_min, self.scale_min)
+        np.testing.assert_array_equal(scale_max, self.scale_max)
+        self.assertFalse(dataset.flags.writeable)
+
+    def test_put_then_get_from_disk(self):
+        # given an entry saved by another cache (e.g. another process)
+        RegionDatasetCache().put(self.metadata, self.dataset, self.scale_min, self.scale_max)
+        cache = RegionDatasetCache()
+
+        # when
+        (dataset, scale_min, scale_max) = cache.get(self.metadata)
+
+        # then the arrays are memory-mapped
+        self.assertIsInstance(dataset, np.memmap)
+        np.testing.assert_array_equal(dataset, self.dataset)
+        np.testing.assert_array_equal(scale_max, self.scale_max)
+
+    def test_get_from_disk_different_region(self):
+        # given an entry saved for a region with the same name but a different size
+        RegionDatasetCache().put(self.metadata, self.dataset, self.scale_min, self.scale_max)
+        other_metadata = SpatioTemporalRegionMetadata('sp_small', Region(40, 44, 50, 52), 2015,
+                                                      2015, 1, scaled=True,
+                                                      dataset_dir=self.tmp_dir.name)
+
+        # when
+        entry = RegionDatasetCache().get(other_metadata)
+
+        # then the saved dataset is ignored
+        self.assertIsNone(entry)
+
+    def test_least_recently_used_is_dropped(self):
+        # given a cache with 2 entries that cannot be saved to disk
+        cache = RegionDatasetCache(maxsize=2)
+        names = ['first', 'second', 'third']
+        all_metadata = [
+            SpatioTemporalRegionMetadata(name, Region(0, 3, 0, 2), 2015, 2015, 1, scaled=False,
+                                         dataset_dir='/nonexistent/dir')
+            for name in names
+        ]
+        cache.put(all_metadata[0], self.dataset)
+        cache.put(all_metadata[1], self.dataset)
+
+        # when the first entry is used, then a third entry is added
+        cache.get(all_metadata[0])
+        cache.put(all_metadata[2], self.dataset)
+
+        # then the second entry is dropped
+        self.assertIsNotNone(cache.get(all_metadata[0]))
+        self.assertIsNone(cache.get(all_metadata[1]))
+        self.assertIsNotNone(cache.get(all_metadata[2]))
+
+    def test_create_instance_scaled(self):
+        # given a cached dataset
+        metadata_module.dataset_cache.put(self.metadata, self.dataset, self.scale_min,
+                                          self.scale_max)
+
+        # when
+        spt_region = self.metadata.create_instance()
+
+        # then the region is scaled and can be descaled
+        self.assertTrue(spt_region.has_scaling())
+        self.assertIs(spt_region.region_metadata, self.metadata)
+        np.testing.assert_array_equal(spt_region.as_numpy, self.dataset)
+
+        descaled = spt_region.descale()
+        expected = self.dataset * (self.scale_max - self.scale_min) + self.scale_min
+        np.testing.assert_array_almost_equal(descaled.as_numpy, expected)
@@ -1,10 +1,13 @@
 '''
 Unit tests for spta.region.partition module.
 '''
+import numpy as np
+import pickle
 import unittest
 
 from spta.region import Point, Region
-from spta.region.partition import PartitionRegionCrisp
+from spta.region.partition import PartitionRegionCrisp, PartitionRegionFuzzy
+from spta.region.partition import intra_cluster_cost_from_labels
 from spta.tests.stub import stub_partition, stub_region
 
 
@@ -197,3 +200,102 @@ class TestPartitionRegionCrisp(unittest.TestCase):
         # then only medoid from cluster1 is returned
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0], Point(1, 0))
+
+    def test_cluster_point_indices(self):
+        # given a cluster partition
+        partition = PartitionRegionCrisp(self.partition_np, self.k)
+
+        # when
+        result = [partition.cluster_point_indices(i).tolist() for i in range(0, self.k)]
+
+        # then the indices of each cluster are sorted
+        expected = [
+            [0, 3, 4, 10, 15, 16],
+            [1, 2, 5, 6, 12, 13, 17, 18],
+            [7, 8, 9, 11, 14, 19]
+        ]
+        self.assertEqual(result, expected)
+        self.assertEqual(partition.cluster_len(1), 8)
+        self.assertFalse(partition.cluster_point_indices(1).flags.writeable)
+
+    def test_cluster_points(self):
+        # given a cluster partition
+        partition = PartitionRegionCrisp(self.partition_np, self.k)
+
+        # when
+        result = partition.cluster_points(2)
+
+        # then
+        expected = [Point(1, 2), Point(1, 3), Point(1, 4), Point(2, 1), Point(2, 4), Point(3, 4)]
+        self.assertEqual(result, expected)
+
+    def test_cluster_members_not_pickled(self):
+        # given a cluster partition that has found its members
+        partition = PartitionRegionCrisp(self.partition_np, self.k)
+        partition.cluster_points(0)
+
+        # when
+        restored = pickle.loads(pickle.dumps(partition))
+
+        # then the members are found again
+        self.assertFalse(hasattr(restored, 'points_by_cluster'))
+        self.assertEqual(restored.cluster_points(0), partition.cluster_points(0))
+
+
+class TestIntraClusterCost(unittest.TestCase):
+    '''
+    Unit tests for partition.intra_cluster_cost_from_labels function.
+    '''
+
+    def test_intra_cluster_cost_from_labels(self):
+        # given four points on a line, two clusters with medoids at 0 and 3
+        positions = np.array([0.0, 1.0, 5.0, 7.0])
+        distance_matrix = np.abs(positions[:, np.newaxis] - positions)
+        labels = [0, 0, 1, 1]
+        medoid_indices = [0, 3]
+
+        # when
+        result = intra_cluster_cost_from_labels(distance_matrix, labels, medoid_indices)
+
+        # then the cost is the sum of squared distances to the medoids
+        self.assertEqual(result, 0 + 1 + 4 + 0)
+
+
+class TestPartitionRegionFuzzy(unittest.TestCase):
+    '''
+    Unit tests for partition.PartitionRegionFuzzy class.
+    '''
+
+    def setUp(self):
+        self.uij = stub_partition.fuzzy_membership_stub()
+
+    def test_from_uij_and_region(self):
+        # when
+        partition = PartitionRegionFuzzy.from_uij_and_region(self.uij, 4, 5)
+
+        # then
+        np.testing.assert_array_equal(partition.as_numpy, stub_partition.mask_fuzzy_np_stub())
+        self.assertEqual((partition.x_len, partition.y_len), (4, 5))
+
+    def test_membership_threshold_zero(self):
+        # given a fuzzy partition with no threshold
+        partition = PartitionRegionFuzzy.from_uij_and_region(self.uij, 4, 5)
+
+        # then each point belongs to its best cluster
+        self.assertTrue(partition.is_member(Point(0, 0), 1))
+        self.assertFalse(partition.is_member(Point(0, 0), 0))
+        self.assertEqual(partition.membership_of_points([Point(0, 4), Point(1, 4)]), [0, 1])
+        self.assertEqual(partition.cluster_len(0), 11)
+        self.assertEqual(partition.cluster_len(1), 9)
+
+    def test_membership_with_threshold(self):
+        # given a fuzzy partition with threshold
+        partition = PartitionRegionFuzzy.from_uij_and_region(self.uij, 4, 5, threshold=0.1)
+
+        # then points with similar memberships belong to both clusters
+        self.assertTrue(partition.is_member(Point(0, 4), 0))
+        self.assertTrue(partition.is_member(Point(0, 4), 1))
+        self.assertFalse(partition.is_member(Point(0, 0), 0))
+        self.assertEqual(partition.cluster_len(0), 13)
+        self.assertEqual(partition.cluster_len(1), 15)
+        self.assertEqual(partition.with_threshold(0).cluster_len(0), 11)
@@ -6,7 +6,8 @@ import numpy as np
 import unittest
 
 from spta.region import Point
-from spta.region.scaling import ScaleFunction
+from spta.region.scaling import ScaleFunction, scale_dataset, descale_dataset
+from spta.region.temporal import SpatioTemporalRegion
 from spta.region.temporal import SpatioTemporalCluster
 from spta.region.partition import PartitionRegionCrisp
 
@@ -75,6 +76,40 @@ class TestSpatioTemporalScaled(unittest.TestCase):
         self.assertIsNone(np.testing.assert_array_equal(result_1_0, expected_1_0))
         self.assertIsNone(np.testing.assert_array_equal(result_1_2, expected_1_2))
 
+    def test_scaling_nan_and_constant_series(self):
+        # given a region with a NaN series, a constant series and a partially NaN series
+        numpy_dataset = np.array([[[np.nan, 5, 1]], [[np.nan, 5, np.nan]], [[np.nan, 5, 3]]])
+        sptr = SpatioTemporalRegion(numpy_dataset)
+
+        # when scaling the region
+        scale_function = ScaleFunction(1, 3)
+        scaled_region = scale_function.apply_to(sptr, sptr.series_len)
+
+        # then the NaN series stays NaN, the constant series is zero
+        self.assertTrue(np.isnan(scaled_region.series_at(Point(0, 0))).all())
+        np.testing.assert_array_equal(scaled_region.series_at(Point(0, 1)), np.zeros(3))
+        np.testing.assert_array_equal(scaled_region.series_at(Point(0, 2)),
+                                      np.array([0, np.nan, 1]))
+
+        # then the scaling data has NaN for the NaN series
+        np.testing.assert_array_equal(scaled_region.scale_min.numpy_dataset,
+                                      np.array([[np.nan, 5, 1]]))
+        np.testing.assert_array_equal(scaled_region.scale_max.numpy_dataset,
+                                      np.array([[np.nan, 5, 3]]))
+
+    def test_scale_then_descale_dataset(self):
+        # given a random dataset
+        numpy_dataset = np.random.rand(20, 4, 5)
+
+        # when
+        (scaled_dataset, scale_min, scale_max) = scale_dataset(numpy_dataset)
+        descaled_dataset = descale_dataset(scaled_dataset, scale_min, scale_max)
+
+        # then
+        self.assertEqual(np.nanmin(scaled_dataset), 0)
+        self.assertEqual(np.nanmax(scaled_dataset), 1)
+        np.testing.assert_array_almost_equal(descaled_dataset, numpy_dataset)
+
 
 class TestClusteringAndScaling(unittest.TestCase):
 
@@ -37,3 +37,12 @@ def stub_distance_measure():
     distance_measure = DistanceBetweenSeries()
     distance_measure.distance_matrix = stub_distance_matrix()
     return distance_measure
+
+
+def stub_condensed_distance_measure():
+    '''
+    Uses the distance_matrix provided in stub_distance_matrix, in condensed form.
+    '''
+    distance_measure = stub_distance_measure()
+    distance_measure.condense_distance_matrix()
+    return distance_measure
@@ -60,3 +60,46 @@ class TestMASE(unittest.TestCase):
 
         # then MASE returns mean((0.1, 0.2, 0.3)) / (1/2) * 2 = 0.2
         np.testing.assert_almost_equal(result, 0.2)
+
+
+class TestErrorByPoint(unittest.TestCase):
+    '''
+    Unit tests for the errors of many points at once, each point must match its own error.
+    '''
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.forecast = random_state.rand(4, 2, 3) + 1
+        self.observation = random_state.rand(4, 2, 3) + 1
+        self.training = random_state.rand(10, 2, 3)
+
+        # a point with NaN
+        self.forecast[1, 1, 2] = np.nan
+
+    def assert_same_as_each_point(self, error_func, error_by_point_func):
+
+        # when
+        result = error_by_point_func(self.forecast, self.observation, self.training)
+
+        # then each value is the error of the point
+        self.assertEqual(result.shape, (2, 3))
+        for x in range(0, 2):
+            for y in range(0, 3):
+                expected = error_func(self.forecast[:, x, y], self.observation[:, x, y],
+                                      self.training[:, x, y])
+                np.testing.assert_almost_equal(result[x, y], expected)
+
+    def test_mase_by_point(self):
+        self.assert_same_as_each_point(error_util.mase, error_util.mase_by_point)
+
+    def test_smape_by_point(self):
+        self.assert_same_as_each_point(error_util.smape, error_util.smape_by_point)
+
+    def test_mse_by_point(self):
+        self.assert_same_as_each_point(error_util.mse, error_util.mse_by_point)
+
+    def test_mase_by_point_without_training(self):
+
+        # given no training series, then error
+        with self.assertRaises(ValueError):
+            error_util.mase_by_point(self.forecast, self.observation, None)
@@ -0,0 +1,70 @@
+'''
+Unit tests for spta.util.parallel module.
+'''
+
+import unittest
+
+from spta.distance.condensed import condensed_len
+from spta.util import parallel as parallel_util
+
+
+class TestBalancedRowBlocks(unittest.TestCase):
+    '''
+    Unit tests for parallel.balanced_row_blocks function.
+    '''
+
+    def test_balanced_row_blocks_cover_triangle(self):
+        # given
+        series_n = 100
+
+        # when
+        blocks = parallel_util.balanced_row_blocks(series_n, 8)
+
+        # then the blocks are contiguous and cover all rows with elements
+        self.assertEqual(len(blocks), 8)
+        self.assertEqual(blocks[0][0], 0)
+        self.assertEqual(blocks[-1][1], series_n - 1)
+        for (previous, current) in zip(blocks, blocks[1:]):
+            self.assertEqual(previous[1], current[0])
+
+    def test_balanced_row_blocks_similar_work(self):
+        # given
+        series_n = 100
+
+        # when
+        blocks = parallel_util.balanced_row_blocks(series_n, 4)
+
+        # then each block has about a quarter of the elements, first blocks have fewer rows
+        block_lens = [
+            condensed_len(series_n - row_start) - condensed_len(series_n - row_end)
+            for (row_start, row_end)
+            in blocks
+        ]
+        for block_len in block_lens:
+            self.assertAlmostEqual(block_len / condensed_len(series_n), 0.25, delta=0.02)
+        self.assertLess(blocks[0][1] - blocks[0][0], blocks[-1][1] - blocks[-1][0])
+
+    def test_balanced_row_blocks_more_blocks_than_rows(self):
+        # given only 3 rows with elements
+        series_n = 4
+
+        # when
+        blocks = parallel_util.balanced_row_blocks(series_n, 10)
+
+        # then one block per row
+        self.assertEqual(blocks, [(0, 1), (1, 2), (2, 3)])
+
+    def test_balanced_row_blocks_single_point(self):
+        self.assertEqual(parallel_util.balanced_row_blocks(1, 4), [])
+
+    def test_balanced_row_blocks_range(self):
+        # given a range of rows
+        series_n = 100
+
+        # when
+        blocks = parallel_util.balanced_row_blocks(series_n, 4, row_start=20, row_end=60)
+
+        # then the blocks cover only the range
+        self.assertEqual(blocks[0][0], 20)
+        self.assertEqual(blocks[-1][1], 60)
+        self.assertEqual(len(blocks), 4)
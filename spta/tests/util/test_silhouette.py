@@ -0,0 +1,62 @@
+'''
+Unit tests for spta.util.silhouette module.
+'''
+
+import numpy as np
+import unittest
+
+from sklearn.metrics import silhouette_samples as sklearn_silhouette_samples
+
+from spta.util import silhouette as silhouette_util
+
+
+class TestSilhouette(unittest.TestCase):
+    '''
+    Unit tests for silhouette_util.silhouette_samples and silhouette_util.silhouette_score.
+    '''
+
+    def setUp(self):
+        np.random.seed(0)
+        points = np.random.rand(50, 3)
+        self.distance_matrix = np.sqrt(np.sum(np.square(points[:, np.newaxis] - points), axis=2))
+        self.labels = np.random.randint(0, 4, 50)
+
+        # a cluster with a single member
+        self.labels[7] = 4
+
+    def test_silhouette_samples_same_as_sklearn(self):
+        # when
+        result = silhouette_util.silhouette_samples(self.distance_matrix, self.labels,
+                                                    block_rows=16)
+
+        # then
+        expected = sklearn_silhouette_samples(self.distance_matrix, self.labels,
+                                              metric='precomputed')
+        np.testing.assert_array_almost_equal(result, expected)
+        self.assertEqual(result[7], 0)
+
+    def test_silhouette_samples_subset(self):
+        # given
+        point_indices = np.array([3, 4, 20, 41])
+
+        # when
+        result = silhouette_util.silhouette_samples(self.distance_matrix, self.labels,
+                                                    point_indices)
+
+        # then the silhouette of each point uses all the points
+        expected = silhouette_util.silhouette_samples(self.distance_matrix, self.labels)
+        np.testing.assert_array_almost_equal(result, expected[point_indices])
+
+    def test_silhouette_score_sampled(self):
+        # when
+        result = silhouette_util.silhouette_score(self.distance_matrix, self.labels,
+                                                  sample_size=10, random_seed=0)
+
+        # then the score is an average of sampled silhouettes
+        silhouettes = silhouette_util.silhouette_samples(self.distance_matrix, self.labels)
+        self.assertTrue(np.min(silhouettes) <= result <= np.max(silhouettes))
+
+    def test_silhouette_single_cluster(self):
+        # then
+        with self.assertRaises(ValueError):
+            silhouette_util.silhouette_samples(self.distance_matrix, np.zeros(50, dtype=int))
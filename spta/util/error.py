@@ -1,4 +1,13 @@
+'''
+Forecast errors. The functions mase, smape and mse compute the error of a single forecast series.
+The functions mase_by_point, smape_by_point and mse_by_point compute the errors of many points
+at once, given arrays (series_len, ...) with the forecast, observation and training series of
+each point, e.g. (series_len, x_len, y_len). The result has the shape of the points, and each
+error is the same as computing the error of the point alone.
+'''
+
 import numpy as np
+import warnings
 
 from . import arrays
 
@@ -15,9 +24,7 @@ def mase(forecast_series, observation_series, training_series):
     et = forecast_series - observation_series
 
     n = len(training_series)
-    sum_Yi = 0
-    for i in range(1, n):
-        sum_Yi += np.abs(training_series[i] - training_series[i - 1])
+    sum_Yi = np.sum(np.abs(np.diff(training_series)))
     qt = et / (sum_Yi / (n - 1))
     return np.mean(np.abs(qt))
 
@@ -44,3 +51,58 @@ def mse(forecast_series, observation_series, *args):
     '''
     et = forecast_series - observation_series
     return arrays.mean_squared(et)
+
+
+def naive_error_by_point(training_array):
+    '''
+    The mean absolute error of the naive forecast (previous value) of each point, i.e. the
+    denominator of MASE. The series are along the first axis.
+    '''
+    return np.mean(np.abs(np.diff(training_array, axis=0)), axis=0)
+
+
+def mase_by_point(forecast_array, observation_array, training_array, naive_error=None):
+    '''
+    Calculates MASE for each point, see mase. The series are along the first axis.
+    The error is NaN at points where any of the series has NaN.
+
+    naive_error
+        optionally, the result of naive_error_by_point(training_array) computed beforehand.
+    '''
+    if naive_error is None:
+        if training_array is None:
+            raise ValueError('MASE requires the training series')
+
+        naive_error = naive_error_by_point(training_array)
+
+    et = np.asarray(forecast_array) - np.asarray(observation_array)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.mean(np.abs(et), axis=0) / naive_error
+
+
+def smape_by_point(forecast_array, observation_array, *args):
+    '''
+    Calculates sMAPE for each point, see smape. The series are along the first axis.
+    The error is NaN at points where the forecast or the observation has NaN.
+    '''
+    forecast_array = np.asarray(forecast_array)
+    et = forecast_array - observation_array
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pt = 200 * (np.abs(et) / (forecast_array + observation_array))
+
+    return np.mean(pt, axis=0)
+
+
+def mse_by_point(forecast_array, observation_array, *args):
+    '''
+    Calculates MSE for each point, see mse. The series are along the first axis.
+    NaN values are ignored, the error is NaN only where all the values are NaN.
+    '''
+    et = np.asarray(forecast_array) - observation_array
+
+    # the mean of an all-NaN slice is NaN, as expected
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return np.nanmean(np.square(et), axis=0)
@@ -1,73 +1,106 @@
-# Based on
-# https://research.wmz.ninja/articles/2018/03/on-sharing-large-arrays-when-using-pythons-multiprocessing.html
+'''
+Parallel computation of operations between each two points of a spatio-temporal region, e.g.
+the distance matrix with DTW.
 
-import ctypes
+The operation is assumed to be symmetric with a zero diagonal, so only the strict upper triangle
+is computed. The rows of the triangle are partitioned into contiguous blocks with a similar
+amount of work, and each worker computes a whole block at a time. The output is a condensed
+1-d shared array (see spta.distance.condensed): the upper rows of a block are contiguous in the
+condensed array, so each worker writes its block to a disjoint slice without locking.
+
+Based on
+https://research.wmz.ninja/articles/2018/03/on-sharing-large-arrays-when-using-pythons-multiprocessing.html
+'''
+
+import itertools
 import numpy as np
 import multiprocessing as mp
-import itertools
-import os
-import sys
 
-from spta.region.temporal import SpatioTemporalRegion
 
 # will be shared among processes
 global_var_dict = {}
 
 
-def init_process(sptr_1d_shared, output_1d_shared, series_len_shared, x_len_shared, y_len_shared):
+def init_process(series_1d_shared, output_1d_shared, series_n, series_len, output_offset=0):
     '''
-    Initializes the processes with the shared input, shared output and the 2D shape.
+    Initializes the processes with the shared input and the shared output.
+    The numpy views are created once per process, not once per task.
+
+    The shared output may only hold a range of rows, output_offset is the position of its first
+    element in the condensed upper triangle.
     '''
-    global_var_dict['sptr_1d_shared'] = sptr_1d_shared
-    global_var_dict['output_1d_shared'] = output_1d_shared
-    global_var_dict['series_len_shared'] = series_len_shared
-    global_var_dict['x_len_shared'] = x_len_shared
-    global_var_dict['y_len_shared'] = y_len_shared
+    series_2d = np.frombuffer(series_1d_shared).reshape((series_n, series_len))
+    global_var_dict['series_2d'] = series_2d
+    global_var_dict['output_1d'] = np.frombuffer(output_1d_shared)
+    global_var_dict['series_n'] = series_n
+    global_var_dict['output_offset'] = output_offset
 
 
-def inter_points_task_wrapper(k_with_task):
+def balanced_row_blocks(series_n, num_blocks, row_start=0, row_end=None):
     '''
-    Convenient wrapper to hide the underlying 1D implementation.
-    Lets external function work with two indices for inter-point operations.
+    Partitions the rows of the strict upper triangle of a (series_n, series_n) matrix into
+    at most num_blocks contiguous blocks, so that each block has a similar number of elements.
+    Row i has (series_n - 1 - i) elements, so the first blocks have fewer rows.
+
+    Only the rows in [row_start, row_end) are partitioned, by default all the rows.
+
+    Returns a list of (row_start, row_end) tuples, row_end is exclusive.
     '''
-    (k_index, inter_points_task) = k_with_task
+    # the last row has no elements
+    if row_end is None or row_end > series_n - 1:
+        row_end = series_n - 1
+
+    if row_end <= row_start:
+        return []
 
-    # read shape from shared values
-    series_len = global_var_dict['series_len_shared'].value
-    x_len = global_var_dict['x_len_shared'].value
-    y_len = global_var_dict['y_len_shared'].value
+    num_blocks = max(1, min(num_blocks, row_end - row_start))
 
-    # recover the indices of the two points
-    # the first x_len * y_len k_indices are for operations between the first point and all the
-    # other points.
-    i = int(k_index / (x_len * y_len))
-    j = int(k_index % (x_len * y_len))
+    # cumulative number of elements at the end of each row
+    row_lens = series_n - 1 - np.arange(row_start, row_end)
+    cumulative = np.cumsum(row_lens)
+    total_len = cumulative[-1]
 
-    # redirect stdout to a file for parallel 'logging'
-    # https://stackoverflow.com/a/23937468
-    sys.stdout = open(str(os.getpid()) + ".out", "a")
-    # print('Got k={}'.format(k_index), flush=True)
-    # print('({}, {})'.format(i, j), flush=True)
+    # find the rows where each block should end, to get total_len / num_blocks elements each
+    targets = total_len * np.arange(1, num_blocks) / num_blocks
+    row_ends = row_start + np.searchsorted(cumulative, targets) + 1
+    row_ends = np.unique(np.concatenate((row_ends, [row_end])))
 
-    # recover 3D representation of spatio-temporal region
-    spt_shape = (series_len, x_len, y_len)
-    spt_region_np = np.frombuffer(global_var_dict['sptr_1d_shared']).reshape(spt_shape)
-    spt_region = SpatioTemporalRegion(spt_region_np)
+    blocks = []
+    block_start = row_start
+    for block_end in row_ends:
+        if block_end > block_start:
+            blocks.append((block_start, int(block_end)))
+            block_start = int(block_end)
 
-    # call wrapped function to perform operation
-    result_i_j = inter_points_task(spt_region, i, j)
+    return blocks
 
-    # recover the 2d representation of the output
-    # need to lock the writeable array
-    output_2d = None
-    output_2d_shape = (x_len * y_len, x_len * y_len)
 
-    with global_var_dict['output_1d_shared'].get_lock():
-        output_2d = np.frombuffer(global_var_dict['output_1d_shared'].get_obj())
-        output_2d = output_2d.reshape(output_2d_shape)
+def condensed_row_offset(series_n, row):
+    '''
+    Position of the first element of a row in the condensed upper triangle, see
+    CondensedDistanceMatrix.condensed_index.
+    '''
+    return series_n * row - (row * (row + 1)) // 2
+
+
+def inter_points_block_wrapper(block_with_task):
+    '''
+    Computes a block of rows of the upper triangle and writes it to the shared output.
+    The block_task receives the series as a 2-d array (series_n, series_len) and the rows, and
+    returns the condensed distances (i, i+1), ... (i, N-1) for each row in the block.
+    '''
+    ((row_start, row_end), block_task) = block_with_task
+
+    series_2d = global_var_dict['series_2d']
+    series_n = global_var_dict['series_n']
 
-        # save the operation result
-        output_2d[i, j] = result_i_j
+    output_offset = global_var_dict['output_offset']
+    output_start = condensed_row_offset(series_n, row_start) - output_offset
+    output_end = condensed_row_offset(series_n, row_end) - output_offset
+
+    # blocks are disjoint, no lock required
+    block_result = block_task(series_2d, row_start, row_end)
+    global_var_dict['output_1d'][output_start:output_end] = block_result
 
     # we don't need this
     return 0
@@ -76,83 +109,92 @@ def inter_points_task_wrapper(k_with_task):
 class InterPointsOperation(object):
     '''
     Given a spatiotemporal region, executes an operation between each two points in the region,
-    using parallel workers. Assumes that operations between different points are all independent.
+    using parallel workers. Assumes that operations between different points are all independent,
+    symmetric and zero for a point with itself.
 
     If the spatio-temporal region has shape (series_len, x_len, y_len), then the output is the
-    matrix (x_len * y_len, x_len * y_len).
+    condensed upper triangle of the matrix (x_len * y_len, x_len * y_len).
     Useful for parallel calculation of the distance matrix with DTW.
+
+    Also works with an array of series (series_n, series_len).
     '''
 
-    def __init__(self, num_proc, spt_region, chunksize=50):
+    def __init__(self, num_proc, temporal_data, blocks_per_proc=4):
         self.num_proc = num_proc
 
-        (series_len, x_len, y_len) = self.__init_input(spt_region)
-        self.__init_output(x_len, y_len)
-        self.__init_shape(series_len, x_len, y_len)
-        self.chunksize = chunksize
+        # more blocks than processes, so that a slow block does not leave other workers idle
+        self.blocks_per_proc = blocks_per_proc
 
-    def __init_input(self, spt_region):
+        (self.series_n, self.series_len) = self.__init_input(temporal_data)
+
+    def __init_input(self, temporal_data):
         '''
-        Prepare the spatio temporal data to be shared among the workers as a shared,
-        read-only array.
+        Prepare the series to be shared among the workers as a shared, read-only array.
         '''
-        (series_len, x_len, y_len) = spt_region.shape
+        if temporal_data.ndim == 3:
+            # spatio-temporal region, the points are the series
+            series_2d = temporal_data.as_2d
+        else:
+            series_2d = np.asarray(temporal_data)
+
+        (series_n, series_len) = series_2d.shape
 
         # need to work with a 1D array
         # will be read-only so no locking needed
-        data_len = series_len * x_len * y_len
-        self.sptr_1d_shared = mp.RawArray('d', data_len)
+        self.series_1d_shared = mp.RawArray('d', series_n * series_len)
 
-        # copy the data in the spatio temporal region to shared array, using numpy representation
-        sptr_1d_shared_np = np.frombuffer(self.sptr_1d_shared)
-        sptr_1d_shared_np = sptr_1d_shared_np.reshape((series_len, x_len, y_len))
-        np.copyto(sptr_1d_shared_np, spt_region.as_numpy)
+        # copy the series to the shared array, using numpy representation
+        series_shared_np = np.frombuffer(self.series_1d_shared).reshape((series_n, series_len))
+        np.copyto(series_shared_np, series_2d)
 
-        return (series_len, x_len, y_len)
+        return (series_n, series_len)
 
-    def __init_output(self, x_len, y_len):
-
-        # the output matrix will be implemented as a 1D  shared array (thread-safe with locking)
-        # this needs to be length of (x_len * y_len)^2 to store all operations between points
-        self.output_2d_shape = (x_len * y_len, x_len * y_len)
-        self.all_ops_len = x_len * y_len * x_len * y_len
-        self.output_1d_shared = mp.Array(ctypes.c_double, self.all_ops_len)
+    def __init_output(self, output_start, output_end):
+        '''
+        The output is the slice [output_start, output_end) of the condensed upper triangle, only
+        the requested rows are allocated. Each worker writes a disjoint slice, so no locking is
+        needed.
+        '''
+        return mp.RawArray('d', output_end - output_start)
 
-        # wrap the inner implementation as a numpy 2D matrix for easier manipulation, initialize
-        # need to sync access to shared object
-        # https://stackoverflow.com/a/7908612
-        with self.output_1d_shared.get_lock():
-            self.output_2d = np.frombuffer(self.output_1d_shared.get_obj())
-            self.output_2d = self.output_2d.reshape(self.output_2d_shape)
-            self.output_2d.fill(0)
+    def operate(self, block_task, row_start=0, row_end=None):
+        '''
+        Execute the block_task in parallel, returns the condensed output as a 1-d array.
+        The signature of block_task must be as follows:
 
-    def __init_shape(self, series_len, x_len, y_len):
+        block_task(series_2d, row_start, row_end)
 
-        # save the region shape as RawValue (no locking), so that all processes can read shape
-        self.series_len_shared = mp.RawValue('i', series_len)
-        self.x_len_shared = mp.RawValue('i', x_len)
-        self.y_len_shared = mp.RawValue('i', y_len)
+        and it must return a 1-d array with the outputs (i, j) for i in [row_start, row_end)
+        and j in (i, series_n), in that order. The task must be picklable (e.g. a module-level
+        function).
 
-    def operate(self, inter_points_task):
-        '''
-        Execute the inter_points_task in parallel.
-        The signature of inter_points_task must be as follows:
-        inter_points_task(spt_region, i, j)
+        If a range of rows is given, only those rows are computed and returned.
         '''
-        with mp.Pool(processes=self.num_proc, initializer=init_process,
-                     initargs=(self.sptr_1d_shared, self.output_1d_shared, self.series_len_shared,
-                               self.x_len_shared, self.y_len_shared)) as pool:
+        if row_end is None or row_end > self.series_n:
+            row_end = self.series_n
+
+        blocks = balanced_row_blocks(self.series_n, self.num_proc * self.blocks_per_proc,
+                                     row_start, row_end)
 
-            # the size of the queue is (x_len * y_len)^2 to account for all inter-point ops
-            k_iter = range(0, self.all_ops_len)
+        # only the requested rows, e.g. a block of DistanceMatrixCheckpoint
+        output_start = condensed_row_offset(self.series_n, row_start)
+        output_end = condensed_row_offset(self.series_n, row_end)
+        if output_end <= output_start:
+            return np.empty(0)
+
+        output_1d_shared = self.__init_output(output_start, output_end)
+
+        with mp.Pool(processes=self.num_proc, initializer=init_process,
+                     initargs=(self.series_1d_shared, output_1d_shared, self.series_n,
+                               self.series_len, output_start)) as pool:
 
-            # we want to pass both k and the wrapped task, but we must pass an interable to
-            # pool.map. This achieves the effect.
-            k_with_task = zip(k_iter, itertools.repeat(inter_points_task))
+            # we want to pass both the block and the wrapped task, but we must pass an
+            # iterable to pool.map. This achieves the effect.
+            blocks_with_task = zip(blocks, itertools.repeat(block_task))
 
-            # put the processes to work
+            # put the processes to work, one block per task
             # no need to store result of map, since we are writing to shared array
-            pool.map(inter_points_task_wrapper, k_with_task, chunksize=self.chunksize)
+            pool.map(inter_points_block_wrapper, blocks_with_task, chunksize=1)
 
-        # return 2D representation of the shared output array
-        return self.output_2d
+        # copy, so that the shared memory can be released
+        return np.array(np.frombuffer(output_1d_shared))
@@ -6,7 +6,7 @@ import matplotlib.cm as cm
 from matplotlib.patches import Rectangle
 import seaborn as sns
 
-from sklearn.metrics import silhouette_samples, silhouette_score
+from . import silhouette as silhouette_util
 
 
 PALETTE = ['b', 'g', 'r', 'c', 'm', 'y', 'k']
@@ -183,19 +183,14 @@ def plot_clustering_silhouette(distance_matrix, cluster_labels, subplot=None, sh
     # plots of individual clusters, to demarcate them clearly.
     subplot.set_ylim([0, len(distance_matrix) + (k + 1) * 10])
 
-    # The silhouette_score gives the average value for all the samples.
-    # This gives a perspective into the density and separation of the formed clusters.
-    # Since we are using DTW for distance, we need to precalculate the distances (UGH)
-    silhouette_avg = silhouette_score(X=distance_matrix, labels=cluster_labels,
-                                      metric="precomputed")
+    # Compute the silhouette scores for each sample, the silhouette_avg gives the average value
+    # for all the samples. This gives a perspective into the density and separation of the
+    # formed clusters. Since we are using DTW for distance, we need to precalculate the distances
+    sample_silhouette_values = silhouette_util.silhouette_samples(distance_matrix, cluster_labels)
+    silhouette_avg = np.mean(sample_silhouette_values)
 
     logger.debug('The average silhouette_score for k={} is: {}'.format(k, silhouette_avg))
 
-    # Compute the silhouette scores for each sample
-    # Since we are using DTW for distance, we need to precalculate the distances (UGH)
-    sample_silhouette_values = silhouette_samples(distance_matrix, cluster_labels,
-                                                  metric="precomputed")
-
     y_lower = 10
     for i in range(0, k):
         # Aggregate the silhouette scores for samples belonging to
@@ -0,0 +1,98 @@
+'''
+Silhouette of a clustering given a precomputed distance matrix, without plotting.
+
+For each point i, a(i) is the mean distance to the other members of its cluster and b(i) is the
+lowest mean distance to the members of another cluster. Both are obtained from the (n, k) sums
+of the distances of each point to the members of each cluster, which is a single product of the
+rows of the distance matrix with the (N, k) one-hot matrix of the labels. The rows are read in
+blocks, so a memory-mapped distance matrix is not loaded at once.
+
+The silhouette can be computed for a random sample of the points: each sampled point still uses
+its distances to all the points, so only the average is approximated.
+
+Same values as sklearn.metrics.silhouette_samples with metric='precomputed'.
+'''
+
+import numpy as np
+
+
+def cluster_distance_sums(distance_matrix, labels, k, point_indices, block_rows=1000):
+    '''
+    The sums of the distances between each point in point_indices and the members of each
+    cluster (len(point_indices), k). The labels must be in [0, k-1].
+    '''
+    one_hot = np.zeros((len(labels), k))
+    one_hot[np.arange(len(labels)), labels] = 1
+
+    sums = np.empty((len(point_indices), k))
+    for block_start in range(0, len(point_indices), block_rows):
+        block_end = min(block_start + block_rows, len(point_indices))
+        block_indices = point_indices[block_start:block_end]
+
+        # rows of the distance matrix for this block, contiguous if not sampled
+        if block_indices[-1] - block_indices[0] == len(block_indices) - 1:
+            rows = distance_matrix[block_indices[0]:(block_indices[-1] + 1)]
+        else:
+            rows = distance_matrix[block_indices]
+
+        sums[block_start:block_end] = np.dot(rows, one_hot)
+
+    return sums
+
+
+def silhouette_samples(distance_matrix, labels, point_indices=None, block_rows=1000):
+    '''
+    The silhouette of each point in point_indices (all the points by default), given the
+    distance matrix (N, N) and the labels of the N points. A point that is the only member of
+    its cluster has silhouette 0.
+    '''
+    (unique_labels, labels) = np.unique(np.asarray(labels).reshape(-1), return_inverse=True)
+    n_samples = len(labels)
+    k = len(unique_labels)
+
+    if not 2 <= k <= n_samples - 1:
+        error_msg = 'Number of labels is {}, valid values are 2 to n_samples - 1 (inclusive)'
+        raise ValueError(error_msg.format(k))
+
+    if point_indices is None:
+        point_indices = np.arange(n_samples)
+    point_indices = np.asarray(point_indices)
+
+    sums = cluster_distance_sums(distance_matrix, labels, k, point_indices, block_rows)
+    cluster_sizes = np.bincount(labels, minlength=k)
+
+    own_clusters = labels[point_indices]
+    own_sizes = cluster_sizes[own_clusters]
+    rows = np.arange(len(point_indices))
+
+    # a(i): the point itself is at zero distance, but it is not counted
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = sums[rows, own_clusters] / (own_sizes - 1)
+
+    # b(i): the nearest other cluster, on average
+    mean_distances = sums / cluster_sizes
+    mean_distances[rows, own_clusters] = np.inf
+    b = np.min(mean_distances, axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        silhouettes = (b - a) / np.maximum(a, b)
+
+    silhouettes[own_sizes == 1] = 0
+    return silhouettes
+
+
+def silhouette_score(distance_matrix, labels, sample_size=None, random_seed=None,
+                     block_rows=1000):
+    '''
+    The average silhouette of the points, see silhouette_samples. If sample_size is given,
+    the average is taken over a random sample of the points.
+    '''
+    n_samples = np.asarray(labels).size
+
+    point_indices = None
+    if sample_size is not None and sample_size < n_samples:
+        random_state = np.random.RandomState(random_seed)
+        point_indices = np.sort(random_state.choice(n_samples, size=sample_size, replace=False))
+
+    silhouettes = silhouette_samples(distance_matrix, labels, point_indices, block_rows)
+    return np.mean(silhouettes)